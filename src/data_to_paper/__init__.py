@@ -1 +1,8 @@
+import importlib.metadata
+
 from .conversation import Conversation, Role, Message
+
+try:
+    __version__ = importlib.metadata.version('data_to_paper')
+except importlib.metadata.PackageNotFoundError:  # running from source, without installing
+    __version__ = None
@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 import os
-import shutil
-import zipfile
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, List, Union
@@ -12,7 +10,8 @@ import pandas as pd
 from data_to_paper.code_and_output_files.file_view_params import ViewPurpose
 from data_to_paper.env import FOLDER_FOR_RUN
 from data_to_paper.latex.clean_latex import wrap_as_latex_code_output
-from data_to_paper.utils.file_utils import run_in_directory, clear_directory
+from data_to_paper.utils.file_utils import use_directory, clear_directory, resolve_path
+from data_to_paper.utils.file_staging import stage_file, stage_zip_content
 from data_to_paper.utils.mutable import Mutable
 from data_to_paper.code_and_output_files.referencable_text import NumericReferenceableText, \
     hypertarget_if_referencable_text_product, ReferencableTextProduct
@@ -45,7 +44,7 @@ class DataFileDescription:
         """
         if self.is_excel():
             # go over all sheets and return all of them:
-            df = pd.read_excel(self.file_path, sheet_name=None)
+            df = pd.read_excel(resolve_path(self.file_path), sheet_name=None)
             s = f'This is an Excel file with {len(df)} sheets. Here is the first few rows for each sheet:\n\n'
             for sheet_name in df.keys():
                 s += f'### Sheet: "{sheet_name}"\n'
@@ -53,7 +52,7 @@ class DataFileDescription:
             s += '\n'
             return s
 
-        with open(self.file_path) as f:
+        with open(resolve_path(self.file_path)) as f:
             head = []
             for _ in range(num_lines):
                 try:
@@ -141,7 +140,7 @@ class DataFileDescriptions(List[DataFileDescription]):
             s += '## General Description\n'
             s += hypertarget_if_referencable_text_product(self.general_description, view_purpose,
                                                           with_header=False) + '\n'
-        with run_in_directory(self.data_folder):
+        with use_directory(self.data_folder):
             s += '## Data Files\n'
             if len(self) == 0:
                 s += 'There are no data files'
@@ -247,12 +246,11 @@ class CreateDataFileDescriptions:
             data_file_path = self._convert_data_file_path_str_to_path(data_file_str_path)
             data_file_path_zip = data_file_path.with_name(data_file_path.name + '.zip')
             if os.path.exists(data_file_path):
-                # copy file to data folder
-                shutil.copyfile(data_file_path, self.temp_folder_to_run_in / data_file_path.name)
+                # stage file in data folder (reflink/hardlink/symlink, rather than copy)
+                stage_file(data_file_path, self.temp_folder_to_run_in / data_file_path.name)
             elif os.path.exists(data_file_path_zip):
-                # unzip file to data folder
-                with zipfile.ZipFile(data_file_path_zip, 'r') as zip_ref:
-                    zip_ref.extractall(self.temp_folder_to_run_in)
+                # stage the unzipped content in data folder (the zip is extracted once, into a shared store)
+                stage_zip_content(data_file_path_zip, self.temp_folder_to_run_in)
             else:
                 raise FileNotFoundError(f"File {data_file_path.name} or {data_file_path.name}.zip "
                                         f"not found in {data_file_path.parent}")
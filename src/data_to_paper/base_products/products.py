@@ -1,5 +1,9 @@
-from dataclasses import dataclass
-from typing import NamedTuple, Union, Callable, Tuple, Dict, List, Any
+import dis
+from dataclasses import dataclass, field, fields, is_dataclass
+from enum import Enum
+from pathlib import PurePath
+from types import CodeType
+from typing import NamedTuple, Union, Callable, Tuple, Dict, List, Any, Optional, Set, FrozenSet
 
 from data_to_paper.base_products.product import Product
 from data_to_paper.conversation.stage import Stage
@@ -39,6 +43,85 @@ def _convert_args_or_kwargs_to_args(args_or_kwargs: ArgsOrKwargs) -> Tuple[str]:
         return tuple(args_or_kwargs.values())
 
 
+# Values that cannot be changed in place; their token is the value itself:
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, Enum, PurePath)
+
+
+class _UntrackableValue(Exception):
+    """
+    Raised for values whose changes we cannot track (see `_get_content_token`).
+    """
+    pass
+
+
+def _get_content_token(value: Any, ids_in_path: FrozenSet[int] = frozenset()) -> Any:
+    """
+    Return a token of the content of the value, which changes whenever the value, or any of its items or
+    attributes (at any depth), is replaced or changed in place.
+    We track immutable values, dicts, lists, tuples, sets and dataclasses.
+    Raise _UntrackableValue for any other value (like a dataframe), or for a value that contains itself.
+    """
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return type(value), value
+    if id(value) in ids_in_path:
+        raise _UntrackableValue()
+    ids_in_path = ids_in_path | {id(value)}
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, (list, tuple)):
+        items = enumerate(value)
+    elif isinstance(value, (set, frozenset)):
+        return type(value), frozenset(_get_content_token(item, ids_in_path) for item in value)
+    elif is_dataclass(value) and not isinstance(value, type) and hasattr(value, '__dict__'):
+        items = vars(value).items()
+    else:
+        raise _UntrackableValue()
+    return type(value), tuple((_get_content_token(key, ids_in_path), _get_content_token(item, ids_in_path))
+                              for key, item in items)
+
+
+def _get_codes(code: CodeType) -> List[CodeType]:
+    """
+    Return the code and the codes of its nested functions and lambdas.
+    """
+    codes = [code]
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            codes.extend(_get_codes(const))
+    return codes
+
+
+def _get_attrs_of_obj_used_by_func(func: Callable, obj: Any) -> Optional[Set[str]]:
+    """
+    Return the names of the attributes of `obj` used by the function (directly, or in its nested functions).
+    `obj` can be referred to by the function as a closure variable, or as `self` of a bound method.
+    Return None if we cannot tell, namely if the function is not plain python code, or if `obj` is used other than
+    by getting its attributes (e.g. passed to another function).
+    """
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return None
+    names_of_obj = {name for name, cell in zip(code.co_freevars, func.__closure__ or ())
+                    if cell.cell_contents is obj}
+    if getattr(func, '__self__', None) is obj:
+        names_of_obj.add(code.co_varnames[0])
+    attrs = set()
+    for code in _get_codes(code):
+        instructions = list(dis.get_instructions(code))
+        for instruction, next_instruction in zip(instructions, instructions[1:] + [None]):
+            argvals = instruction.argval if isinstance(instruction.argval, tuple) else (instruction.argval, )
+            if not any(isinstance(argval, str) and argval in names_of_obj for argval in argvals):
+                continue
+            if instruction.opname in ('LOAD_CLOSURE', 'MAKE_CELL'):
+                continue  # passed to a nested function, which we also check
+            if instruction.opname in ('LOAD_DEREF', 'LOAD_FAST', 'LOAD_FAST_CHECK') and \
+                    next_instruction is not None and next_instruction.opname in ('LOAD_ATTR', 'LOAD_METHOD'):
+                attrs.add(next_instruction.argval)
+                continue
+            return None
+    return attrs
+
+
 @dataclass
 class Products:
     """
@@ -50,6 +133,15 @@ class Products:
     _fields_to_unified_product_generators: Dict[str, UnifiedProductGenerator] = None
     _raise_on_none: bool = False
 
+    # Rendered products are cached, keyed by (field, rendering).
+    # A cached rendering is used only if the content of the product values it depends on is unchanged (see
+    # `_get_dependencies_token`). Renderings that depend on values whose content we cannot track are not cached.
+    _fields_and_renderings_to_tokens_and_results: Dict[Tuple[str, str], Tuple[Any, Any]] = \
+        field(default_factory=dict, init=False, repr=False, compare=False)
+    _generators_and_field_index: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    render_cache_hits: int = field(default=0, init=False, repr=False, compare=False)
+    render_cache_misses: int = field(default=0, init=False, repr=False, compare=False)
+
     def __post_init__(self):
         self._fields_to_unified_product_generators = self._get_generators()
 
@@ -118,6 +210,12 @@ class Products:
         """
         Return the name, stage, and description generator of the given field.
         """
+        if self._raise_on_none:
+            return self._create_name_description_stage(field)
+        return self._get_cached_rendering(field, 'name_description_stage',
+                                          lambda: self._create_name_description_stage(field))
+
+    def _create_name_description_stage(self, field: str) -> NameDescriptionStage:
         unified_product, variables = self._get_unified_product_and_variables(field)
         if self._raise_on_none and any(v is None for v in _convert_args_or_kwargs_to_args(variables)):
             raise ValueError(f'One of the variables in {variables} is None')
@@ -143,6 +241,9 @@ class Products:
         """
         Return the product of the given field.
         """
+        return self._get_cached_rendering(field, 'html', lambda: self._create_description_as_html(field))
+
+    def _create_description_as_html(self, field: str) -> str:
         unified_product, variables = self._get_unified_product_and_variables(field)
         if isinstance(unified_product, Product):
             return unified_product.as_html(level=1, **variables)
@@ -158,24 +259,104 @@ class Products:
         description = self.get_description(field)
         return f'# {name}\n{description}'
 
+    def _get_field_index(self) -> Tuple[Dict[int, List[Tuple[Tuple[str, ...], UnifiedProductGenerator]]],
+                                        Dict[str, Tuple[UnifiedProductGenerator, List[str]]]]:
+        """
+        Return the field patterns, split into subfields and grouped by their number of subfields
+        (keeping their order), and a memo of the fields already routed.
+        Re-created if the generators are replaced.
+        """
+        generators = self._fields_to_unified_product_generators
+        if self._generators_and_field_index is None or self._generators_and_field_index[0] is not generators:
+            lens_to_patterns = {}
+            for current_field, unified_product in generators.items():
+                current_subfields = tuple(self.extract_subfields(current_field))
+                lens_to_patterns.setdefault(len(current_subfields), []).append((current_subfields, unified_product))
+            self._generators_and_field_index = (generators, lens_to_patterns, {}, {})
+        return self._generators_and_field_index[1:3]
+
     def _get_unified_product_generator_and_args(self, field: str
                                                 ) -> Tuple[UnifiedProductGenerator, List[str]]:
         """
         Return the name, stage, and description of the given field.
         """
-        subfields = self.extract_subfields(field)
-        for current_field, unified_product in self._fields_to_unified_product_generators.items():
-            current_subfields = self.extract_subfields(current_field)
-            wildcard_subfields = []
-            if len(subfields) == len(current_subfields):
+        lens_to_patterns, fields_to_generators_and_args = self._get_field_index()
+        if field not in fields_to_generators_and_args:
+            subfields = self.extract_subfields(field)
+            for current_subfields, unified_product in lens_to_patterns.get(len(subfields), []):
+                wildcard_subfields = []
                 for subfield, current_subfield in zip(subfields, current_subfields):
                     if current_subfield == '{}':
                         wildcard_subfields.append(subfield)
                     elif subfield != current_subfield:
                         break
                 else:
-                    return unified_product, wildcard_subfields
-        raise ValueError(f'Unknown product field: {field}')
+                    fields_to_generators_and_args[field] = (unified_product, wildcard_subfields)
+                    break
+            else:
+                raise ValueError(f'Unknown product field: {field}')
+        unified_product, wildcard_subfields = fields_to_generators_and_args[field]
+        return unified_product, list(wildcard_subfields)
+
+    """RENDER CACHE"""
+
+    def _get_names_of_product_values(self) -> List[str]:
+        return [f.name for f in fields(self) if not f.name.startswith('_')
+                and f.name not in ('render_cache_hits', 'render_cache_misses')]
+
+    def _get_dependencies_of_field(self, field: str) -> List[str]:
+        """
+        Return the names of the product values that the rendering of the field depends on.
+        Determined from the attributes of the products used by the generator functions; if they use any method or
+        property of the products, or use the products otherwise (e.g. pass them to another function), the field
+        conservatively depends on all product values.
+        """
+        unified_product_generator, _ = self._get_unified_product_generator_and_args(field)
+        fields_to_dependencies = self._generators_and_field_index[3]
+        if field not in fields_to_dependencies:
+            fields_to_dependencies[field] = self._get_dependencies_of_generator(unified_product_generator)
+        return fields_to_dependencies[field]
+
+    def _get_dependencies_of_generator(self, unified_product_generator: UnifiedProductGenerator) -> List[str]:
+        names_of_product_values = self._get_names_of_product_values()
+        names = set()
+        for func in unified_product_generator:
+            if not callable(func) or isinstance(func, Product):
+                continue
+            attrs = _get_attrs_of_obj_used_by_func(func, self)
+            if attrs is None or any(attr not in names_of_product_values for attr in attrs):
+                return names_of_product_values
+            names |= attrs
+        return [name for name in names_of_product_values if name in names]
+
+    def _get_dependencies_token(self, field: str) -> Any:
+        """
+        Return a token of the content of the product values that the rendering of the field depends on.
+        Raise _UntrackableValue if we cannot track the content of any of them.
+        """
+        return tuple(_get_content_token(getattr(self, name)) for name in self._get_dependencies_of_field(field))
+
+    def _get_cached_rendering(self, field: str, rendering: str, func: Callable[[], Any]) -> Any:
+        """
+        Return the cached rendering of the field, or create it with `func`.
+        """
+        try:
+            token = self._get_dependencies_token(field)
+        except _UntrackableValue:
+            self.render_cache_misses += 1
+            return func()
+        key = (field, rendering)
+        cached = self._fields_and_renderings_to_tokens_and_results.get(key)
+        if cached is not None and cached[0] == token:
+            self.render_cache_hits += 1
+            return cached[1]
+        self.render_cache_misses += 1
+        result = func()
+        self._fields_and_renderings_to_tokens_and_results[key] = (token, result)
+        return result
+
+    def clear_render_cache(self):
+        self._fields_and_renderings_to_tokens_and_results.clear()
 
     def is_product_available(self, field: str) -> bool:
         """
@@ -185,6 +366,12 @@ class Products:
         Trying to access an unavailable attributes is also interpreted as False, namely the sub-product
         is not available.
         """
+        try:
+            return self._get_cached_rendering(field, 'is_available', lambda: self._is_product_available(field))
+        except ValueError:  # unknown field
+            return False
+
+    def _is_product_available(self, field: str) -> bool:
         try:
             self._raise_on_none = True
             _, variables = self._get_unified_product_and_variables(field)
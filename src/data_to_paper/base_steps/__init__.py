@@ -13,6 +13,9 @@ Base classes to use for building each step in a multi-step process towards a goa
 # Base class for running multiple steps while accumulating Products towards a goal:
 from .base_steps_runner import BaseStepsRunner, DataStepRunner
 
+# Declaring the products that each stage reads and writes (allowing independent stages to run concurrently):
+from .stages_dag import StageProducts
+
 # In each step, we can use the Products from the previous step and choose
 # from one of the base-classes below to create new Products.
 
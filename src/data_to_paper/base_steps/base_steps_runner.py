@@ -1,35 +1,42 @@
+import copy
 import glob
 import json
 import os
 import shutil
+import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass, field
 
 from pathlib import Path
-from typing import Union, Type, Optional, Dict, Callable
+from typing import Union, Type, Optional, Dict, Callable, List
 
 from data_to_paper.base_products.file_descriptions import CreateDataFileDescriptions, DataFileDescriptions
-from data_to_paper.env import FOLDER_FOR_RUN, DEBUG_MODE
+from data_to_paper.env import FOLDER_FOR_RUN, DEBUG_MODE, MAX_CONCURRENT_STAGES
 from data_to_paper.interactive.base_app_startup import BaseStartDialog
 from data_to_paper.servers.api_cost import StageToCost
 from data_to_paper.utils.file_utils import clear_directory
-from data_to_paper.utils.print_to_file import print_and_log, console_log_file_context
+from data_to_paper.utils.print_to_file import print_and_log, console_log_file_context, flush_console_log
 from data_to_paper.servers.llm_call import OPENAI_SERVER_CALLER, LLMServerCaller
 from data_to_paper.servers.semantic_scholar import SEMANTIC_SCHOLAR_SERVER_CALLER, \
     SEMANTIC_SCHOLAR_EMBEDDING_SERVER_CALLER
 from data_to_paper.conversation.stage import Stage
-from data_to_paper.conversation.actions_and_conversations import ActionsAndConversations
+from data_to_paper.conversation.actions_and_conversations import ActionsAndConversations, Actions, Conversations
 from data_to_paper.terminate.exceptions import TerminateException, ResetStepException
 from data_to_paper.run_gpt_code.code_runner_wrapper import RUN_CACHE_FILEPATH
 from data_to_paper.text import dedent_triple_quote_str
 from data_to_paper.utils.replacer import Replacer
 
 from data_to_paper.base_steps.base_products_conversers import ProductsHandler
+from data_to_paper.base_steps.stages_dag import StageProducts, get_stages_dag, get_stages_that_can_run_concurrently
 from data_to_paper.interactive.app_interactor import AppInteractor, _raise_if_reset
 from data_to_paper.interactive import PanelNames, BaseApp
 from data_to_paper.text.text_formatting import add_header_and_footer_lines
 
+# The stage run by the current thread, when running stages concurrently:
+_THREAD_STAGE = threading.local()
+
 
 @dataclass
 class BaseStepsRunner(ProductsHandler, AppInteractor):
@@ -66,8 +73,14 @@ class BaseStepsRunner(ProductsHandler, AppInteractor):
     current_stage: Stage = None
 
     _stages_to_api_usage_cost: StageToCost = field(default_factory=StageToCost)
+    _api_usage_cost_lock: threading.Lock = field(default_factory=threading.Lock)
     stages_to_funcs: Dict[Stage, Callable] = None
 
+    # The products that each stage reads and writes.
+    # Consecutive stages that declare their products can run concurrently, by their dependencies
+    # (see MAX_CONCURRENT_STAGES):
+    stages_to_products: Dict[Stage, StageProducts] = None
+
     _current_exception: Optional[Exception] = None
     _prior_stage: Optional[Stage] = None
 
@@ -123,12 +136,13 @@ class BaseStepsRunner(ProductsHandler, AppInteractor):
         """)
 
     def _get_current_stage(self):
-        return self.current_stage
+        return getattr(_THREAD_STAGE, 'stage', None) or self.current_stage
 
     def advance_stage(self, stage: Union[Stage, bool]):
         """
         Advance the stage.
         """
+        flush_console_log()
         self.current_stage = stage
         if isinstance(stage, Stage) or stage is True:
             self._app_advance_stage(stage=stage)
@@ -182,7 +196,11 @@ class BaseStepsRunner(ProductsHandler, AppInteractor):
         while True:
             self.advance_stage(stage)
             try:
-                next_stage = self._run_stage(stage)
+                concurrent_stages = self._get_stages_to_run_concurrently(stage)
+                if len(concurrent_stages) > 1:
+                    next_stage = self._run_stages_concurrently(concurrent_stages)
+                else:
+                    next_stage = self._run_stage(stage)
             except ResetStepException as e:
                 if e.stage is True:
                     if stage is True:
@@ -200,12 +218,102 @@ class BaseStepsRunner(ProductsHandler, AppInteractor):
                 next_stage = False  # Failure stage
             if next_stage is None:  # Default next stage
                 try:
-                    next_stage = stage.get_next()
+                    next_stage = self.current_stage.get_next()
                 except ValueError:
                     next_stage = True  # Success stage
-            self._prior_stage = stage
+            self._prior_stage = self.current_stage
             stage = next_stage
 
+    def _get_stages_to_run_concurrently(self, stage: Union[Stage, bool]) -> List[Stage]:
+        """
+        Get the stages, starting with the given stage, that can be scheduled concurrently by their dependencies.
+        We only run stages concurrently without the app, which interacts with the user stage by stage.
+        """
+        if self.app is not None or MAX_CONCURRENT_STAGES.val <= 1 or not self.stages_to_products \
+                or not isinstance(stage, Stage):
+            return [stage]
+        return get_stages_that_can_run_concurrently(stage, self.stages_to_products)
+
+    def _get_stage_func(self, stage: Stage) -> Callable:
+        """
+        Get the function of the stage, bound to self (the stage funcs are defined as methods of the main runner).
+        """
+        func = self.stages_to_funcs[stage]
+        if isinstance(getattr(func, '__self__', None), BaseStepsRunner):
+            func = getattr(self, func.__name__)
+        return func
+
+    def _fork_for_stage(self, stage: Stage) -> 'BaseStepsRunner':
+        """
+        Create a shallow copy of the runner, for running the stage concurrently with other stages.
+        The fork shares the products, but has its own actions and conversations, which are merged back
+        after the stage is completed (see `_merge_fork_of_stage`).
+        """
+        fork = copy.copy(self)
+        conversations = Conversations()
+        conversations.update(self.actions_and_conversations.conversations)
+        fork.actions_and_conversations = ActionsAndConversations(actions=Actions(), conversations=conversations)
+        fork.current_stage = stage
+        return fork
+
+    def _merge_fork_of_stage(self, stage: Stage, fork: 'BaseStepsRunner'):
+        """
+        Merge the actions and conversations of the fork, as if the stage was run after the stages merged before it.
+        """
+        conversations = self.actions_and_conversations.conversations
+        self.stages_to_conversations_lens[stage] = len(conversations)
+        for name, conversation in fork.actions_and_conversations.conversations.items():
+            if name not in conversations:
+                conversations[name] = conversation
+        self.actions_and_conversations.actions.extend(fork.actions_and_conversations.actions)
+        self._add_cost_to_stage(stage=stage)
+
+    def _run_stage_of_fork(self, stage: Stage, fork: 'BaseStepsRunner') -> Optional[Stage]:
+        _THREAD_STAGE.stage = stage
+        try:
+            return fork._run_stage(stage)
+        finally:
+            _THREAD_STAGE.stage = None
+
+    def _run_stages_concurrently(self, stages: List[Stage]) -> Optional[Stage]:
+        """
+        Run the stages, each as soon as all the prior stages that it depends on are completed.
+        The stages are then merged by their order, as if they were run sequentially.
+        If a stage fails, no new stages are started, and the exception of the earliest failed stage is raised.
+        Return the next stage to run (like `_run_stage`).
+        """
+        dag = get_stages_dag(stages, self.stages_to_products)
+        forks = {stage: self._fork_for_stage(stage) for stage in stages}
+        next_stages: Dict[Stage, Optional[Stage]] = {}
+        exceptions: Dict[Stage, Exception] = {}
+        pending_stages = list(stages)
+        futures_to_stages = {}
+        with self.server_caller.replay_keys_concurrently([stage.value for stage in stages]), \
+                ThreadPoolExecutor(max_workers=MAX_CONCURRENT_STAGES.val) as executor:
+            while futures_to_stages or pending_stages and not exceptions:
+                if not exceptions:
+                    for stage in [stage for stage in pending_stages if dag[stage].issubset(next_stages)]:
+                        pending_stages.remove(stage)
+                        futures_to_stages[executor.submit(self._run_stage_of_fork, stage, forks[stage])] = stage
+                done, _ = wait(futures_to_stages, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = futures_to_stages.pop(future)
+                    try:
+                        next_stages[stage] = future.result()
+                    except Exception as e:
+                        exceptions[stage] = e
+
+        for stage in stages:
+            if stage not in next_stages and stage not in exceptions:
+                break
+            self._merge_fork_of_stage(stage, forks[stage])
+            self.current_stage = stage
+            if stage in exceptions:
+                raise exceptions[stage]
+            if next_stages[stage] is not None:
+                return next_stages[stage]
+        return None
+
     @_raise_if_reset
     def _check_for_reset(self):
         """
@@ -271,7 +379,7 @@ class BaseStepsRunner(ProductsHandler, AppInteractor):
         elif stage is False:
             func = self._failed_step
         else:
-            func = self.stages_to_funcs[stage]
+            func = self._get_stage_func(stage)
         return func()
 
     def _get_files_to_keep(self):
@@ -397,9 +505,10 @@ class BaseStepsRunner(ProductsHandler, AppInteractor):
     """
 
     def _add_cost_to_stage(self, cost: float = 0, stage: Optional[Stage] = None):
-        stage = stage or self.current_stage
-        self._stages_to_api_usage_cost[stage] = self._stages_to_api_usage_cost.get(stage, 0) + cost
-        self._stages_to_api_usage_cost.save_to_json(self.output_directory / self.API_USAGE_COST_FILENAME)
+        stage = stage or self._get_current_stage()
+        with self._api_usage_cost_lock:
+            self._stages_to_api_usage_cost[stage] = self._stages_to_api_usage_cost.get(stage, 0) + cost
+            self._stages_to_api_usage_cost.save_to_json(self.output_directory / self.API_USAGE_COST_FILENAME)
         self.app_send_api_usage_cost()
 
     def app_send_api_usage_cost(self):
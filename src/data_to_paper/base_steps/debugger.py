@@ -310,6 +310,8 @@ class DebuggerConverser(BackgroundProductsConverser):
         files_to_contents = code_and_output.created_files.get_created_content_files_to_contents()
         for requirement in self.output_file_requirements:
             if isinstance(requirement, BaseContentOutputFileRequirement):
+                requirement.before_checking_output_file_contents(
+                    {filename: files_to_contents[filename] for filename in code_and_output.created_files[requirement]})
                 for filename in code_and_output.created_files[requirement]:
                     issues.extend(
                         self._get_issues_for_output_file_content(requirement, filename, files_to_contents[filename]))
@@ -356,6 +358,7 @@ class DebuggerConverser(BackgroundProductsConverser):
     def get_code_runner(self) -> CodeRunner:
         return self.code_runner_cls(
             allowed_open_read_files=self.data_filenames,
+            read_only_files=self.data_filenames or (),
             output_file_requirements=self.output_file_requirements,
             run_folder=self.data_folder,
             additional_contexts=self.additional_contexts,
@@ -1,5 +1,6 @@
 import re
 from dataclasses import dataclass, field
+from functools import partial
 
 from typing import Optional, List, Tuple
 
@@ -12,7 +13,7 @@ from data_to_paper.latex.exceptions import UnwantedCommandsUsedInLatex, BaseLate
 from data_to_paper.run_gpt_code.code_utils import extract_content_of_triple_quote_block, FailedExtractingBlock, \
     IncompleteBlockFailedExtractingBlock, NoBlocksFailedExtractingBlock
 from data_to_paper.latex.citataion_utils import find_citation_ids
-from data_to_paper.utils.types import ListBasedSet
+from data_to_paper.utils.types import OrderedSet
 from data_to_paper.latex.latex_doc import LatexDocument
 from data_to_paper.latex.clean_latex import process_latex_text_and_math, check_usage_of_un_allowed_commands
 from data_to_paper.latex.latex_section_tags import get_list_of_tag_pairs_for_section_or_fragment, \
@@ -20,7 +21,7 @@ from data_to_paper.latex.latex_section_tags import get_list_of_tag_pairs_for_sec
 from data_to_paper.servers.model_engine import ModelEngine
 
 from .base_products_conversers import ReviewBackgroundProductsConverser
-from .result_converser import Rewind
+from .result_converser import Rewind, RuleBasedCheck
 
 
 def is_similar_bibtex_ids(incorrect_id: str, correct_id: str) -> bool:
@@ -168,8 +169,8 @@ class LatexReviewBackgroundProductsConverser(ReviewBackgroundProductsConverser):
         Raise if citing un-allowed citations, or correct similar citations to the correct one.
         """
         allowed_ids = self._get_allowed_bibtex_citation_ids()
-        not_found_ids = ListBasedSet([citation_id for citation_id in find_citation_ids(section)
-                                      if citation_id not in allowed_ids])
+        not_found_ids = OrderedSet([citation_id for citation_id in find_citation_ids(section)
+                                    if citation_id not in allowed_ids])
         # Correct almost-matching citations:
         not_found_and_not_corrected_ids = []
         for not_found_id in not_found_ids:
@@ -192,8 +193,8 @@ class LatexReviewBackgroundProductsConverser(ReviewBackgroundProductsConverser):
         if self.response_to_floating_citations:
             section_without_citations = remove_citations_from_section(section)
             allowed_ids = self._get_allowed_bibtex_citation_ids()
-            floating_ids = ListBasedSet([citation_id for citation_id in allowed_ids
-                                         if citation_id in section_without_citations])
+            floating_ids = OrderedSet([citation_id for citation_id in allowed_ids
+                                       if citation_id in section_without_citations])
             if floating_ids:
                 self._raise_self_response_error(
                     title='# Floating citation ids',
@@ -250,20 +251,44 @@ class LatexReviewBackgroundProductsConverser(ReviewBackgroundProductsConverser):
         return [self._extract_latex_section_from_response(response, section_name)
                 for section_name in self.section_names]
 
-    def _check_extracted_text_and_update_valid_result(self, extracted_text: List[str]):
-
-        # check and refine the sections
-        for i in range(len(extracted_text)):
-            extracted_text[i] = self._check_and_refine_section(extracted_text[i], self.section_names[i])
+    def _check_refined_section(self, section: str, section_name: str):
+        """
+        Check the section after it was refined (see `_check_and_refine_section`).
+        These checks do not change the section, and run concurrently with the latex compilation.
+        """
+        pass
 
-        # check the latex compilation
+    def _check_latex_compilation(self, *sections: str):
         try:
-            _, _, width = self.latex_document.compile_document(
-                {section_name: section for section_name, section in zip(self.section_names, extracted_text)})
+            self.latex_document.compile_document(
+                {section_name: section for section_name, section in zip(self.section_names, sections)},
+                format_cite=False)  # only checking validity; no need for the additional pdflatex passes
         except BaseLatexProblemInCompilation as e:
             self._raise_self_response_error(
                 title='# LaTex compilation error',
                 error_message=str(e))
 
+    def _check_extracted_text_and_update_valid_result(self, extracted_text: List[str]):
+        # check and refine all the sections, then check the refined sections while the latex compilation runs
+        # in the background:
+        checks = []
+        for i, section_name in enumerate(self.section_names):
+            checks.append(RuleBasedCheck(f'refine:{i}', partial(self._check_and_refine_section,
+                                                                extracted_text[i], section_name)))
+        for i, section_name in enumerate(self.section_names):
+            checks.append(RuleBasedCheck(f'check:{i}', partial(self._check_refined_section, section_name=section_name),
+                                         depends_on=(f'refine:{i}', )))
+        checks.append(RuleBasedCheck('compile', self._check_latex_compilation,
+                                     depends_on=tuple(f'refine:{i}' for i in range(len(self.section_names))),
+                                     in_background=True))
+        # merge the errors section by section, as in checking each section in turn:
+        errors_order = [f'{check}:{i}' for i in range(len(self.section_names)) for check in ('refine', 'check')]
+        names_to_results, response_error = self._run_rule_based_checks(checks, errors_order + ['compile'])
+        for i in range(len(extracted_text)):
+            if f'refine:{i}' in names_to_results:
+                extracted_text[i] = names_to_results[f'refine:{i}']
+        if response_error:
+            raise response_error
+
         # store the result if there are no exceptions:
         self._update_valid_result(extracted_text)
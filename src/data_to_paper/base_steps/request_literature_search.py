@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from functools import partial
 from typing import Dict, List, Collection, Optional, Any
 
-from data_to_paper.env import PAUSE_AFTER_LITERATURE_SEARCH, JSON_MODE
+from data_to_paper.env import PAUSE_AFTER_LITERATURE_SEARCH, JSON_MODE, MAX_CONCURRENT_LITERATURE_QUERIES
 
 from data_to_paper.text import dedent_triple_quote_str, word_count
 from data_to_paper.utils.nice_list import NiceDict, NiceList
@@ -162,15 +162,22 @@ class BaseLiteratureSearchReviewGPT(PythonDictWithDefinedKeysReviewBackgroundPro
             html += f'<h2>Querying Citations</h2>\n'
             html += f'<p>Searching "{SEMANTIC_SCHOLAR_SERVER_CALLER.name}" ' \
                     f'for papers related to our study in the following areas:</p>\n'
+            self._send_html_and_scroll_to_bottom(html)
+            # The queries are independent, so we send them concurrently.
+            # The responses are returned (and recorded) in the order of the queries:
+            responses_and_latencies = iter(SEMANTIC_SCHOLAR_SERVER_CALLER.get_server_responses(
+                [((query, ), dict(rows=self.number_of_papers_per_query))
+                 for queries in scopes_to_list_of_queries.values() for query in queries],
+                max_workers=MAX_CONCURRENT_LITERATURE_QUERIES.val))
             for scope, queries in scopes_to_list_of_queries.items():
                 queries_to_citations = {}
                 html += f'<h3>{scope.title()}-related queries:</h3>\n'
                 for query in queries:
-                    citations = SEMANTIC_SCHOLAR_SERVER_CALLER.get_server_response(query,
-                                                                                   rows=self.number_of_papers_per_query)
+                    citations, latency = next(responses_and_latencies)
                     num_citations = len(citations)
                     html += f'<p><b style="color: #1E90FF;">Query:</b> "{query}".\n'
-                    html += f'<br><b style="color: #1E90FF;">Found:</b> {num_citations} citations.</p>\n'
+                    html += f'<br><b style="color: #1E90FF;">Found:</b> {num_citations} citations ' \
+                            f'({latency:.1f} sec).</p>\n'
                     self._send_html_and_scroll_to_bottom(html)
                     self.comment(f'\nQuerying Semantic Scholar. '
                                  f'Found {num_citations} / {self.number_of_papers_per_query} citations. '
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Optional, Tuple, Union, Iterable, Type
+from typing import Any, Optional, Tuple, Union, Iterable, Type, Callable, List, Dict
 
 from data_to_paper.base_products.product import Product, ValueProduct
 from data_to_paper.base_steps.converser import Converser
 from data_to_paper.base_steps.exceptions import FailedCreatingProductException
 from data_to_paper.conversation.message_designation import RangeMessageDesignation, SingleMessageDesignation
 from data_to_paper.conversation.stage import Stage
-from data_to_paper.env import PAUSE_AT_RULE_BASED_FEEDBACK
+from data_to_paper.env import PAUSE_AT_RULE_BASED_FEEDBACK, MAX_CONCURRENT_RULE_BASED_CHECKS
 from data_to_paper.exceptions import data_to_paperException
 from data_to_paper.interactive import PanelNames
 from data_to_paper.text.highlighted_text import format_text_with_code_blocks
@@ -101,6 +104,21 @@ class SelfResponseError(data_to_paperException):
         return f'SelfResponseError: {self.error_message}'
 
 
+@dataclass
+class RuleBasedCheck:
+    """
+    A rule-based check of the response, run by `ResultConverser._run_rule_based_checks`.
+    The check is called with the results of the checks it depends on, and runs only if they all passed.
+    It should call _raise_self_response_error if the response is not valid.
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+    in_background: bool = False
+    # Run in a worker thread, concurrently with the other checks. Background checks should be slow
+    # (like latex compilation), and should not interact with the app or the console.
+
+
 class NoResponse:
     pass
 
@@ -273,6 +291,84 @@ class ResultConverser(Converser):
         return format_value(self, response_error.title) + '\n' + format_value(self, response_error.error_message) \
             + '\n' + format_value(self, formatting_instructions)
 
+    def _merge_response_errors(self, response_errors: List[SelfResponseError]) -> SelfResponseError:
+        """
+        Merge the errors of multiple checks into a single error.
+        The first error (the one that a sequential run of the checks would raise) determines the title, rewind,
+        model bump and added iterations. The titles and messages of the other errors are appended to its message.
+        """
+        first_error = response_errors[0]
+        if len(response_errors) == 1:
+            return first_error
+        error_message = first_error.error_message + ''.join(
+            '\n\n' + format_value(self, response_error.title) + '\n' + response_error.error_message
+            for response_error in response_errors[1:])
+        return SelfResponseError(error_message,
+                                 title=first_error.title, formatting_instructions=first_error.formatting_instructions,
+                                 rewind=first_error.rewind, bump_model=first_error.bump_model,
+                                 add_iterations=first_error.add_iterations)
+
+    def _run_rule_based_checks(self, checks: List[RuleBasedCheck], errors_order: Optional[Iterable[str]] = None
+                               ) -> Tuple[Dict[str, Any], Optional[SelfResponseError]]:
+        """
+        Run the checks, each after the checks it depends on have passed.
+        Background checks run in worker threads (up to MAX_CONCURRENT_RULE_BASED_CHECKS), started as soon as they
+        are ready, while the other checks run in the calling thread, in their given order.
+        Return the results of the passed checks, and the errors of the failed checks merged (in the order of the
+        check names in `errors_order`; default: the order of the checks) into a single SelfResponseError (None if
+        all checks passed).
+        Other exceptions are re-raised (the first, in the same order).
+        """
+        max_workers = MAX_CONCURRENT_RULE_BASED_CHECKS.val
+        names_to_results = {}
+        names_to_exceptions = {}
+        pending_checks = list(checks)
+
+        def run_check(check: RuleBasedCheck):
+            try:
+                names_to_results[check.name] = check.func(*(names_to_results[name] for name in check.depends_on))
+            except Exception as e:
+                names_to_exceptions[check.name] = e
+
+        with ThreadPoolExecutor(max_workers=max_workers) if max_workers else nullcontext() as executor:
+            futures = set()
+            while pending_checks or futures:
+                ready_checks = []
+                is_any_skipped = False
+                for check in list(pending_checks):
+                    if any(name in names_to_exceptions for name in check.depends_on):
+                        pending_checks.remove(check)  # skipped; a check it depends on failed
+                        names_to_exceptions[check.name] = None
+                        is_any_skipped = True
+                    elif all(name in names_to_results for name in check.depends_on):
+                        ready_checks.append(check)
+                # start the ready background checks first, so that they run while we run the other checks:
+                for check in ready_checks:
+                    if check.in_background and max_workers:
+                        pending_checks.remove(check)
+                        futures.add(executor.submit(contextvars.copy_context().run, run_check, check))
+                # then run the first ready check in the calling thread, and re-scan, so that checks run in their
+                # order as soon as they are ready:
+                check = next((check for check in ready_checks if check in pending_checks), None)
+                if check is not None:
+                    pending_checks.remove(check)
+                    run_check(check)
+                elif futures:
+                    _, futures = wait(futures, return_when=FIRST_COMPLETED)
+                elif pending_checks and not is_any_skipped:
+                    raise ValueError(f'Unresolved dependencies of checks: {[c.name for c in pending_checks]}')
+
+        if errors_order is None:
+            errors_order = [check.name for check in checks]
+        response_errors = []
+        for name in errors_order:
+            exception = names_to_exceptions.get(name)
+            if isinstance(exception, SelfResponseError):
+                response_errors.append(exception)
+            elif exception is not None:
+                raise exception
+        return names_to_results, self._merge_response_errors(response_errors) if response_errors else None
+
     """
     Response --> extracted_text --> valid_result --> Product
     """
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Tuple, Dict, Set, List, Iterable
+
+from data_to_paper.conversation.stage import Stage
+
+
+@dataclass(frozen=True)
+class StageProducts:
+    """
+    The products that a stage reads and writes.
+    Product names are related if they are equal, or if one is a ':'-prefix of the other
+    (e.g. 'literature_search:writing' is related to 'literature_search:writing:background').
+    """
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+
+
+def are_product_names_related(name1: str, name2: str) -> bool:
+    return name1 == name2 or name1.startswith(name2 + ':') or name2.startswith(name1 + ':')
+
+
+def _are_any_products_related(names1: Iterable[str], names2: Iterable[str]) -> bool:
+    return any(are_product_names_related(name1, name2) for name1 in names1 for name2 in names2)
+
+
+def is_stage_depending_on_prior_stage(stage_products: StageProducts, prior_stage_products: StageProducts) -> bool:
+    """
+    Check whether a stage must run after a prior stage: if it reads what the prior stage writes,
+    writes what the prior stage reads, or writes what the prior stage writes.
+    """
+    return _are_any_products_related(stage_products.reads, prior_stage_products.writes) \
+        or _are_any_products_related(stage_products.writes, prior_stage_products.reads) \
+        or _are_any_products_related(stage_products.writes, prior_stage_products.writes)
+
+
+def get_stages_dag(stages: Iterable[Stage], stages_to_products: Dict[Stage, StageProducts]
+                   ) -> Dict[Stage, Set[Stage]]:
+    """
+    Return the dependency graph of the stages, as a dict mapping each stage to the prior stages it depends on.
+    Stages that do not declare their products depend on all prior stages, and all following stages depend on them.
+    """
+    stages = list(stages)
+    dag = {}
+    for index, stage in enumerate(stages):
+        dag[stage] = set()
+        for prior_stage in stages[:index]:
+            if stage not in stages_to_products or prior_stage not in stages_to_products or \
+                    is_stage_depending_on_prior_stage(stages_to_products[stage], stages_to_products[prior_stage]):
+                dag[stage].add(prior_stage)
+    return dag
+
+
+def get_stages_that_can_run_concurrently(first_stage: Stage, stages_to_products: Dict[Stage, StageProducts]
+                                         ) -> List[Stage]:
+    """
+    Return the consecutive stages, starting with `first_stage`, that declare their products.
+    These stages can be scheduled by the dag among themselves.
+    """
+    stages = []
+    stage = first_stage
+    while stage in stages_to_products:
+        stages.append(stage)
+        try:
+            stage = stage.get_next()
+        except ValueError:
+            break
+    return stages
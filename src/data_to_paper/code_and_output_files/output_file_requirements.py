@@ -128,6 +128,13 @@ class BaseContentOutputFileRequirement(OutputFileRequirement):
         with open(file_path, 'r') as file:
             return file.read()
 
+    def before_checking_output_file_contents(self, filenames_to_contents: Dict[str, Any]):
+        """
+        Called with all the output files of this requirement, before each of them is checked.
+        Allows preparing for the checks of all files at once.
+        """
+        pass
+
     def get_issues_for_output_file_content(self, filename: str, content: Any) -> List[RunIssue]:
         """
         Check the output and return a list of issues.
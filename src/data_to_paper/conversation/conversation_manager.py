@@ -1,9 +1,9 @@
 from dataclasses import dataclass
-from typing import Optional, Set, Iterable, Union, List
+from typing import Optional, Set, Iterable, Union, List, Tuple
 
 from data_to_paper.utils.print_to_file import print_and_log_red
 from data_to_paper.base_cast import Agent
-from data_to_paper.servers.llm_call import try_get_llm_response
+from data_to_paper.servers.llm_call import try_get_llm_response, TooManyTokensInMessageError
 from data_to_paper.servers.model_engine import OPENAI_CALL_PARAMETERS_NAMES, OpenaiCallParameters, ModelEngine
 from data_to_paper.run_gpt_code.code_utils import add_label_to_first_triple_quotes_if_missing
 
@@ -205,9 +205,31 @@ class ConversationManager:
             if len(indices_and_messages) <= 1:
                 # we tried removing all messages and failed.
                 raise RuntimeError('Failed accessing openai despite removing all messages from context.')
-            print_and_log_red(f'############# Removing message from context #############')
-            index, _ = indices_and_messages.pop(1)
-            actual_hidden_messages.append(index)
+            num_messages_to_remove = self._get_number_of_messages_to_remove_from_context(indices_and_messages, message)
+            print_and_log_red(f'############# Removing {num_messages_to_remove} message(s) from context #############')
+            for _ in range(num_messages_to_remove):
+                index, _ = indices_and_messages.pop(1)
+                actual_hidden_messages.append(index)
+
+    @staticmethod
+    def _get_number_of_messages_to_remove_from_context(indices_and_messages: List[Tuple[int, Message]],
+                                                       exception: Exception) -> int:
+        """
+        Get the number of messages to remove from the top of the context (after the system message).
+        If the context is known to be too long, we remove, in one pass, the messages needed to fit it to the model
+        (based on the token counts of the messages). Otherwise, we remove one message at a time.
+        """
+        if not isinstance(exception, TooManyTokensInMessageError):
+            return 1
+        model_engine = exception.model_engine
+        excess_tokens = exception.tokens + exception.expected_tokens_in_response - model_engine.max_tokens
+        num_messages_to_remove = 0
+        for _, message in indices_and_messages[1:-1]:
+            if excess_tokens <= 0:
+                break
+            excess_tokens -= message.get_number_of_tokens(model_engine) + 1  # + 1 for the separating newline
+            num_messages_to_remove += 1
+        return max(num_messages_to_remove, 1)
 
     def _try_get_and_append_llm_response(self, tag: Optional[str], comment: Optional[str] = None,
                                          is_code: bool = False, previous_code: Optional[str] = None,
@@ -3,14 +3,15 @@ from __future__ import annotations
 import difflib
 import colorama
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import NamedTuple, Optional, List
+from typing import NamedTuple, Optional, List, Dict, Tuple
 
 from data_to_paper.env import TEXT_WIDTH, MINIMAL_COMPACTION_TO_SHOW_CODE_DIFF, HIDE_INCOMPLETE_CODE, SHOW_LLM_CONTEXT
 from data_to_paper.base_cast import Agent
 from data_to_paper.run_gpt_code.code_utils import extract_code_from_text, FailedExtractingBlock
-from data_to_paper.servers.llm_call import count_number_of_tokens_in_message
+from data_to_paper.servers.llm_call import count_number_of_tokens_in_message, count_number_of_tokens_in_text, \
+    get_encoding_for_model_engine
 from data_to_paper.servers.model_engine import OpenaiCallParameters, ModelEngine
 from data_to_paper.text import line_count, wrap_as_block
 from data_to_paper.text.highlighted_text import colored_text, format_text_with_code_blocks
@@ -71,6 +72,10 @@ class Message:
 
     context: List[Message] = None
 
+    _content_and_encodings_to_number_of_tokens: Optional[Tuple[str, Dict[str, int]]] = \
+        field(default=None, repr=False, compare=False)
+    # cache of the number of tokens in the content, by encoding name
+
     def to_llm_dict(self):
         return {'role': Role.ASSISTANT.value if self.role.is_assistant_or_surrogate()
                 else self.role.value, 'content': self.content}
@@ -144,8 +149,15 @@ class Message:
         return content, is_incomplete_code
 
     def get_number_of_tokens(self, model_engine: ModelEngine = None) -> int:
-        model_engine = model_engine or self.get_llm_model()
-        return count_number_of_tokens_in_message([self], model_engine)
+        model_engine = model_engine or self.get_llm_model() or ModelEngine.DEFAULT
+        encoding_name = get_encoding_for_model_engine(model_engine).name
+        if self._content_and_encodings_to_number_of_tokens is None \
+                or self._content_and_encodings_to_number_of_tokens[0] != self.content:
+            self._content_and_encodings_to_number_of_tokens = (self.content, {})
+        encodings_to_number_of_tokens = self._content_and_encodings_to_number_of_tokens[1]
+        if encoding_name not in encodings_to_number_of_tokens:
+            encodings_to_number_of_tokens[encoding_name] = count_number_of_tokens_in_text(self.content, model_engine)
+        return encodings_to_number_of_tokens[encoding_name]
 
     def get_number_of_tokens_in_context(self) -> int:
         if self.context is None:
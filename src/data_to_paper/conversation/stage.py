@@ -29,11 +29,9 @@ def get_all_keys_following_stage(data: Dict[Union[Stage, str], Any], stage: Stag
     keys = []
     for key in list(data.keys()):
         if isinstance(key, str):
-            for stage_name in stage_cls:
-                if stage_name.value == key:
-                    current_stage = stage_name
-                    break
-            else:
+            try:
+                current_stage = stage_cls.get_by_value(key)
+            except ValueError:
                 raise ValueError(f"Stage {key} not found in {stage_cls}")
         else:
             current_stage = key
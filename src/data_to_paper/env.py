@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 
 from data_to_paper.servers.model_engine import ModelEngine
@@ -23,6 +24,43 @@ WRITING_MODEL_ENGINE = ModelEngine.GPT4o
 # Use json mode when requesting LLM structured response:
 JSON_MODE = True
 
+""" LITERATURE SEARCH """
+# Max number of literature-search queries sent concurrently (1 for sequential queries):
+MAX_CONCURRENT_LITERATURE_QUERIES = Mutable(4)
+
+""" STAGES """
+# Max number of independent stages run concurrently, when running without the app (1 for sequential stages).
+# Stages can run concurrently only if they declare their products (see `BaseStepsRunner.stages_to_products`):
+MAX_CONCURRENT_STAGES = Mutable(1)
+
+# Max number of rule-based checks of an LLM response run concurrently in the background, like the latex compilation
+# (0 to run all checks sequentially). See `ResultConverser._run_rule_based_checks`:
+MAX_CONCURRENT_RULE_BASED_CHECKS = Mutable(2)
+
+""" PROJECT DATA """
+# Store of read-only copies of data files and of extracted zipped data files, shared across runs (data files are
+# staged into the run folder by reflink, or by hardlink from the store, rather than copied).
+# Least recently used entries are removed when the store exceeds its max size:
+DATA_STAGING_STORE_FOLDER = Mutable(Path(tempfile.gettempdir()) / 'data_to_paper_data_store')
+DATA_STAGING_STORE_MAX_SIZE_MB = Mutable(2000)
+
+""" LATEX """
+# Cache of latex compilations (pdflatex output and pdf), keyed by the latex source, references and figures.
+# Least recently used compilations are removed when the cache exceeds its max size (0 to disable the cache):
+LATEX_COMPILATION_CACHE_FOLDER = Mutable(Path(tempfile.gettempdir()) / 'data_to_paper_latex_compilations')
+LATEX_COMPILATION_CACHE_MAX_SIZE_MB = Mutable(500)
+
+# Cache of latex-to-html conversions (by pandoc), keyed by the latex and the pandoc version
+# (0 to disable the cache):
+LATEX_TO_HTML_CACHE_FOLDER = Mutable(Path(tempfile.gettempdir()) / 'data_to_paper_latex_to_html')
+LATEX_TO_HTML_CACHE_MAX_SIZE_MB = Mutable(100)
+
+""" FIGURES """
+# Cache of figures rendered by df_to_figure (png and axis parameters), keyed by the dataframe, the plot
+# arguments, the dpi, the package versions and the rendering code (0 to disable the cache):
+FIGURE_RENDER_CACHE_FOLDER = Mutable(Path(tempfile.gettempdir()) / 'data_to_paper_figure_renders')
+FIGURE_RENDER_CACHE_MAX_SIZE_MB = Mutable(500)
+
 """ LLM-CREATED CODE """
 # Supported packages for LLM code:
 SUPPORTED_PACKAGES = ('numpy', 'pandas', 'scipy', 'sklearn')
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from pathlib import Path
+from typing import Optional, Tuple, Collection
+
+from data_to_paper.env import LATEX_COMPILATION_CACHE_FOLDER, LATEX_COMPILATION_CACHE_MAX_SIZE_MB
+from data_to_paper.utils.file_digest import FILE_DIGEST_CACHE
+from data_to_paper.utils.file_utils import evict_least_recently_used_folders
+
+ENTRY_FILENAME = 'entry.json'
+PDF_FILENAME = 'document.pdf'
+
+
+def get_latex_compilation_key(latex_content: str, references_bibtex: Collection[str] = (),
+                              figures_folder: Optional[Path] = None, **compilation_params) -> str:
+    """
+    Return a content-addressed key of a latex compilation.
+    The key is based on the latex source (which includes the packages), the bib contents,
+    the digests of the figures, and the compilation parameters.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(latex_content.encode('utf-8'))
+    for bibtex in sorted(references_bibtex):
+        hasher.update(b'\0bib\0' + bibtex.encode('utf-8'))
+    if figures_folder is not None:
+        for png_file in sorted(f for f in Path(figures_folder).glob('*.png') if f.is_file()):
+            hasher.update(f'\0fig\0{png_file.name}:{FILE_DIGEST_CACHE.get_digest(png_file)}'.encode('utf-8'))
+    hasher.update(repr(sorted(compilation_params.items())).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class LatexCompilationCache:
+    """
+    An on-disk cache of successful latex compilations: the pdflatex output, the overfull width,
+    and the pdf (if created).
+    Failed compilations are not cached, as they may depend on the latex installation (e.g. a missing package).
+
+    Each compilation is stored in its own folder, named by its key.
+    The folder mtime marks its last use; least recently used compilations are removed when the cache
+    exceeds its max size.
+    """
+
+    def __init__(self, folder: Optional[Path] = None, max_size_mb: Optional[float] = None):
+        self._folder = folder
+        self._max_size_mb = max_size_mb
+        self._lock = threading.Lock()
+
+    @property
+    def folder(self) -> Path:
+        return Path(LATEX_COMPILATION_CACHE_FOLDER.val if self._folder is None else self._folder)
+
+    @property
+    def max_size_mb(self) -> float:
+        return LATEX_COMPILATION_CACHE_MAX_SIZE_MB.val if self._max_size_mb is None else self._max_size_mb
+
+    @property
+    def is_enabled(self) -> bool:
+        return bool(self.max_size_mb)
+
+    def get(self, key: str, pdf_filepath: Optional[str] = None) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Return the cached (pdflatex_output, over_width_pts), or None if not cached.
+        The cached pdf, if any, is copied to `pdf_filepath`.
+        """
+        if not self.is_enabled:
+            return None
+        entry_folder = self.folder / key
+        try:
+            with open(entry_folder / ENTRY_FILENAME, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if pdf_filepath is not None:
+                shutil.copy(entry_folder / PDF_FILENAME, pdf_filepath)
+            os.utime(entry_folder)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry['pdflatex_output'], entry['over_width_pts']
+
+    def set(self, key: str, pdflatex_output: str, over_width_pts: Optional[float],
+            pdf_filepath: Optional[str] = None):
+        if not self.is_enabled:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        temp_folder = self.folder / f'.{key}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(temp_folder, exist_ok=True)
+        if pdf_filepath is not None:
+            shutil.copy(pdf_filepath, temp_folder / PDF_FILENAME)
+        with open(temp_folder / ENTRY_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump({'pdflatex_output': pdflatex_output, 'over_width_pts': over_width_pts}, f)
+        try:
+            os.rename(temp_folder, self.folder / key)  # atomic, in case of concurrent runs
+        except OSError:
+            shutil.rmtree(temp_folder, ignore_errors=True)  # already cached
+        self.evict_least_recently_used()
+
+    def evict_least_recently_used(self):
+        """
+        Remove the least recently used compilations until the cache is within its max size.
+        """
+        with self._lock:
+            evict_least_recently_used_folders(self.folder, self.max_size_mb)
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+LATEX_COMPILATION_CACHE = LatexCompilationCache()
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import shutil
+import threading
+
+from pathlib import Path
+from typing import Optional
+
+from data_to_paper.env import LATEX_TO_HTML_CACHE_FOLDER, LATEX_TO_HTML_CACHE_MAX_SIZE_MB
+from data_to_paper.utils.file_utils import evict_least_recently_used_folders
+
+HTML_FILENAME = 'document.html'
+
+
+def get_latex_to_html_key(latex: str, *conversion_params: str) -> str:
+    """
+    Return a content-addressed key of a latex-to-html conversion.
+    The key is based on the latex and the conversion parameters (the pandoc version, templates and filters).
+    """
+    hasher = hashlib.sha256()
+    hasher.update(latex.encode('utf-8'))
+    for param in conversion_params:
+        hasher.update(b'\0' + param.encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class LatexToHtmlCache:
+    """
+    An on-disk cache of latex-to-html conversions.
+
+    Each conversion is stored in its own folder, named by its key.
+    The folder mtime marks its last use; least recently used conversions are removed when the cache
+    exceeds its max size.
+    """
+
+    def __init__(self, folder: Optional[Path] = None, max_size_mb: Optional[float] = None):
+        self._folder = folder
+        self._max_size_mb = max_size_mb
+        self._lock = threading.Lock()
+
+    @property
+    def folder(self) -> Path:
+        return Path(LATEX_TO_HTML_CACHE_FOLDER.val if self._folder is None else self._folder)
+
+    @property
+    def max_size_mb(self) -> float:
+        return LATEX_TO_HTML_CACHE_MAX_SIZE_MB.val if self._max_size_mb is None else self._max_size_mb
+
+    @property
+    def is_enabled(self) -> bool:
+        return bool(self.max_size_mb)
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.is_enabled:
+            return None
+        entry_folder = self.folder / key
+        try:
+            with open(entry_folder / HTML_FILENAME, 'r', encoding='utf-8', newline='') as f:
+                html = f.read()
+            os.utime(entry_folder)  # mark as recently used
+        except OSError:
+            return None
+        return html
+
+    def set(self, key: str, html: str):
+        if not self.is_enabled:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        temp_folder = self.folder / f'.{key}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(temp_folder, exist_ok=True)
+        with open(temp_folder / HTML_FILENAME, 'w', encoding='utf-8', newline='') as f:
+            f.write(html)
+        try:
+            os.rename(temp_folder, self.folder / key)  # atomic, in case of concurrent runs
+        except OSError:
+            shutil.rmtree(temp_folder, ignore_errors=True)  # already cached
+        with self._lock:
+            evict_least_recently_used_folders(self.folder, self.max_size_mb)
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+LATEX_TO_HTML_CACHE = LatexToHtmlCache()
@@ -2,14 +2,16 @@ import re
 
 from dataclasses import dataclass
 from functools import partial
-from typing import Optional, Dict, Union, Iterable, Collection, Tuple
+from typing import Optional, Dict, Union, Iterable, Collection, Tuple, Sequence
 
 from pathlib import Path
 
 from data_to_paper.terminate.exceptions import MissingInstallationError
 from data_to_paper.latex.clean_latex import process_latex_text_and_math
+from data_to_paper.latex.exceptions import LatexCompilationError
 from data_to_paper.latex.latex_to_pdf import evaluate_latex_num_command, is_pdflatex_package_installed, \
-    is_pdflatex_installed, save_latex_and_compile_to_pdf, PDFLATEX_INSTALLATION_INSTRUCTIONS
+    is_pdflatex_installed, save_latex_and_compile_to_pdf, PDFLATEX_INSTALLATION_INSTRUCTIONS, \
+    compile_latex_to_get_output
 
 from data_to_paper.servers.custom_types import Citation
 from data_to_paper.text import dedent_triple_quote_str
@@ -131,9 +133,34 @@ def get_tabular_block(latex_table: str) -> str:
     return re.search(pattern=r'\\begin{tabular}.*\n(.*)\\end{tabular}', string=latex_table, flags=re.DOTALL).group(0)
 
 
+def get_table_width_measurement_block(latex_table: str, index: Optional[int] = None) -> str:
+    r"""
+    Latex block that typesets the table and prints the width of its tabular part to the log file.
+    Requires a \mytablebox savebox.
+    """
+    label = '' if index is None else f' {index}'
+    return dedent_triple_quote_str(r"""
+        % Save only the tabular part of table in the \mytablebox without typesetting it:
+        \begin{lrbox}{\mytablebox}
+          <tabular>%
+        \end{lrbox}
+
+        % Typeset the entire table:
+        <table>
+
+        % Print the width of the tabular part of the table to the log file
+        \typeout{Table width<label>: \the\wd\mytablebox}
+        """).replace('<tabular>', get_tabular_block(latex_table)).replace('<table>', latex_table) \
+        .replace('<label>', label)
+
+
 IS_PDFLATEX_INSTALLED: Optional[bool] = None
 MISSING_PDFLATEX_PACKAGES: Optional[bool] = None
 
+# (preamble, latex_table) -> width of the tabular part of the table, as fraction of the page margin width:
+TABLE_WIDTHS: Dict[Tuple[str, str], float] = {}
+MAX_NUM_TABLE_WIDTHS = 1000
+
 
 @dataclass(frozen=True)
 class LatexDocument:
@@ -193,6 +220,21 @@ class LatexDocument:
 
         return section
 
+    def get_preamble(self) -> str:
+        """
+        Return the document class, packages and initiation commands of the document.
+        """
+        s = ''
+        s += r"\documentclass[{fontsize}pt]{{{kind}}}".format(kind=self.kind, fontsize=self.fontsize) + '\n'
+        s += '\n'.join([r'\usepackage' + package for package in self.packages]) + '\n'
+
+        s += '\\sectionfont{\\' + self.section_heading_fontsize + '}\n'
+        s += '\\subsectionfont{\\' + self.subsection_heading_fontsize + '}\n'
+        s += '\\subsubsectionfont{\\' + self.subsubsection_heading_fontsize + '}\n'
+
+        s += '\n'.join(self.initiation_commands) + '\n'
+        return s
+
     def get_document(self,
                      content: Optional[Union[str, Iterable[str], Dict[Optional[str], str]]] = None,
                      title: Optional[str] = None,
@@ -210,15 +252,7 @@ class LatexDocument:
                 abstract = content.pop('abstract')
 
         # Build the document:
-        s = ''
-        s += r"\documentclass[{fontsize}pt]{{{kind}}}".format(kind=self.kind, fontsize=self.fontsize) + '\n'
-        s += '\n'.join([r'\usepackage' + package for package in self.packages]) + '\n'
-
-        s += '\\sectionfont{\\' + self.section_heading_fontsize + '}\n'
-        s += '\\subsectionfont{\\' + self.subsection_heading_fontsize + '}\n'
-        s += '\\subsubsectionfont{\\' + self.subsubsection_heading_fontsize + '}\n'
-
-        s += '\n'.join(self.initiation_commands) + '\n'
+        s = self.get_preamble()
 
         # Define title, author:
         if title is not None and not title.startswith(r'\title'):
@@ -369,7 +403,12 @@ class LatexDocument:
         """
         Compile a latex table to pdf and return the width of the tabular part of the table,
         expressed as fraction of the page margin width.
+        Widths of tables already measured (see `measure_table_widths`) are returned without compiling,
+        unless we need to save the compiled table (`output_directory` is given).
         """
+        key = (self.get_preamble(), latex_table)
+        if output_directory is None and key in TABLE_WIDTHS:
+            return TABLE_WIDTHS[key]
 
         lrbox_table = dedent_triple_quote_str(r"""
             % Define the save box within the document block
@@ -393,4 +432,56 @@ class LatexDocument:
 
         table_width = re.findall(pattern=r'Table width: (\d+\.\d+)pt', string=pdf_output)[0]
         margin_width = re.findall(pattern=r'Page margin width: (\d+\.\d+)pt', string=pdf_output)[0]
-        return float(table_width) / float(margin_width)
+        width = float(table_width) / float(margin_width)
+        self._set_table_width(key, width)
+        return width
+
+    @staticmethod
+    def _set_table_width(key: Tuple[str, str], width: float):
+        if len(TABLE_WIDTHS) >= MAX_NUM_TABLE_WIDTHS:
+            TABLE_WIDTHS.clear()
+        TABLE_WIDTHS[key] = width
+
+    def measure_table_widths(self, latex_tables: Sequence[str]) -> Dict[str, float]:
+        """
+        Measure the widths of the tabular parts of the tables, expressed as fractions of the page margin width.
+
+        All the tables that were not yet measured are typeset together, in a single draft-mode pdflatex run
+        with a precompiled preamble (no bibtex, no watermark, no pdf).
+        If this run fails, the tables are split in halves, which are measured separately, so that a table that
+        does not compile does not prevent measuring the others. A table that fails on its own is not measured;
+        `compile_table` then compiles it (reporting its compilation error).
+
+        Return a dict of the measured tables and their widths.
+        """
+        preamble = self.get_preamble()
+        tables_to_measure = [latex_table for latex_table in dict.fromkeys(latex_tables)
+                             if (preamble, latex_table) not in TABLE_WIDTHS]
+        if tables_to_measure:
+            self.raise_if_pdflatex_is_not_installed()
+            self.raise_if_packages_are_not_installed()
+            self._measure_table_widths_in_one_run(preamble, tables_to_measure)
+        return {latex_table: TABLE_WIDTHS[(preamble, latex_table)] for latex_table in latex_tables
+                if (preamble, latex_table) in TABLE_WIDTHS}
+
+    def _measure_table_widths_in_one_run(self, preamble: str, latex_tables: Sequence[str]):
+        body = r'\begin{document}' + '\n' + r'\newsavebox{\mytablebox}' + '\n'
+        body += self._style_section('\n\n'.join(get_table_width_measurement_block(latex_table, index)
+                                                for index, latex_table in enumerate(latex_tables)))
+        body += '\n' + r'\typeout{Page margin width: \the\textwidth}' + '\n' + r'\end{document}' + '\n'
+        pdf_output = None
+        for use_format in (True, False):
+            try:
+                pdf_output = compile_latex_to_get_output(preamble, body, use_format=use_format)
+                break
+            except (LatexCompilationError, ValueError, IndexError):
+                pass
+        if pdf_output is None:
+            if len(latex_tables) > 1:
+                half = len(latex_tables) // 2
+                self._measure_table_widths_in_one_run(preamble, latex_tables[:half])
+                self._measure_table_widths_in_one_run(preamble, latex_tables[half:])
+            return
+        margin_width = float(re.findall(pattern=r'Page margin width: (\d+\.\d+)pt', string=pdf_output)[0])
+        for index, table_width in re.findall(pattern=r'Table width (\d+): (\d+\.\d+)pt', string=pdf_output):
+            self._set_table_width((preamble, latex_tables[int(index)]), float(table_width) / margin_width)
@@ -1,73 +1,148 @@
+import functools
 import os
 import re
 import subprocess
+from typing import Optional, List, Tuple
 
 from data_to_paper.utils.subprocess_call import get_subprocess_kwargs
 from data_to_paper.terminate.exceptions import MissingInstallationError
 from data_to_paper.terminate.resource_checking import resource_checking
 from data_to_paper.latex.clean_latex import process_latex_text_and_math
-from data_to_paper.utils.file_utils import run_in_temp_directory
+from data_to_paper.latex.html_conversion_cache import LATEX_TO_HTML_CACHE, get_latex_to_html_key
+from data_to_paper.utils.file_utils import use_temp_directory
 from data_to_paper.text.text_formatting import escape_html
 
 
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+LUA_FILTER_PATH = os.path.join(DIR_PATH, 'adjust_section.lua')
+TEMPLATE_WITH_TITLE_PATH = os.path.join(DIR_PATH, 'html_template_for_title_latex.html')
+TEMPLATE_WITHOUT_TITLE_PATH = os.path.join(DIR_PATH, 'html_template_for_titleless_latex.html')
+TEX_FILENAME = 'temp.tex'
+
+_pandoc_version: Optional[str] = None
+
+
 @resource_checking("Checking Pandoc installation")
 def check_pandoc_is_installed():
     # This will raise MissingInstallationError:
     raise_if_pandoc_is_not_installed()
 
 
+def get_pandoc_version() -> Optional[str]:
+    """
+    Return the pandoc version, or None if pandoc is not installed.
+    Once found, the version is not probed again (a failed probe is not cached, so pandoc can be installed later).
+    """
+    global _pandoc_version
+    if _pandoc_version is None:
+        try:
+            output = subprocess.run(['pandoc', '--version'], universal_newlines=True, **get_subprocess_kwargs())
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            return None
+        _pandoc_version = output.stdout.split('\n')[0]
+    return _pandoc_version
+
+
 def raise_if_pandoc_is_not_installed():
-    try:
-        subprocess.run(['pandoc', '--version'], **get_subprocess_kwargs(capture=False))
-    except FileNotFoundError:
+    if get_pandoc_version() is None:
         raise MissingInstallationError(package_name="Pandoc", instructions="See: https://pandoc.org/installing.html")
 
 
-def convert_latex_to_html(latex: str) -> str:
-    """
-    Convert LaTeX text to HTML using Pandoc through pypandoc.
+@functools.lru_cache(maxsize=1)
+def _get_lua_filter_and_templates() -> Tuple[str, ...]:
+    contents = []
+    for path in (LUA_FILTER_PATH, TEMPLATE_WITH_TITLE_PATH, TEMPLATE_WITHOUT_TITLE_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            contents.append(f.read())
+    return tuple(contents)
 
-    Parameters:
-    - latex (str): A string containing LaTeX code.
 
-    Returns:
-    - str: The converted HTML text.
+def _get_conversion_params() -> Tuple[str, ...]:
     """
-    raise_if_pandoc_is_not_installed()
+    The pandoc version, and the content of the lua filter and templates, on which the conversions depend.
+    """
+    return (get_pandoc_version(), ) + _get_lua_filter_and_templates()
+
 
-    is_title = re.search(pattern=r'\\title{(.+?)}', string=latex)
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    tex_file = 'temp.tex'
+def _is_title(latex: str) -> bool:
+    return re.search(pattern=r'\\title{(.+?)}', string=latex) is not None
+
+
+def _get_pandoc_command(is_title: bool) -> List[str]:
     command = [
-        'pandoc', '-s', tex_file,
-        '--lua-filter', os.path.join(dir_path, 'adjust_section.lua'),
+        'pandoc', '-s', TEX_FILENAME,
+        '--lua-filter', LUA_FILTER_PATH,
         '-t', 'html'
     ]
 
     # Get the html template:
-    if is_title:
-        template_name = 'html_template_for_title_latex.html'
-    else:
-        template_name = 'html_template_for_titleless_latex.html'
-    template_path = os.path.join(dir_path, template_name)
-    command += ['--template', template_path]
-
+    command += ['--template', TEMPLATE_WITH_TITLE_PATH if is_title else TEMPLATE_WITHOUT_TITLE_PATH]
     if not is_title:
         command += ['--metadata', 'title=Titleless LaTeX Document']
 
     # To show citation commands (like '\\cite{ref1}'):
     command += ['--citeproc']
+    return command
 
+
+def _run_pandoc(processed_latex: str, command: List[str]) -> str:
+    """
+    Run pandoc on the latex, in a temporary directory (without changing the process cwd, so that it can run
+    from multiple threads). Raise CalledProcessError if pandoc fails.
+    """
+    with use_temp_directory() as temp_directory:
+        # Write the LaTeX into a temporary file
+        with open(os.path.join(temp_directory, TEX_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(processed_latex)
+        # Convert using Pandoc
+        output = subprocess.run(command, universal_newlines=True, **get_subprocess_kwargs())
+        return output.stdout
+
+
+def _convert_latex_to_html(latex: str) -> Tuple[str, bool]:
+    """
+    Convert a single latex document to html. Return the html, and whether the conversion succeeded.
+    """
+    # process latex and escape special characters
+    processed_latex = process_latex_text_and_math(latex)
     try:
-        with run_in_temp_directory():
-            # process latex and escape special characters
-            latex = process_latex_text_and_math(latex)
-            # Write the LaTeX into a temporary file
-            with open(tex_file, 'w', encoding='utf-8') as f:
-                f.write(latex)
-            # Convert using Pandoc
-            output = subprocess.run(command, universal_newlines=True, **get_subprocess_kwargs())
-            return output.stdout
+        return _run_pandoc(processed_latex, _get_pandoc_command(is_title=_is_title(latex))), True
     except subprocess.CalledProcessError:
         # In case of an error, return the raw latex with proper escaping for HTML
-        return escape_html(latex)
+        return escape_html(processed_latex), False
+
+
+def convert_latex_sections_to_html(latexes: List[str]) -> List[str]:
+    """
+    Convert multiple LaTeX texts to HTML using Pandoc.
+    Each text is converted on its own (so that header ids and citations do not depend on the other texts),
+    and its conversion is cached (see LATEX_TO_HTML_CACHE). Repeated texts are converted once.
+    Does not change the process cwd, so it can be called from multiple threads.
+    """
+    raise_if_pandoc_is_not_installed()
+    conversion_params = _get_conversion_params()
+    keys = [get_latex_to_html_key(latex, *conversion_params) for latex in latexes]
+    keys_to_htmls = {}
+    for key, latex in zip(keys, latexes):
+        if key in keys_to_htmls:
+            continue
+        html = LATEX_TO_HTML_CACHE.get(key)
+        if html is None:
+            html, is_converted = _convert_latex_to_html(latex)
+            if is_converted:
+                LATEX_TO_HTML_CACHE.set(key, html)
+        keys_to_htmls[key] = html
+    return [keys_to_htmls[key] for key in keys]
+
+
+def convert_latex_to_html(latex: str) -> str:
+    """
+    Convert LaTeX text to HTML using Pandoc through pypandoc.
+
+    Parameters:
+    - latex (str): A string containing LaTeX code.
+
+    Returns:
+    - str: The converted HTML text.
+    """
+    return convert_latex_sections_to_html([latex])[0]
@@ -1,26 +1,32 @@
+import hashlib
 import os
 import re
 import shutil
 import subprocess
+import tempfile
 import fitz  # PyMuPDF
 import numpy as np
 
-from typing import Optional, Collection, Tuple, Dict
+from typing import Optional, Collection, Tuple, Dict, List
 
 from pathlib import Path
 
 from data_to_paper.utils.subprocess_call import get_subprocess_kwargs
 from data_to_paper.terminate.exceptions import MissingInstallationError
 from data_to_paper.servers.custom_types import Citation
-from data_to_paper.utils.file_utils import run_in_temp_directory
+from data_to_paper.utils.file_utils import use_temp_directory
 from data_to_paper.code_and_output_files.ref_numeric_values import replace_hyperlinks_with_values
 from data_to_paper.text.text_extractors import extract_all_external_brackets
 
+from .compilation_cache import LATEX_COMPILATION_CACHE, get_latex_compilation_key
 from .exceptions import LatexCompilationError, LatexNumCommandFormulaEvalError, \
     LatexNestedNumCommandError, LatexNumCommandNoExplanation, PlainNumberLatexNumCommandError
 
 BIB_FILENAME: str = 'citations.bib'
 WATERMARK_PATH: str = os.path.join(os.path.dirname(__file__), 'watermark.pdf')
+LATEX_FORMATS_FOLDER: Path = Path(tempfile.gettempdir()) / 'data_to_paper_latex_formats'
+
+PREAMBLES_TO_FAILED_FORMATS = set()  # preambles whose format could not be created
 
 PDFLATEX_INSTALLATION_INSTRUCTIONS = r"""
 Installations instructions for pdflatex:
@@ -173,73 +179,164 @@ def _get_over_width_pts(pdflatex_output: str) -> Optional[float]:
     return None
 
 
+def _run_pdflatex_passes(latex_content: str, file_stem: str, pdflatex_params: List[str],
+                         should_compile_with_bib: bool, format_cite: bool) -> str:
+    """
+    Run pdflatex (and, if `format_cite`, bibtex and two more pdflatex passes) in the current directory
+    (of the execution context, see `use_directory`).
+    Return the output of the first pdflatex pass.
+    """
+    try:
+        pdflatex_output = subprocess.run(pdflatex_params, **get_subprocess_kwargs())
+    except FileNotFoundError:
+        raise MissingInstallationError(package_name="pdflatex", instructions=PDFLATEX_INSTALLATION_INSTRUCTIONS)
+    except subprocess.CalledProcessError as e:
+        raise LatexCompilationError(latex_content=latex_content,
+                                    pdflatex_output=e.stdout.decode('utf-8', errors='replace'))
+
+    pdflatex_output = pdflatex_output.stdout.decode('utf-8', errors='replace')
+
+    if format_cite:
+        if should_compile_with_bib:
+            try:
+                subprocess.run(['bibtex', file_stem], **get_subprocess_kwargs(capture=False))
+            except FileNotFoundError:
+                raise MissingInstallationError(package_name="bibtex",
+                                               instructions=PDFLATEX_INSTALLATION_INSTRUCTIONS)
+        subprocess.run(pdflatex_params, **get_subprocess_kwargs(capture=False))
+        subprocess.run(pdflatex_params, **get_subprocess_kwargs(capture=False))
+    return pdflatex_output
+
+
 def save_latex_and_compile_to_pdf(latex_content: str, file_stem: str, output_directory: Optional[str] = None,
                                   references: Collection[Citation] = None, format_cite: bool = True,
                                   figures_folder: Optional[Path] = None,
                                   ) -> Tuple[str, Optional[float]]:
+    """
+    Compile the latex content to pdf and return the pdflatex output and the overfull width.
+    If `output_directory` is None, the compilation only checks validity: no pdf is created (draft mode).
+    If `format_cite` is False, bibtex and the additional pdflatex passes are skipped.
+
+    Successful compilations are cached (see LATEX_COMPILATION_CACHE), keyed by the latex content, the references,
+    the figures and the compilation parameters.
+    """
     references = references or set()
     should_compile_with_bib = len(references) > 0
+    is_pdf_needed = output_directory is not None
     latex_file_name = file_stem + '.tex'
+    pdf_file_name = file_stem + '.pdf'
     pdflatex_params = ['pdflatex', '--shell-escape', '-interaction=nonstopmode', latex_file_name]
-    with run_in_temp_directory():
-        # Copy the figures from the output directory to the temp directory:
-        if figures_folder is not None:
-            png_files_in_running_directory = [f for f in figures_folder.glob('*.png') if f.is_file()]
-            for png_file in png_files_in_running_directory:
-                shutil.copy(png_file, '.')
-
+    if not is_pdf_needed:
+        pdflatex_params.insert(1, '-draftmode')
+    references_bibtex = [reference.bibtex for reference in references]
+    cache_key = get_latex_compilation_key(latex_content, references_bibtex, figures_folder,
+                                          file_stem=file_stem, format_cite=format_cite, is_pdf_needed=is_pdf_needed)
+    with use_temp_directory() as temp_directory:
+        pdf_file_path = os.path.join(temp_directory, pdf_file_name)
         # Create the bib file:
         if should_compile_with_bib:
-            references_bibtex = [reference.bibtex for reference in references]
-            with open(BIB_FILENAME, 'w', encoding='utf-8') as f:
+            with open(os.path.join(temp_directory, BIB_FILENAME), 'w', encoding='utf-8') as f:
                 f.write('\n\n'.join(references_bibtex))
 
-        with open(latex_file_name, 'w', encoding='utf-8') as f:
+        with open(os.path.join(temp_directory, latex_file_name), 'w', encoding='utf-8') as f:
             f.write(latex_content)
+
+        cached = LATEX_COMPILATION_CACHE.get(cache_key, pdf_filepath=pdf_file_path if is_pdf_needed else None)
+        if cached is not None:
+            _move_latex_and_pdf_to_output_directory(file_stem, output_directory, latex_file_name, temp_directory)
+            return cached
+
+        # Copy the figures from the output directory to the temp directory:
+        if figures_folder is not None:
+            png_files_in_running_directory = [f for f in figures_folder.glob('*.png') if f.is_file()]
+            for png_file in png_files_in_running_directory:
+                shutil.copy(png_file, temp_directory)
+
         try:
-            pdflatex_output = subprocess.run(pdflatex_params, **get_subprocess_kwargs())
-        except FileNotFoundError:
-            raise MissingInstallationError(package_name="pdflatex", instructions=PDFLATEX_INSTALLATION_INSTRUCTIONS)
-        except subprocess.CalledProcessError as e:
-            _move_latex_and_pdf_to_output_directory(file_stem, output_directory, latex_file_name)
-            raise LatexCompilationError(latex_content=latex_content,
-                                        pdflatex_output=e.stdout.decode('utf-8', errors='replace'))
+            pdflatex_output = _run_pdflatex_passes(latex_content, file_stem, pdflatex_params,
+                                                   should_compile_with_bib, format_cite)
+        except (LatexCompilationError, subprocess.CalledProcessError):
+            _move_latex_and_pdf_to_output_directory(file_stem, output_directory, latex_file_name, temp_directory)
+            raise
 
-        pdflatex_output = pdflatex_output.stdout.decode('utf-8', errors='replace')
+        if is_pdf_needed:
+            add_watermark_to_pdf(pdf_file_path, WATERMARK_PATH)
 
-        if format_cite:
-            try:
-                if should_compile_with_bib:
-                    try:
-                        subprocess.run(['bibtex', file_stem], **get_subprocess_kwargs(capture=False))
-                    except FileNotFoundError:
-                        raise MissingInstallationError(package_name="bibtex",
-                                                       instructions=PDFLATEX_INSTALLATION_INSTRUCTIONS)
-                subprocess.run(pdflatex_params, **get_subprocess_kwargs(capture=False))
-                subprocess.run(pdflatex_params, **get_subprocess_kwargs(capture=False))
-            except subprocess.CalledProcessError:
-                _move_latex_and_pdf_to_output_directory(file_stem, output_directory, latex_file_name)
-                raise
-
-        add_watermark_to_pdf(file_stem + '.pdf', WATERMARK_PATH)
-
-        _move_latex_and_pdf_to_output_directory(file_stem, output_directory, latex_file_name)
         over_width_pts = _get_over_width_pts(pdflatex_output)
+        LATEX_COMPILATION_CACHE.set(cache_key, pdflatex_output, over_width_pts,
+                                    pdf_filepath=pdf_file_path if is_pdf_needed else None)
+        _move_latex_and_pdf_to_output_directory(file_stem, output_directory, latex_file_name, temp_directory)
         return pdflatex_output, over_width_pts
 
 
-def _move_latex_and_pdf_to_output_directory(file_stem: str, output_directory: str = None, latex_file_name: str = None):
-    # Move the pdf and the latex and the citation file to the original directory:
+def _move_latex_and_pdf_to_output_directory(file_stem: str, output_directory: str = None, latex_file_name: str = None,
+                                            compilation_directory: str = '.'):
+    # Move the pdf and the latex and the citation file from the compilation directory to the original directory:
 
     def move_if_exists(file_name):
-        if os.path.exists(file_name):
+        compiled_file_path = os.path.join(compilation_directory, file_name)
+        if os.path.exists(compiled_file_path):
             # delete older file if exists (this happen when we reset from the compilation step to earlier step)
             file_path = os.path.join(output_directory, file_name)
             if os.path.exists(file_path):
                 os.remove(file_path)
-            shutil.move(file_name, output_directory)
+            shutil.move(compiled_file_path, output_directory)
 
     if output_directory is not None:
         move_if_exists(file_stem + '.pdf')
         move_if_exists(latex_file_name)
         move_if_exists('citations.bib')
+
+
+def get_latex_format_for_preamble(preamble: str) -> Optional[Path]:
+    """
+    Get a precompiled latex format (.fmt) of the given preamble, creating it if needed.
+    Loading the format is much faster than loading the packages of the preamble.
+    Return None if the format could not be created.
+    """
+    if preamble in PREAMBLES_TO_FAILED_FORMATS:
+        return None
+    format_name = 'preamble_' + hashlib.md5(preamble.encode('utf-8')).hexdigest()
+    format_path = LATEX_FORMATS_FOLDER / (format_name + '.fmt')
+    if format_path.exists():
+        return format_path
+    with use_temp_directory() as temp_directory:
+        with open(os.path.join(temp_directory, format_name + '.tex'), 'w', encoding='utf-8') as f:
+            f.write(preamble + '\n\\dump\n')
+        try:
+            subprocess.run(['pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={format_name}',
+                            '&pdflatex', format_name + '.tex'], **get_subprocess_kwargs(capture=False))
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            PREAMBLES_TO_FAILED_FORMATS.add(preamble)
+            return None
+        os.makedirs(LATEX_FORMATS_FOLDER, exist_ok=True)
+        # atomic, in case of concurrent runs:
+        os.replace(os.path.join(temp_directory, format_name + '.fmt'), format_path)
+    return format_path
+
+
+def compile_latex_to_get_output(preamble: str, body: str, use_format: bool = True) -> str:
+    """
+    Compile the latex document (preamble + body) in draft mode (no pdf is created) and return the pdflatex output.
+    For quick measurements, like of the widths of tables (no bibtex, no watermark, no files are kept).
+    If `use_format`, the preamble is loaded from a precompiled format.
+
+    `LatexCompilationError` is raised if there are errors.
+    """
+    latex_format = get_latex_format_for_preamble(preamble) if use_format else None
+    latex_content = body if latex_format else preamble + '\n' + body
+    pdflatex_params = ['pdflatex', '-draftmode', '-interaction=nonstopmode', 'measure.tex']
+    with use_temp_directory() as temp_directory:
+        if latex_format:
+            shutil.copy(latex_format, temp_directory)
+            pdflatex_params.insert(1, f'-fmt={latex_format.stem}')
+        with open(os.path.join(temp_directory, 'measure.tex'), 'w', encoding='utf-8') as f:
+            f.write(latex_content)
+        try:
+            pdflatex_output = subprocess.run(pdflatex_params, **get_subprocess_kwargs())
+        except FileNotFoundError:
+            raise MissingInstallationError(package_name="pdflatex", instructions=PDFLATEX_INSTALLATION_INSTRUCTIONS)
+        except subprocess.CalledProcessError as e:
+            raise LatexCompilationError(latex_content=latex_content,
+                                        pdflatex_output=e.stdout.decode('utf-8', errors='replace'))
+    return pdflatex_output.stdout.decode('utf-8', errors='replace')
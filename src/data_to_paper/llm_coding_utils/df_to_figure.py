@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Tuple, Union, List, Iterable
+from typing import Optional, Dict, Tuple, Union, Iterable
 
 import pandas as pd
 from matplotlib import pyplot as plt
@@ -9,7 +9,9 @@ from data_to_paper.run_gpt_code.overrides.pvalue import PValueToStars, convert_p
     pvalue_on_str_for_latex
 from data_to_paper.text.text_formatting import escape_html
 from data_to_paper.utils.check_type import raise_on_wrong_func_argument_types_decorator
+from data_to_paper.utils.file_utils import resolve_path
 from data_to_paper.utils.multi_process import run_func_in_separate_process
+from data_to_paper.utils.worker_pool import WorkerPool, WorkerDiedError
 from data_to_paper.run_gpt_code.config import configure_matplotlib
 
 from .df_plot_with_pvalue import df_plot_with_pvalue, get_description_of_plot_creation
@@ -17,6 +19,7 @@ from .matplotlib_utils import get_axis_parameters, AxisParameters, fit_fig_to_ax
 from .note_and_legend import convert_note_and_glossary_to_html, convert_note_and_glossary_to_latex_figure_caption
 from .utils import convert_to_latex_comment, convert_filename_to_label
 from .consts import ALLOWED_PLOT_KINDS, FIG_SIZE_INCHES, AXES_SIZE_INCHES, FIG_DPI
+from .figure_render_cache import FIGURE_RENDER_CACHE, get_figure_render_key
 
 
 @raise_on_wrong_func_argument_types_decorator
@@ -97,14 +100,48 @@ def replace_df_column_names_to_str_with_no_underscores(df: pd.DataFrame, **kwarg
     return df, kwargs
 
 
-def run_create_fig_for_df_to_figure_and_get_axis_parameters(df: pd.DataFrame, filepath: Optional[Path] = None,
-                                                            in_separate_process: bool = True, **kwargs) -> List[str]:
+# Figures are rendered in long-lived worker processes (isolating the main process from matplotlib crashes):
+FIGURE_RENDERING_WORKER_POOL = WorkerPool(
+    preload_modules=('matplotlib', 'pandas', 'data_to_paper.llm_coding_utils.df_to_figure'),
+)
+
+
+def _create_fig_with_dpi_and_get_axis_parameters(df: pd.DataFrame, filepath: Optional[Path], fig_dpi: int,
+                                                 kwargs: dict) -> AxisParameters:
+    """
+    The task sent to the worker processes (FIG_DPI is set explicitly, as workers do not share our mutables).
+    """
+    with FIG_DPI.temporary_set(fig_dpi):
+        return create_fig_for_df_to_figure_and_get_axis_parameters(df, filepath, **kwargs)
+
+
+def run_create_fig_for_df_to_figure_and_get_axis_parameters(
+        df: pd.DataFrame, filepath: Optional[Path] = None, in_separate_process: bool = True, **kwargs
+) -> Tuple[Optional[AxisParameters], Optional[Exception]]:
     """
     Run the `create_fig_for_df_to_figure` function in a separate process.
     Otherwise we get killing of the kernel due to matplotlib issues.
+    Renderings are cached (see FIGURE_RENDER_CACHE), so unchanged figures are not rendered again.
+    Return (axis_parameters, exception).
     """
-    return run_func_in_separate_process(create_fig_for_df_to_figure_and_get_axis_parameters, df, filepath,
-                                        in_separate_process=in_separate_process, **kwargs)
+    if not in_separate_process:
+        return run_func_in_separate_process(create_fig_for_df_to_figure_and_get_axis_parameters, df, filepath,
+                                            in_separate_process=False, **kwargs)
+    resolved_filepath = None if filepath is None else resolve_path(filepath)
+    key = get_figure_render_key(df, FIG_DPI.val, **kwargs)
+    axis_parameters = FIGURE_RENDER_CACHE.get(key, resolved_filepath)
+    if axis_parameters is not None:
+        return axis_parameters, None
+    try:
+        axis_parameters, is_exception = FIGURE_RENDERING_WORKER_POOL.run(
+            _create_fig_with_dpi_and_get_axis_parameters, args=(df, filepath, FIG_DPI.val, kwargs))
+    except WorkerDiedError as e:
+        return None, e
+    if is_exception:
+        return None, axis_parameters
+    if resolved_filepath is not None:
+        FIGURE_RENDER_CACHE.set(key, axis_parameters, resolved_filepath)
+    return axis_parameters, None
 
 
 def create_fig_for_df_to_figure_and_get_axis_parameters(df: pd.DataFrame, filepath: Optional[Path] = None,
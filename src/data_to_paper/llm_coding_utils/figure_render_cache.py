@@ -0,0 +1,126 @@
+import functools
+import hashlib
+import importlib.util
+import os
+import pickle
+import shutil
+import threading
+
+from pathlib import Path
+from typing import Optional
+
+import matplotlib
+import pandas as pd
+
+import data_to_paper
+from data_to_paper.env import FIGURE_RENDER_CACHE_FOLDER, FIGURE_RENDER_CACHE_MAX_SIZE_MB
+from data_to_paper.utils.file_utils import evict_least_recently_used_folders
+
+from .matplotlib_utils import AxisParameters
+
+AXIS_PARAMETERS_FILENAME = 'axis_parameters.pkl'
+FIGURE_FILENAME = 'figure.png'
+
+
+# The modules with the code that renders the figures (see `create_fig_for_df_to_figure_and_get_axis_parameters`):
+RENDERING_MODULES = (
+    'data_to_paper.llm_coding_utils.df_to_figure',
+    'data_to_paper.llm_coding_utils.df_plot_with_pvalue',
+    'data_to_paper.llm_coding_utils.matplotlib_utils',
+    'data_to_paper.llm_coding_utils.consts',
+    'data_to_paper.run_gpt_code.config',
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_rendering_code_digest() -> str:
+    """
+    Return a digest of the source of the rendering code, so that renderings are not reused after it changes
+    (also when running from source, where the version of data_to_paper is not bumped).
+    """
+    hasher = hashlib.sha256()
+    for module_name in RENDERING_MODULES:
+        with open(importlib.util.find_spec(module_name).origin, 'rb') as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def get_figure_render_key(df: pd.DataFrame, fig_dpi: int, **kwargs) -> str:
+    """
+    Return a content-addressed key of a df_to_figure rendering.
+    The key is based on the dataframe content, the plot arguments, the dpi, the pandas, matplotlib and
+    data_to_paper versions, and the source of the rendering code.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(pickle.dumps(df, protocol=4))
+    hasher.update(repr(sorted(kwargs.items())).encode('utf-8'))
+    hasher.update(f'\0{fig_dpi}\0{pd.__version__}\0{matplotlib.__version__}'.encode('utf-8'))
+    hasher.update(f'\0{data_to_paper.__version__}\0{get_rendering_code_digest()}'.encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class FigureRenderCache:
+    """
+    An on-disk cache of df_to_figure renderings: the png and the axis parameters.
+
+    Each rendering is stored in its own folder, named by its key.
+    The folder mtime marks its last use; least recently used renderings are removed when the cache
+    exceeds its max size.
+    """
+
+    def __init__(self, folder: Optional[Path] = None, max_size_mb: Optional[float] = None):
+        self._folder = folder
+        self._max_size_mb = max_size_mb
+        self._lock = threading.Lock()
+
+    @property
+    def folder(self) -> Path:
+        return Path(FIGURE_RENDER_CACHE_FOLDER.val if self._folder is None else self._folder)
+
+    @property
+    def max_size_mb(self) -> float:
+        return FIGURE_RENDER_CACHE_MAX_SIZE_MB.val if self._max_size_mb is None else self._max_size_mb
+
+    @property
+    def is_enabled(self) -> bool:
+        return bool(self.max_size_mb)
+
+    def get(self, key: str, filepath: Optional[Path] = None) -> Optional[AxisParameters]:
+        """
+        Return the cached axis parameters, or None if not cached.
+        The cached figure is copied to `filepath`.
+        """
+        if not self.is_enabled:
+            return None
+        entry_folder = self.folder / key
+        try:
+            with open(entry_folder / AXIS_PARAMETERS_FILENAME, 'rb') as f:
+                axis_parameters = pickle.load(f)
+            if filepath is not None:
+                shutil.copyfile(entry_folder / FIGURE_FILENAME, filepath)
+            os.utime(entry_folder)  # mark as recently used
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return axis_parameters
+
+    def set(self, key: str, axis_parameters: AxisParameters, filepath: Path):
+        if not self.is_enabled:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        temp_folder = self.folder / f'.{key}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(temp_folder, exist_ok=True)
+        shutil.copyfile(filepath, temp_folder / FIGURE_FILENAME)
+        with open(temp_folder / AXIS_PARAMETERS_FILENAME, 'wb') as f:
+            pickle.dump(axis_parameters, f)
+        try:
+            os.rename(temp_folder, self.folder / key)  # atomic, in case of concurrent runs
+        except OSError:
+            shutil.rmtree(temp_folder, ignore_errors=True)  # already cached
+        with self._lock:
+            evict_least_recently_used_folders(self.folder, self.max_size_mb)
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+FIGURE_RENDER_CACHE = FigureRenderCache()
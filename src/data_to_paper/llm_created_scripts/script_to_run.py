@@ -1 +0,0 @@
-# empty module
@@ -24,7 +24,7 @@ This is automatically asserted by the BaseChecker class.
 
 from dataclasses import dataclass, field
 import re
-from typing import Dict, Union, Optional, List, Any, Tuple, Type, ClassVar, Callable
+from typing import Dict, Union, Optional, List, Any, Tuple, Type, ClassVar, Callable, Iterable
 
 import numpy as np
 import pandas as pd
@@ -52,7 +52,7 @@ from data_to_paper.run_gpt_code.overrides.pvalue import is_p_value, PValue, is_c
     OnStrPValue, OnStr
 from data_to_paper.run_gpt_code.run_issues import CodeProblem, RunIssue, RunIssues
 from .abbreviations import is_unknown_abbreviation
-from .utils import is_non_integer_numeric, _find_longest_labels_in_index, \
+from .utils import get_non_integer_numeric_values, _find_longest_labels_in_index, \
     _find_longest_labels_in_columns_relative_to_content
 
 
@@ -643,11 +643,11 @@ class TableDfContentChecker(DfContentChecker):
         """
         # Check if the table contains the same values in multiple cells
         """
-        df_values = [v for v in self.df.values.flatten() if is_non_integer_numeric(v)]
-        if len(df_values) != len(set(df_values)):
-            # Find the positions of the duplicated values:
-            duplicated_values = [v for v in df_values if df_values.count(v) > 1]
-            example_value = duplicated_values[0]
+        df_values = get_non_integer_numeric_values(self.df.values)
+        unique_values, first_indices, counts = np.unique(df_values, return_index=True, return_counts=True)
+        if (counts > 1).any():
+            # Find the positions of the duplicated values (the example is the first duplicated value in the df):
+            example_value = df_values[first_indices[counts > 1].min()]
             duplicated_value_positions = np.where(self.df.values == example_value)
             duplicated_value_positions = list(zip(*duplicated_value_positions))
             duplicated_value_positions = [f'({row}, {col})' for row, col in duplicated_value_positions]
@@ -672,12 +672,11 @@ class TableDfContentChecker(DfContentChecker):
         """
         if not self.prior_dfs:
             return
-        df_values = [v for v in self.df.values.flatten() if is_non_integer_numeric(v)]
+        df_values = set(get_non_integer_numeric_values(self.df.values).tolist())
         for prior_name, prior_table in self.prior_dfs.items():
             if prior_table is self.df:
                 continue
-            prior_table_values = [v for v in prior_table.values.flatten() if is_non_integer_numeric(v)]
-            if any(value in prior_table_values for value in df_values):
+            if not df_values.isdisjoint(get_non_integer_numeric_values(prior_table.values).tolist()):
                 self._append_issue(
                     category=self.OVERLAYING_VALUES_CATEGORY,
                     issue=f'Table "{self.filename}" includes values that overlap with values in table "{prior_name}".',
@@ -951,6 +950,8 @@ class FigureCompilationDfContentChecker(CompilationDfContentChecker):
 class TableCompilationDfContentChecker(CompilationDfContentChecker):
     func: Callable = df_to_latex
 
+    MAX_WIDTH: ClassVar[float] = 1.3  # wider tables are reported as too wide
+
     def _df_to_latex_transpose(self):
         assert 'columns' not in self.kwargs, "assumes columns is None"
         kwargs = self.kwargs.copy()
@@ -959,6 +960,30 @@ class TableCompilationDfContentChecker(CompilationDfContentChecker):
         header, index = index, header
         return df_to_latex(self.df.T, self.filename, index=index, header=header, **kwargs)
 
+    def get_latex_table_to_measure(self) -> Optional[str]:
+        """
+        Return the latex of the table (None if it cannot be created).
+        """
+        return self._get_latex_to_measure(lambda: df_to_latex(self.df, self.filename, **self.kwargs))
+
+    def get_latex_transpose_to_measure(self) -> Optional[str]:
+        """
+        Return the latex of the transposed table, whose width we check if the table is too wide
+        (None if it cannot be created).
+        """
+        if 'columns' in self.kwargs:
+            return None
+        return self._get_latex_to_measure(self._df_to_latex_transpose)
+
+    @staticmethod
+    def _get_latex_to_measure(get_latex: Callable[[], str]) -> Optional[str]:
+        with RegisteredRunContext.temporarily_disable_all():
+            with OnStrPValue(OnStr.SMALLER_THAN):
+                try:
+                    return get_latex()
+                except Exception:
+                    return None
+
     def check_compilation_and_get_width(self):
         exception = None
         with RegisteredRunContext.temporarily_disable_all():
@@ -989,7 +1014,7 @@ class TableCompilationDfContentChecker(CompilationDfContentChecker):
 
                     """).format(filename=self.filename, table=latex, error=exception),
             )
-        elif width > 1.3:
+        elif width > self.MAX_WIDTH:
             # table is too wide
             # Try to compile the transposed table:
             with OnStrPValue(OnStr.SMALLER_THAN):
@@ -1453,6 +1478,30 @@ def check_df_to_latex_displayitems(df: InfoDataFrameWithSaveObjFuncCall, **k) ->
     return create_and_run_chain_checker_from_list_info_df(checkers, df=df, **k)[0]
 
 
+def measure_widths_of_displayitem_tables(dfs: Iterable[InfoDataFrameWithSaveObjFuncCall],
+                                         latex_document: LatexDocument):
+    """
+    Measure the widths of all the tables in a single compilation, so that the compilation checks of the
+    individual tables do not need to compile them one by one.
+    The transposes of the tables that are too wide are then measured in a second compilation.
+    """
+    checkers_and_latex_tables = []
+    for df in dfs:
+        func_call = df.get_func_call()
+        func, args, kwargs = func_call
+        if func != df_to_latex:
+            continue
+        checker = TableCompilationDfContentChecker(df=df, filename=func_call.filename, kwargs=kwargs,
+                                                   latex_document=latex_document)
+        checkers_and_latex_tables.append((checker, checker.get_latex_table_to_measure()))
+    widths = latex_document.measure_table_widths(
+        [latex_table for _, latex_table in checkers_and_latex_tables if latex_table is not None])
+    latex_transposes = [checker.get_latex_transpose_to_measure() for checker, latex_table in checkers_and_latex_tables
+                        if widths.get(latex_table, 0) > checker.MAX_WIDTH]
+    latex_document.measure_table_widths([latex_transpose for latex_transpose in latex_transposes
+                                         if latex_transpose is not None])
+
+
 def check_analysis_df(df: InfoDataFrameWithSaveObjFuncCall, **k) -> RunIssues:
     func, args, kwargs = df.get_func_call()
     if func == df_to_figure:
@@ -22,6 +22,17 @@ def is_non_integer_numeric(value) -> bool:
     return True
 
 
+def get_non_integer_numeric_values(values) -> np.ndarray:
+    """
+    Return the non-integer numeric values (see `is_non_integer_numeric`) as a flat float array.
+    Float arrays are filtered vectorized; other arrays are checked value by value.
+    """
+    values = np.asarray(values).ravel()
+    if values.dtype == np.float64:
+        return values[np.isfinite(values) & (values != np.floor(values))]
+    return np.array([v for v in values if is_non_integer_numeric(v)], dtype=float)
+
+
 def _find_longest_str_in_list(lst: Iterable[Union[str, Any]]) -> Optional[str]:
     """
     Find the longest string in a list of strings.
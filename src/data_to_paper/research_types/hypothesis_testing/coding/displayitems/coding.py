@@ -22,7 +22,7 @@ from data_to_paper.run_gpt_code.run_issues import RunIssue, CodeProblem
 from data_to_paper.text import dedent_triple_quote_str
 
 from ..analysis.coding import BaseDataFramePickleContentOutputFileRequirement, DataAnalysisDebuggerConverser
-from ...check_df_to_funcs.df_checker import check_displayitem_df
+from ...check_df_to_funcs.df_checker import check_displayitem_df, measure_widths_of_displayitem_tables
 
 
 @dataclass
@@ -47,6 +47,10 @@ class TexDisplayitemContentOutputFileRequirement(BaseDataFramePickleContentOutpu
     def _check_df(self, content: InfoDataFrameWithSaveObjFuncCall) -> List[RunIssue]:
         return check_displayitem_df(content, output_folder=self.output_folder, latex_document=self.latex_document)
 
+    def before_checking_output_file_contents(self, filenames_to_contents: Dict[str, Any]):
+        if self.latex_document is not None:
+            measure_widths_of_displayitem_tables(filenames_to_contents.values(), latex_document=self.latex_document)
+
     def _convert_view_purpose_to_pvalue_on_str(self, view_purpose: ViewPurpose) -> OnStr:
         return OnStr.SMALLER_THAN
 
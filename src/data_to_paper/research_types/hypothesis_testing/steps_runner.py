@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Type
 
-from data_to_paper.base_steps import DirectorProductGPT, DataStepRunner
+from data_to_paper.base_steps import DirectorProductGPT, DataStepRunner, StageProducts
 from data_to_paper.latex.latex_doc import LatexDocument
 
 from .app_startup import HypothesisTestingStartDialog
@@ -90,6 +90,26 @@ class HypothesisTestingStepsRunner(DataStepRunner):
             ScientificStage.COMPILE: self._compile_paper,
         }
 
+        # The writing stages (in order). LITERATURE_REVIEW_WRITING and WRITING_RESULTS are independent:
+        self.stages_to_products = {
+            ScientificStage.LITERATURE_REVIEW_WRITING: StageProducts(
+                reads=('title_and_abstract', ), writes=('literature_search:writing', )),
+            ScientificStage.WRITING_RESULTS: StageProducts(
+                reads=('title_and_abstract', ), writes=('paper_sections:results', )),
+            ScientificStage.WRITING_TITLE_AND_ABSTRACT: StageProducts(
+                reads=('paper_sections:results', 'literature_search:writing'), writes=('title_and_abstract', )),
+            ScientificStage.WRITING_METHODS: StageProducts(
+                reads=('title_and_abstract', ), writes=('paper_sections:methods', )),
+            ScientificStage.WRITING_INTRODUCTION: StageProducts(
+                reads=('title_and_abstract', 'literature_search:writing', 'paper_sections:methods',
+                       'paper_sections:results'),
+                writes=('paper_sections:introduction', )),
+            ScientificStage.WRITING_DISCUSSION: StageProducts(
+                reads=('title_and_abstract', 'literature_search:writing', 'paper_sections:introduction',
+                       'paper_sections:methods', 'paper_sections:results'),
+                writes=('paper_sections:discussion', )),
+        }
+
     """
     Stage functions
     """
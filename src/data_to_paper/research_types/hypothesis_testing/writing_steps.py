@@ -206,12 +206,14 @@ class SectionWriterReviewBackgroundProductsConverser(ShowCitationProducts,
 
     def _check_and_refine_section(self, section: str, section_name: str) -> str:
         self._check_for_aborting_phrases(section)
-        section = super()._check_and_refine_section(section, section_name)
+        return super()._check_and_refine_section(section, section_name)
+
+    def _check_refined_section(self, section: str, section_name: str):
+        super()._check_refined_section(section, section_name)
         self._check_extracted_numbers(section)
         self._check_url_in_text(section)
         self._check_forbidden_phrases(section)
         self._check_allowed_subsections(section)
-        return section
 
     def write_sections_with_citations(self) -> List[Tuple[str, Set[Citation]]]:
         sections: List[str] = self.run_and_get_valid_result()
@@ -2,14 +2,15 @@ from __future__ import annotations
 
 import importlib
 import pkgutil
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 import inspect
 
-from typing import Callable, Iterable, Any, Optional, Tuple, Dict, Union
+from typing import Callable, Iterable, Any, Optional, Tuple, Dict, Union, List
 
-from .base_run_contexts import RegisteredRunContext
+from .base_run_contexts import RegisteredRunContext, get_dispatched_attr
 from .exceptions import CodeUsesForbiddenFunctions
+from .override_targets_index import OVERRIDE_TARGETS_INDEX, get_code_fingerprint
 from .run_issues import CodeProblem, RunIssue
 
 
@@ -96,13 +97,20 @@ class MultiAttrReplacerContext(OverrideImportedObjContext):
     def _get_custom_wrapper(self, parent, attr_name, original_func):
         raise NotImplementedError
 
-    def __enter__(self):
-        self._originals = {}
+    def _get_all_targets(self) -> Iterable[Tuple[Any, str]]:
+        """
+        Get all the (parent, attr_name) pairs to replace.
+        """
         for parent in self._get_all_parents():
             for attr_name in self._get_all_attrs_for_parent(parent):
-                original = getattr(parent, attr_name)
-                self._originals[(parent, attr_name)] = original
-                setattr(parent, attr_name, self._get_custom_wrapper(parent, attr_name, original))
+                yield parent, attr_name
+
+    def __enter__(self):
+        self._originals = {}
+        for parent, attr_name in self._get_all_targets():
+            original = getattr(parent, attr_name)
+            self._originals[(parent, attr_name)] = original
+            setattr(parent, attr_name, self._get_custom_wrapper(parent, attr_name, original))
         return super().__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -114,7 +122,52 @@ class MultiAttrReplacerContext(OverrideImportedObjContext):
 
 @dataclass
 class SystematicAttrReplacerContext(MultiAttrReplacerContext):
+    """
+    Replace all the attributes that fit a criterion.
+    Finding these attributes requires walking over whole packages, so the found targets are cached in the
+    OVERRIDE_TARGETS_INDEX (in memory and on disk), and entering the context only needs to apply them.
+    """
     recursive: bool = True
+    use_targets_index: bool = True
+
+    # Fields, which do not affect the found targets (like state recorded while running).
+    # All other public fields are part of the targets index key:
+    FIELDS_NOT_AFFECTING_TARGETS = ('issues', 'name', 'should_register', 'use_targets_index', 'pvalue_creating_funcs')
+
+    def _get_targets_index_key(self) -> Optional[str]:
+        """
+        The key of the targets in the index. None if the targets cannot be indexed.
+        """
+        if self.obj_import_str is not None and not isinstance(self.obj_import_str, str):
+            return None
+        field_reprs = []
+        for field_ in fields(self):
+            if field_.name.startswith('_') or field_.name in self.FIELDS_NOT_AFFECTING_TARGETS:
+                continue
+            field_repr = repr(getattr(self, field_.name))
+            if ' at 0x' in field_repr:
+                # the repr depends on the object id, so it cannot key a persisted index
+                return None
+            field_reprs.append(f'{field_.name}={field_repr}')
+        cls = type(self)
+        return f'{cls.__module__}.{cls.__qualname__}({", ".join(field_reprs)})'
+
+    def _find_all_targets(self) -> List[Tuple[Any, str]]:
+        targets = []
+        visited = set()
+        for target in super()._get_all_targets():
+            if target not in visited:
+                visited.add(target)
+                targets.append(target)
+        return targets
+
+    def _get_all_targets(self) -> Iterable[Tuple[Any, str]]:
+        key = self._get_targets_index_key() if self.use_targets_index else None
+        if key is None:
+            return self._find_all_targets()
+        fingerprint = get_code_fingerprint(
+            type(self), ['_get_all_parents', '_get_all_modules', '_is_right_type', '_should_replace'])
+        return OVERRIDE_TARGETS_INDEX.get_targets(key, fingerprint, self._find_all_targets)
 
     def _get_all_modules(self) -> list:
         all_modules = [self.obj]
@@ -221,28 +274,33 @@ class PreventAssignmentToAttrs(OverrideImportedObjContext):
 
 @dataclass
 class PreventCalling(RegisteredRunContext):
+    """
+    Prevent calling the functions (or only create issues when they are called).
+    The functions are replaced process-wide, and each call is dispatched to the context of the calling thread
+    (see `DispatchedAttr`).
+    """
     modules_and_functions: Iterable[Tuple[Any, str, bool]] = None
-    _original_functions: Optional[Dict[str, Callable]] = None
+    _handlers: Optional[Dict[str, Callable]] = None
 
     def __enter__(self):
-        self._original_functions = {}
+        self._handlers = {}
         for module, function_name, should_only_create_issue in self.modules_and_functions:
-            module = _import_obj(module)
-            original_func = getattr(module, function_name)
-            setattr(module, function_name, self.get_upon_called(function_name, original_func, should_only_create_issue))
-            self._original_functions[function_name] = original_func
+            dispatched_attr = get_dispatched_attr(_import_obj(module), function_name)
+            handler = self.get_upon_called(function_name, dispatched_attr.call_original, should_only_create_issue)
+            dispatched_attr.add_handler(handler)
+            self._handlers[function_name] = handler
         return super().__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         for module, function_name, _ in self.modules_and_functions:
-            module = _import_obj(module)
-            setattr(module, function_name, self._original_functions.pop(function_name))
-        self._original_functions = None
+            get_dispatched_attr(_import_obj(module), function_name).remove_handler(self._handlers.pop(function_name))
+        self._handlers = None
         return super().__exit__(exc_type, exc_val, exc_tb)
 
     def get_upon_called(self, func_name: str, original_func: Callable, should_only_create_issue: bool):
         def upon_called(*args, **kwargs):
-            if not self._is_enabled or not self._is_called_from_user_script():
+            # offset=4, as we are called through the dispatch of `DispatchedAttr`:
+            if not self._is_enabled or not self._is_called_from_user_script(offset=4):
                 return original_func(*args, **kwargs)
             if should_only_create_issue:
                 self.issues.append(RunIssue.from_current_tb(
@@ -1,15 +1,106 @@
 from __future__ import annotations
 
+import functools
 import os
+import threading
 from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import List, Type, TypeVar, Optional, Iterable, Union, Dict
+from typing import List, Type, TypeVar, Optional, Iterable, Union, Dict, Any, Callable, Tuple
 
 from .user_script_name import is_called_from_user_script
 from .run_issues import RunIssues
 
 T = TypeVar('T', bound='SingletonRegisteredRunContext')
 
+# The registered run contexts entered in the current execution context (thread, or asyncio task):
+_CONTEXT_PROCESS_AND_NAME_TO_OBJECT: ContextVar[Dict[Tuple[int, Any], RegisteredRunContext]] = \
+    ContextVar('process_and_name_to_object', default={})
+
+_PROCESS_LOCK = threading.Lock()
+
+
+def _without_last(handlers: Iterable[Callable], handler: Callable) -> Tuple[Callable, ...]:
+    """
+    Remove the last occurrence of the handler (bound methods are equal if bound to the same object).
+    """
+    handlers = tuple(handlers)
+    for index in range(len(handlers) - 1, -1, -1):
+        if handlers[index] == handler:
+            return handlers[:index] + handlers[index + 1:]
+    return handlers
+
+
+class DispatchedAttr:
+    """
+    A process-wide replacement of a module attribute (like `builtins.open`), which dispatches each call to the
+    handler added in the calling execution context (thread, or asyncio task), or to the original attribute.
+    This allows concurrent runs (in different threads) to each have their own handler.
+
+    Calls from execution contexts without a handler (like other threads of the process) call the original
+    attribute.
+    The replacement is installed while there are handlers.
+    """
+
+    def __init__(self, parent: Any, attr_name: str):
+        self.parent = parent
+        self.attr_name = attr_name
+        self.original = None
+        self._context_handlers: ContextVar[Tuple[Callable, ...]] = ContextVar(f'handlers_of_{attr_name}', default=())
+        self._process_handlers: List[Callable] = []
+
+    def add_handler(self, handler: Callable):
+        with _PROCESS_LOCK:
+            if not self._process_handlers:
+                self.original = getattr(self.parent, self.attr_name)
+                setattr(self.parent, self.attr_name, self._create_dispatcher())
+            self._process_handlers.append(handler)
+        self._context_handlers.set(self._context_handlers.get() + (handler, ))
+
+    def remove_handler(self, handler: Callable):
+        self._context_handlers.set(_without_last(self._context_handlers.get(), handler))
+        with _PROCESS_LOCK:
+            self._process_handlers = list(_without_last(self._process_handlers, handler))
+            if not self._process_handlers:
+                setattr(self.parent, self.attr_name, self.original)
+
+    def get_handler(self) -> Optional[Callable]:
+        context_handlers = self._context_handlers.get()
+        return context_handlers[-1] if context_handlers else None
+
+    def call_original(self, *args, **kwargs):
+        return self.original(*args, **kwargs)
+
+    def _create_dispatcher(self) -> Callable:
+        """
+        Create the function that replaces the attribute.
+        It is a plain function that looks like the original (some libraries set attributes on the functions they
+        expose, like matplotlib setting `pyplot.show.__signature__`, which would fail on a bound method).
+        The handler is called directly from it, so that handlers see their caller at a fixed stack offset
+        (see `is_called_from_user_script`).
+        """
+        @functools.wraps(self.original)
+        def dispatcher(*args, **kwargs):
+            handler = self.get_handler()
+            if handler is None:
+                return self.original(*args, **kwargs)
+            return handler(*args, **kwargs)
+        return dispatcher
+
+
+_PARENTS_AND_NAMES_TO_DISPATCHED_ATTRS: Dict[Tuple[int, str], DispatchedAttr] = {}
+
+
+def get_dispatched_attr(parent: Any, attr_name: str) -> DispatchedAttr:
+    """
+    Get the (single) DispatchedAttr of the attribute.
+    """
+    with _PROCESS_LOCK:
+        key = (id(parent), attr_name)
+        if key not in _PARENTS_AND_NAMES_TO_DISPATCHED_ATTRS:
+            _PARENTS_AND_NAMES_TO_DISPATCHED_ATTRS[key] = DispatchedAttr(parent, attr_name)
+        return _PARENTS_AND_NAMES_TO_DISPATCHED_ATTRS[key]
+
 
 @dataclass
 class DisableableContext:
@@ -73,8 +164,12 @@ class RegisteredRunContext(RunContext):
     """
     Base context manager for running GPT code that can be registered to be accessed from anywhere.
     Allows centralized `temporarily_disable_all` registered context managers.
+
+    Contexts are registered in the current execution context (thread, or asyncio task), so that concurrent runs
+    do not see each other's contexts. They are also registered process-wide, as a fallback for threads
+    started by the run code itself.
     """
-    PROCESS_AND_NAME_TO_OBJECT = {}
+    PROCESS_AND_NAME_TO_OBJECTS = {}  # process-wide registry: (pid, identifier) -> list of objects
     should_register: bool = True
 
     @property
@@ -87,18 +182,44 @@ class RegisteredRunContext(RunContext):
 
     def __enter__(self):
         if self.should_register:
-            self.PROCESS_AND_NAME_TO_OBJECT[self._process_and_identifier] = self
+            key = self._process_and_identifier
+            _CONTEXT_PROCESS_AND_NAME_TO_OBJECT.set({**_CONTEXT_PROCESS_AND_NAME_TO_OBJECT.get(), key: self})
+            with _PROCESS_LOCK:
+                self.PROCESS_AND_NAME_TO_OBJECTS.setdefault(key, []).append(self)
         return super().__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.should_register:
-            self.PROCESS_AND_NAME_TO_OBJECT.pop(self._process_and_identifier)
+            key = self._process_and_identifier
+            context_registry = dict(_CONTEXT_PROCESS_AND_NAME_TO_OBJECT.get())
+            context_registry.pop(key, None)
+            _CONTEXT_PROCESS_AND_NAME_TO_OBJECT.set(context_registry)
+            with _PROCESS_LOCK:
+                objs = [obj for obj in self.PROCESS_AND_NAME_TO_OBJECTS.get(key, []) if obj is not self]
+                if objs:
+                    self.PROCESS_AND_NAME_TO_OBJECTS[key] = objs
+                else:
+                    self.PROCESS_AND_NAME_TO_OBJECTS.pop(key, None)
         return super().__exit__(exc_type, exc_val, exc_tb)
 
     @classmethod
-    def get_all_runtime_instances(cls) -> List[RegisteredRunContext]:
+    def _get_registry(cls) -> Dict[Any, RegisteredRunContext]:
+        """
+        The registered contexts of the current execution context, by identifier.
+        If none (like in threads started by the run code), the process-wide contexts whose identifier
+        is unambiguous.
+        """
         process_id = os.getpid()
-        return [obj for (pid, _), obj in cls.PROCESS_AND_NAME_TO_OBJECT.items() if pid == process_id]
+        context_registry = _CONTEXT_PROCESS_AND_NAME_TO_OBJECT.get()
+        if context_registry:
+            return {identifier: obj for (pid, identifier), obj in context_registry.items() if pid == process_id}
+        with _PROCESS_LOCK:
+            return {identifier: objs[0] for (pid, identifier), objs in cls.PROCESS_AND_NAME_TO_OBJECTS.items()
+                    if pid == process_id and len(objs) == 1}
+
+    @classmethod
+    def get_all_runtime_instances(cls) -> List[RegisteredRunContext]:
+        return list(cls._get_registry().values())
 
     @staticmethod
     @contextmanager
@@ -125,16 +246,26 @@ class SingletonRegisteredRunContext(RegisteredRunContext):
         return self.__class__.__name__
 
     def __enter__(self):
-        if self._identifier in self.PROCESS_AND_NAME_TO_OBJECT:
+        if self._process_and_identifier in _CONTEXT_PROCESS_AND_NAME_TO_OBJECT.get():
             raise RuntimeError(f'SingletonRegisteredRunContext {self._identifier} already exists.')
         return super().__enter__()
 
     @classmethod
-    def get_runtime_instance(cls: Type[T]) -> T:
+    def get_runtime_instance_or_none(cls: Type[T]) -> Optional[T]:
         process_and_identifier = os.getpid(), cls.__name__
-        if process_and_identifier not in cls.PROCESS_AND_NAME_TO_OBJECT:
+        context_registry = _CONTEXT_PROCESS_AND_NAME_TO_OBJECT.get()
+        if context_registry:
+            return context_registry.get(process_and_identifier)
+        with _PROCESS_LOCK:
+            objs = cls.PROCESS_AND_NAME_TO_OBJECTS.get(process_and_identifier, [])
+        return objs[0] if len(objs) == 1 else None
+
+    @classmethod
+    def get_runtime_instance(cls: Type[T]) -> T:
+        obj = cls.get_runtime_instance_or_none()
+        if obj is None:
             raise RuntimeError(f'SingletonRegisteredRunContext {cls.__name__} was not created yet.')
-        return cls.PROCESS_AND_NAME_TO_OBJECT[process_and_identifier]
+        return obj
 
 
 @dataclass
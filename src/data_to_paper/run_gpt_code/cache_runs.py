@@ -1,6 +1,7 @@
 import pickle
 import os
 import hashlib
+import sqlite3
 import time
 import traceback
 
@@ -10,21 +11,28 @@ from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 
 from pathlib import Path
-from typing import Union
+from typing import Union, Dict, Tuple, Optional, List, Any
 
 from data_to_paper.env import DELAY_CODE_RUN_CACHE_RETRIEVAL
-from data_to_paper.utils.file_utils import run_in_directory
+from data_to_paper.utils.file_digest import FILE_DIGEST_CACHE, get_file_stat
+from data_to_paper.utils.file_utils import use_directory, get_current_directory, resolve_path
 from data_to_paper.utils.print_to_file import print_and_log
 
 
-def old_directory_hash(directory):
-    """Create a hash based on all files in the directory."""
+def old_directory_hash(directory, hashed_directory=None):
+    """
+    Create a hash based on all files in the directory.
+    The hashed file paths start with `hashed_directory` (default: `directory`), so that we can hash a directory,
+    which was resolved against the current directory, by the (relative) path it was hashed with.
+    """
     hasher = hashlib.sha256()
+    directory = os.fspath(directory)
+    hashed_directory = directory if hashed_directory is None else os.fspath(hashed_directory)
     for path, dirs, filenames in os.walk(directory):
         for filename in sorted(filenames):
             file_path = os.path.join(path, filename)
             # Consider the file path and the file contents
-            hasher.update(file_path.encode('utf-8'))
+            hasher.update((hashed_directory + file_path[len(directory):]).encode('utf-8'))
             with open(file_path, 'rb') as file:
                 while chunk := file.read(8192):
                     hasher.update(chunk)
@@ -60,13 +68,141 @@ def directory_hash(directory):
     return hasher.hexdigest()
 
 
+def _get_sorted_relative_and_full_paths(directory) -> List[Tuple[str, str]]:
+    root_dir = os.path.abspath(directory)
+    all_files = []
+    for path, dirs, files in os.walk(root_dir):
+        for file in files:
+            full_path = os.path.join(path, file)
+            all_files.append((os.path.relpath(full_path, start=directory), full_path))
+    all_files.sort(key=lambda x: x[0])
+    return all_files
+
+
+def directory_fingerprint(directory):
+    """
+    Create a hash based on the relative path and the content digest of each file in the directory.
+    File digests are cached (see FileDigestCache), so only changed files are read.
+    """
+    hasher = hashlib.sha256()
+    for relative_path, full_path in _get_sorted_relative_and_full_paths(directory):
+        hasher.update(relative_path.encode('utf-8'))
+        hasher.update(FILE_DIGEST_CACHE.get_digest(full_path).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def _get_directory_stat_signature(directory) -> tuple:
+    return tuple((relative_path, get_file_stat(full_path))
+                 for relative_path, full_path in _get_sorted_relative_and_full_paths(directory))
+
+
+_LEGACY_HASH_FUNCS_AND_SIGNATURES_TO_HASHES: Dict[tuple, str] = {}
+
+
+def get_legacy_directory_hash(hash_func, directory, *args):
+    """
+    Get the directory hash of a legacy hash function (which reads all the files).
+    Cached by the stat of all the files in the directory.
+    """
+    key = (hash_func.__name__, os.path.abspath(directory), args, _get_directory_stat_signature(directory))
+    if key not in _LEGACY_HASH_FUNCS_AND_SIGNATURES_TO_HASHES:
+        _LEGACY_HASH_FUNCS_AND_SIGNATURES_TO_HASHES[key] = hash_func(directory, *args)
+    return _LEGACY_HASH_FUNCS_AND_SIGNATURES_TO_HASHES[key]
+
+
+class RunCacheStore:
+    """
+    A keyed store of cached runs, backed by an sqlite file.
+    Looking up or inserting an entry does not load or rewrite the other entries.
+
+    Cache files in the legacy format (a pickled dict) are converted, in place, when first opened.
+    Their entries are marked as legacy, as their keys are based on legacy directory hashes.
+    """
+    SQLITE_HEADER = b'SQLite format 3\x00'
+
+    def __init__(self, filepath: Union[str, Path]):
+        self.filepath = filepath
+        self._migrate_if_legacy()
+        with self._connect(self.filepath) as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS runs '
+                               '(key_hash TEXT PRIMARY KEY, value BLOB, is_legacy INTEGER)')
+
+    @staticmethod
+    @contextmanager
+    def _connect(filepath):
+        """
+        Connect to the sqlite file; commit on success and always close.
+        """
+        connection = sqlite3.connect(filepath)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _get_key_hash(key: tuple) -> str:
+        # repr (unlike pickle) does not depend on object identity (memoization) or on the pickle protocol:
+        return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+    def _is_legacy_file(self) -> bool:
+        if not os.path.exists(self.filepath) or os.path.getsize(self.filepath) == 0:
+            return False
+        with open(self.filepath, 'rb') as file:
+            return file.read(len(self.SQLITE_HEADER)) != self.SQLITE_HEADER
+
+    def _migrate_if_legacy(self):
+        """
+        One-time conversion of a legacy pickled cache file to an sqlite store.
+        """
+        if not self._is_legacy_file():
+            return
+        with open(self.filepath, 'rb') as file:
+            cache = pickle.load(file)
+        temp_filepath = f'{self.filepath}.{os.getpid()}.tmp'
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        with self._connect(temp_filepath) as connection:
+            connection.execute('CREATE TABLE runs (key_hash TEXT PRIMARY KEY, value BLOB, is_legacy INTEGER)')
+            connection.executemany('INSERT OR REPLACE INTO runs VALUES (?, ?, 1)',
+                                   [(self._get_key_hash(key), pickle.dumps(value)) for key, value in cache.items()])
+        os.replace(temp_filepath, self.filepath)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._connect(self.filepath) as connection:
+            row = connection.execute('SELECT value FROM runs WHERE key_hash = ?',
+                                     (self._get_key_hash(key), )).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def set(self, key: tuple, value: Any):
+        with self._connect(self.filepath) as connection:
+            connection.execute('INSERT OR REPLACE INTO runs VALUES (?, ?, 0)',
+                               (self._get_key_hash(key), pickle.dumps(value)))
+
+    def rekey_legacy(self, legacy_key: tuple, key: tuple) -> bool:
+        """
+        Replace the key of a legacy entry. Return whether the legacy entry was found.
+        """
+        with self._connect(self.filepath) as connection:
+            cursor = connection.execute('UPDATE OR REPLACE runs SET key_hash = ?, is_legacy = 0 '
+                                        'WHERE key_hash = ? AND is_legacy = 1',
+                                        (self._get_key_hash(key), self._get_key_hash(legacy_key)))
+            is_found = cursor.rowcount > 0
+        return is_found
+
+    def has_legacy_entries(self) -> bool:
+        with self._connect(self.filepath) as connection:
+            row = connection.execute('SELECT 1 FROM runs WHERE is_legacy = 1 LIMIT 1').fetchone()
+        return row is not None
+
+
 def _read_file(filename):
-    with open(filename, 'rb') as f:
+    with open(resolve_path(filename), 'rb') as f:
         return f.read()
 
 
 def _write_file(filename, content):
-    with open(filename, 'wb') as f:
+    with open(resolve_path(filename), 'wb') as f:
         f.write(content)
 
 
@@ -103,6 +239,8 @@ class CacheRunToFile:
     A class that caches the results of a 'run' method to a file.
     Also caches the files created during the run.
     Files pre-existing in the run directory are considered part of the run input.
+    `_run` is called with the run directory as the current directory of the execution context (without changing
+    the process cwd, see `use_directory`), so it should resolve relative paths with `resolve_path`.
     """
     cache_filepath: Union[str, Path] = None  # Path to the cache file, or None to disable caching
 
@@ -110,10 +248,14 @@ class CacheRunToFile:
         return tuple(asdict(self).values())
 
     def _get_run_directory_key(self) -> tuple:
-        return (directory_hash(self._get_run_directory()), )
+        return (directory_fingerprint(resolve_path(self._get_run_directory())), )
 
-    def _get_run_directory_old_key(self) -> tuple:
-        return (old_directory_hash(self._get_run_directory()), )
+    def _get_run_directory_legacy_keys(self) -> List[tuple]:
+        # old_directory_hash hashes the file paths, which start with the run directory as given (before resolving
+        # it against the current directory):
+        run_directory = self._get_run_directory()
+        return [(get_legacy_directory_hash(directory_hash, resolve_path(run_directory)), ),
+                (get_legacy_directory_hash(old_directory_hash, resolve_path(run_directory), run_directory), )]
 
     def _get_run_directory(self):
         raise NotImplementedError
@@ -121,17 +263,18 @@ class CacheRunToFile:
     def _run(self, *args, **kwargs):
         raise NotImplementedError
 
-    def _load_cache(self, filename=None):
-        filename = filename or self.cache_filepath
-        if os.path.exists(filename):
-            with open(filename, 'rb') as f:
-                return pickle.load(f)
-        return {}
+    def _get_cache_store(self) -> RunCacheStore:
+        return RunCacheStore(self.cache_filepath)
 
-    def _dump_cache(self, cache, filename=None):
-        filename = filename or self.cache_filepath
-        with open(filename, 'wb') as f:
-            pickle.dump(cache, f)
+    def _get_cached(self, store: RunCacheStore, key: tuple, args_key: tuple) -> Optional[Any]:
+        cached = store.get(key)
+        if cached is not None or not store.has_legacy_entries():
+            return cached
+        # Legacy cache entries are keyed by the legacy directory hashes (which read all the files):
+        for legacy_run_directory_key in self._get_run_directory_legacy_keys():
+            if store.rekey_legacy(self._get_instance_key() + legacy_run_directory_key + args_key, key):
+                return store.get(key)
+        return None
 
     def run(self, *args, **kwargs):
         """
@@ -140,37 +283,27 @@ class CacheRunToFile:
         if self.cache_filepath is None:
             return self._run(*args, **kwargs)
 
-        cache = self._load_cache()
-        key = self._get_instance_key() + self._get_run_directory_key() \
-            + tuple(args) + tuple(kwargs.items())
-
-        old_key = self._get_instance_key() + self._get_run_directory_old_key() \
-            + tuple(args) + tuple(kwargs.items())
-
-        if old_key in cache:
-            # replace old key with new key
-            print(f"{self.__class__.__name__}: Replacing old key with new key.")
-            cache[key] = cache.pop(old_key)
-            self._dump_cache(cache)
+        store = self._get_cache_store()
+        args_key = tuple(args) + tuple(kwargs.items())
+        key = self._get_instance_key() + self._get_run_directory_key() + args_key
 
-        if key in cache:
+        cached = self._get_cached(store, key, args_key)
+        if cached is not None:
             print_and_log(f"{self.__class__.__name__}: Using cached output.")
             time.sleep(DELAY_CODE_RUN_CACHE_RETRIEVAL.val)
-            results, filenames = cache[key]
-            with run_in_directory(self._get_run_directory()):
+            results, filenames = cached
+            with use_directory(self._get_run_directory()):
                 _write_files(filenames)
             return results
 
         print_and_log(f"{self.__class__.__name__}: Running and caching output.")
         # Call the function and cache the result along with any created files
-        with run_in_directory(self._get_run_directory()):
+        with use_directory(self._get_run_directory()):
             with get_created_files() as created_files:
                 results = self._run(*args, **kwargs)
             file_contents = _read_files(created_files)
 
-        # Update cache
-        cache[key] = (results, file_contents)
-        self._dump_cache(cache)
+        store.set(key, (results, file_contents))
 
         return results
 
@@ -178,23 +311,24 @@ class CacheRunToFile:
 @contextmanager
 def get_created_files():
     """
-    Context manager for returning all new files created in the current directory.
+    Context manager for returning all new files created in the current directory (of the execution context,
+    see `use_directory`).
     Files are returned as a sorted list of filenames.
     Note: The files are not deleted after the context manager exits.
     """
     # we need to preserve the filenames and metadata of the files
     preexisting_files_and_metadata = set()
-    for filename in os.listdir():
+    for filename in os.listdir(get_current_directory()):
         preexisting_files_and_metadata.update(_get_filename_and_metadata(filename))
 
     created_files = []
     try:
         yield created_files
     finally:
-        for filename in sorted(os.listdir()):
+        for filename in sorted(os.listdir(get_current_directory())):
             if _get_filename_and_metadata(filename) not in preexisting_files_and_metadata:
                 created_files.append(filename)
 
 
 def _get_filename_and_metadata(filename):
-    return filename, os.stat(filename).st_mtime
+    return filename, os.stat(resolve_path(filename)).st_mtime
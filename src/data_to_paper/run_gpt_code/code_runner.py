@@ -1,15 +1,18 @@
 import pickle
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
 from types import ModuleType
 
 import os
 import importlib
+import importlib.util
 
 from typing import Optional, Type, Tuple, Any, Union, Iterable, Dict, Callable
 
 from data_to_paper.env import DEBUG_MODE
 from data_to_paper.utils.types import ListBasedSet
+from data_to_paper.utils.file_utils import get_current_directory
 from data_to_paper.code_and_output_files.output_file_requirements import OutputFileRequirements
 
 from .base_run_contexts import MultiRunContext
@@ -19,28 +22,54 @@ from .run_contexts import PreventFileOpen, ModifyImport, WarningHandler, IssueCo
     TrackCreatedFiles, RunInDirectory
 
 from .exceptions import FailedRunningCode, BaseRunContextException
-from .user_script_name import MODULE_NAME, module_filename
+from .user_script_name import get_unique_module_name
 from .run_issues import RunIssue
 
 from data_to_paper import llm_created_scripts
 module_dir = os.path.dirname(llm_created_scripts.__file__)
-module_default_filepath = os.path.join(module_dir, module_filename)
 
 USING_MATPLOTLIB_IN_GPT_CODE = False
 
 
-def save_code_to_module_file(code: str = None):
+def save_code_to_module_file(code: str = None, module_filepath: Union[Path, str] = None):
     code = code or '# empty module\n'
-    with open(module_default_filepath, "w", encoding='utf-8') as f:
+    with open(module_filepath, "w", encoding='utf-8') as f:
         f.write(code)
 
 
-def generate_empty_code_module_object() -> ModuleType:
+def get_code_module_filepath(module_name: str) -> str:
+    return os.path.join(module_dir, module_name + '.py')
+
+
+def create_code_module_object(code: str = None, module_name: Optional[str] = None) -> ModuleType:
+    """
+    Save the code to a module file, and return the module object.
+    The module name is unique to the run (a new one is created if not provided).
+    The code is executed only when the module is reloaded.
+    """
+    module_name = module_name or get_unique_module_name()
+    save_code_to_module_file(code, get_code_module_filepath(module_name))
+    spec = importlib.util.find_spec(llm_created_scripts.__name__ + '.' + module_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    return module
+
+
+def delete_code_module_file(module_name: str):
     """
-    Generate module object with the given code and return it.
+    Delete the module file (and its cached bytecode) of a module created by `create_code_module_object`.
     """
-    save_code_to_module_file()
-    return importlib.import_module(llm_created_scripts.__name__ + '.' + MODULE_NAME)
+    filepath = get_code_module_filepath(module_name)
+    for filepath in (filepath, importlib.util.cache_from_source(filepath)):
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+
+
+def delete_code_module(module: ModuleType):
+    sys.modules.pop(module.__name__, None)
+    delete_code_module_file(module.__name__.rsplit('.', 1)[-1])
 
 
 def is_serializable(x):
@@ -58,6 +87,8 @@ def is_serializable(x):
 class CodeRunner:
     """
     Run the provided code and report exceptions or specific warnings.
+    The code runs with the process cwd changed to the run folder (see `RunInDirectory`), so a CodeRunner is not
+    thread-safe; concurrent runs should each run in their own process (see `CodeRunnerWrapper`).
     """
     warnings_to_ignore: Optional[Iterable[Type[Warning]]] = \
         (DeprecationWarning, ResourceWarning, PendingDeprecationWarning, FutureWarning)
@@ -87,6 +118,9 @@ class CodeRunner:
     allowed_open_read_files: Optional[Iterable[str]] = ()  # 'all' means all files. () means no files.
     allowed_open_write_files: Optional[Iterable[str]] = None  # 'all': all. `None`: Based on output_file_requirements
 
+    # Not allowed in `open` for writing, in any mode (the input files, which can be staged by hardlink)
+    read_only_files: Iterable[str] = ()
+
     # Allowed new files. Assessed at end of run. If None then all files are allowed.
     output_file_requirements: Optional[OutputFileRequirements] = OutputFileRequirements()
 
@@ -104,10 +138,11 @@ class CodeRunner:
 
         allowed_open_write_files = self.allowed_open_write_files if self.allowed_open_write_files is not None \
             else self.output_file_requirements.get_all_allowed_created_filenames()
+        run_folder = Path(get_current_directory(), self.run_folder)
 
         # Mandatory contexts:
         contexts = {
-            'RunInDirectory': RunInDirectory(folder=self.run_folder),
+            'RunInDirectory': RunInDirectory(folder=run_folder),
             'IssueCollector': IssueCollector(),
             'TrackCreatedFiles': TrackCreatedFiles(output_file_requirements=self.output_file_requirements),
         }
@@ -120,7 +155,8 @@ class CodeRunner:
         if not (self.allowed_open_read_files is None and allowed_open_write_files is None):
             contexts['PreventFileOpen'] = PreventFileOpen(allowed_read_files=self.allowed_open_read_files,
                                                           allowed_write_files=allowed_open_write_files,
-                                                          allowed_write_folder=self.run_folder)
+                                                          allowed_write_folder=run_folder,
+                                                          read_only_files=self.read_only_files)
         if not (self.warnings_to_raise is None and self.warnings_to_issue is None and self.warnings_to_ignore is None):
             contexts['WarningHandler'] = WarningHandler(categories_to_raise=self.warnings_to_raise,
                                                         categories_to_issue=self.warnings_to_issue,
@@ -138,7 +174,7 @@ class CodeRunner:
         self._multi_context = MultiRunContext(contexts=contexts)
         return self._multi_context
 
-    def run(self, code: Union[str, Callable, ModuleType]
+    def run(self, code: Union[str, Callable, ModuleType], module_name: Optional[str] = None
             ) -> Tuple[Any, ListBasedSet[str], MultiRunContext, Optional[FailedRunningCode]]:
         """
         Run the provided code and report exceptions or specific warnings.
@@ -146,6 +182,7 @@ class CodeRunner:
         `code` can be provided as:
         - a string of code to run,
             To run the code, we save it to a .py file and use the importlib to import it.
+            `module_name` is the name of the module (a unique name is created if not provided).
         - a function to run,
             The function is called in the current context.
         - a module to run,
@@ -161,8 +198,7 @@ class CodeRunner:
             configure_matplotlib()
 
         if isinstance(code, str):
-            self._module = generate_empty_code_module_object()
-            save_code_to_module_file(code)
+            self._module = create_code_module_object(code, module_name)
         elif isinstance(code, ModuleType):
             self._module = code
         else:
@@ -189,8 +225,8 @@ class CodeRunner:
         except Exception:
             raise
         finally:
-            if not DEBUG_MODE:
-                save_code_to_module_file()  # leave the module empty
+            if isinstance(code, str) and not DEBUG_MODE:
+                delete_code_module(self._module)
 
         for context in multi_context.get_contexts():
             assert is_serializable(context), f"Context {context} is not serializable."
@@ -9,20 +9,44 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, Tuple, Any
 
-from data_to_paper.env import MAX_EXEC_TIME
-from data_to_paper.utils.mutable import Mutable
-from data_to_paper.run_gpt_code.code_runner import CodeRunner, is_serializable
+from data_to_paper.env import MAX_EXEC_TIME, DEBUG_MODE
+from data_to_paper.utils.mutable import Mutable, get_package_mutables_values, set_package_mutables_values
+from data_to_paper.run_gpt_code.code_runner import CodeRunner, is_serializable, delete_code_module_file
+from data_to_paper.run_gpt_code.user_script_name import get_unique_module_name
 from data_to_paper.utils.types import ListBasedSet
+from data_to_paper.utils.file_utils import get_current_directory, use_directory
+from data_to_paper.utils.worker_pool import WorkerPool, TaskTimeoutError, WorkerDiedError
 
 from .base_run_contexts import MultiRunContext
 from .cache_runs import CacheRunToFile
-from .exceptions import FailedRunningCode, CodeTimeoutException
+from .exceptions import FailedRunningCode, CodeTimeoutException, CodeProcessDiedException
 
 # process.queue fails on Mac OS X with large objects. Use file-based transfer instead.
 RUN_CACHE_FILEPATH = Mutable(None)
 
 USE_THREADING = False
 
+# Run the code in pre-warmed worker processes, instead of starting a new process (and importing the heavy
+# packages) for each run:
+USE_WORKER_POOL = True
+
+# Each worker runs a single LLM script, so that the interpreter state that a script changes (pandas options,
+# random seeds, module attributes) does not leak into the following scripts:
+CODE_RUNNER_WORKER_POOL = WorkerPool(
+    preload_modules=('numpy', 'pandas', 'scipy.stats', 'statsmodels.api', 'sklearn',
+                     'data_to_paper.run_gpt_code.code_runner'),
+    max_tasks_per_worker=1,
+)
+
+
+def run_code_runner(code_runner: CodeRunner, code: str, module_name: str, mutables_values: dict):
+    """
+    Run the code with the code_runner. Used as the task sent to the worker processes.
+    The worker was started ahead of time, so we first update its Mutables to the values of the caller.
+    """
+    set_package_mutables_values(mutables_values)
+    return code_runner.run(code=code, module_name=module_name)
+
 
 @dataclass
 class CodeRunnerWrapper(CacheRunToFile):
@@ -58,7 +82,20 @@ class CodeRunnerWrapper(CacheRunToFile):
         """
         Run the provided code in a separate process and report exceptions or specific warnings.
         Calls `run_in_provided_process` which is a wrapper for `run`.
+        The name of the module file of the code is chosen here, so that we can delete the file even if the process
+        was killed.
         """
+        module_name = get_unique_module_name()
+        try:
+            return self._run_code_in_separate_process(module_name)
+        finally:
+            if not DEBUG_MODE:
+                delete_code_module_file(module_name)
+
+    def _run_code_in_separate_process(self, module_name: str) \
+            -> Tuple[Any, ListBasedSet[str], MultiRunContext, Optional[FailedRunningCode]]:
+        if USE_WORKER_POOL and not USE_THREADING:
+            return self.run_code_in_worker_pool(module_name)
         queue_or_filepath = f"subprocess_output_{uuid.uuid4()}_{os.getpid()}.pkl"
         queue_or_filepath = os.path.join(tempfile.gettempdir(), queue_or_filepath)
         if USE_THREADING:
@@ -68,7 +105,7 @@ class CodeRunnerWrapper(CacheRunToFile):
         try:
             process = process_cls(
                 target=self._run_code_and_put_result_in_queue,
-                args=(queue_or_filepath, ),
+                args=(queue_or_filepath, get_current_directory(), module_name),
             )
         except (AttributeError, TypeError):
             for k, v in self.__dict__.items():
@@ -81,12 +118,7 @@ class CodeRunnerWrapper(CacheRunToFile):
             if not USE_THREADING:
                 process.terminate()  # Terminate the process if it's still alive after timeout
             process.join()
-            result = (
-                None,
-                [],
-                MultiRunContext(),
-                FailedRunningCode(exception=CodeTimeoutException(self.timeout_sec))
-            )
+            result = self._get_timeout_result()
         else:
             with open(queue_or_filepath, 'rb') as f:
                 result = pickle.load(f)
@@ -95,13 +127,47 @@ class CodeRunnerWrapper(CacheRunToFile):
                 raise result
         return result
 
-    def _run_code_and_put_result_in_queue(self, queue_or_filepath):
+    def run_code_in_worker_pool(self, module_name: str) \
+            -> Tuple[Any, ListBasedSet[str], MultiRunContext, Optional[FailedRunningCode]]:
+        """
+        Run the provided code in a worker process of the CODE_RUNNER_WORKER_POOL.
+        The worker is killed if the code does not finish within `timeout_sec`.
+        If the code crashes the worker (e.g. when it runs out of memory), we report it as a failure of the code.
+        """
+        try:
+            result, is_exception = CODE_RUNNER_WORKER_POOL.run(
+                run_code_runner, args=(self.code_runner, self.code, module_name, get_package_mutables_values()),
+                timeout_sec=self.timeout_sec)
+        except TaskTimeoutError:
+            return self._get_timeout_result()
+        except WorkerDiedError as e:
+            return (
+                None,
+                [],
+                MultiRunContext(),
+                FailedRunningCode(exception=CodeProcessDiedException(exit_code=e.exit_code))
+            )
+        if is_exception:
+            raise result
+        return result
+
+    def _get_timeout_result(self) -> Tuple[Any, ListBasedSet[str], MultiRunContext, Optional[FailedRunningCode]]:
+        return (
+            None,
+            [],
+            MultiRunContext(),
+            FailedRunningCode(exception=CodeTimeoutException(self.timeout_sec))
+        )
+
+    def _run_code_and_put_result_in_queue(self, queue_or_filepath, directory, module_name):
         """
         Run the provided code and put the result in the queue.
+        `directory` is the current directory of the caller's execution context.
         """
         code_runner = self.code_runner
         try:
-            result = code_runner.run(code=self.code)
+            with use_directory(directory):
+                result = code_runner.run(code=self.code, module_name=module_name)
         except Exception as e:
             result = e
         with open(queue_or_filepath, 'wb') as f:
@@ -6,7 +6,7 @@ from typing import List, Optional, Tuple, Union
 
 from data_to_paper.exceptions import data_to_paperException
 
-from .user_script_name import module_filename, get_gpt_module_frames
+from .user_script_name import MODULE_NAME, get_gpt_module_frames
 
 
 @dataclass
@@ -74,7 +74,7 @@ class FailedRunningCode(data_to_paperException):
         """
         returns the line of code that caused the exception.
         """
-        search_results = re.search(fr'{module_filename}:(\d+)', self.py_spy_stack_and_code[0])
+        search_results = re.search(fr'{MODULE_NAME}\w*\.py:(\d+)', self.py_spy_stack_and_code[0])
         if search_results is None:
             return []
         lineno = search_results.group(1)
@@ -134,6 +134,15 @@ class CodeTimeoutException(BaseRunContextException, TimeoutError):
         return f"Code timeout after {self.time} seconds."
 
 
+@dataclass
+class CodeProcessDiedException(BaseRunContextException):
+    exit_code: Optional[int] = None
+
+    def __str__(self):
+        return f"The process running the code died unexpectedly (exit code: {self.exit_code}). " \
+               f"The code might have used too much memory."
+
+
 @dataclass
 class UnAllowedFilesCreated(BaseRunContextException, PermissionError):
     un_allowed_files: List[str]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_to_paper.utils.mutable import Mutable
+
+# Path of the json file persisting the override targets index (None to keep the index only in memory):
+OVERRIDE_TARGETS_INDEX_FILEPATH = Mutable(Path(tempfile.gettempdir()) / 'data_to_paper_override_targets_index.json')
+
+Target = Tuple[Any, str]  # (parent, attr_name)
+TargetDescription = Tuple[str, Optional[str], str]  # (module_name, class_qualname or None, attr_name)
+
+
+def _describe_parent(parent) -> Tuple[str, Optional[str]]:
+    if isinstance(parent, type):
+        return parent.__module__, parent.__qualname__
+    return parent.__name__, None
+
+
+def _resolve_parent(module_name: str, qualname: Optional[str]):
+    parent = sys.modules.get(module_name) or importlib.import_module(module_name)
+    if qualname is not None:
+        for name in qualname.split('.'):
+            parent = getattr(parent, name)
+    return parent
+
+
+def _get_package_version(package_name: str) -> Optional[str]:
+    try:
+        package = sys.modules.get(package_name) or importlib.import_module(package_name)
+    except ImportError:
+        return None
+    version = getattr(package, '__version__', None)
+    return version if isinstance(version, str) else None
+
+
+def get_code_fingerprint(cls, method_names) -> str:
+    """
+    A fingerprint of the code of the given methods of a class.
+    Allows invalidating persisted data that was created by an older version of the code.
+    """
+    md5 = hashlib.md5()
+    for method_name in method_names:
+        code = getattr(cls, method_name).__code__
+        md5.update(code.co_code)
+        md5.update(repr(code.co_names).encode())
+    return md5.hexdigest()
+
+
+class OverrideTargetsIndex:
+    """
+    An index of the (parent, attr_name) targets that systematic attribute replacers override.
+
+    Finding the targets requires walking over whole packages (slow), but the targets only depend on the
+    code of the replacer and on the installed package versions. We therefore find the targets once, keep them
+    in memory, and persist them to a json file, so that following processes only need to resolve them.
+
+    Each entry is stored with the versions of the packages of its targets (and with the fingerprint of the replacer
+    code); entries that do not match the current installation are rebuilt.
+    """
+
+    def __init__(self):
+        self._key_to_targets: Dict[str, List[Target]] = {}
+        self._persisted_entries: Optional[Dict[str, dict]] = None
+        self._persisted_filepath = None
+
+    def _get_persisted_entries(self) -> Dict[str, dict]:
+        filepath = OVERRIDE_TARGETS_INDEX_FILEPATH.val
+        if self._persisted_entries is None or self._persisted_filepath != filepath:
+            self._persisted_filepath = filepath
+            self._persisted_entries = {}
+            if filepath is not None and os.path.isfile(filepath):
+                try:
+                    with open(filepath, 'r') as file:
+                        self._persisted_entries = json.load(file)
+                except (OSError, ValueError):
+                    pass
+        return self._persisted_entries
+
+    def _persist_entry(self, key: str, entry: dict):
+        entries = self._get_persisted_entries()
+        entries[key] = entry
+        filepath = self._persisted_filepath
+        if filepath is None:
+            return
+        # write to a temp file and replace, so that concurrent processes never read a partially written file:
+        temp_filepath = f'{filepath}.{os.getpid()}.tmp'
+        try:
+            with open(temp_filepath, 'w') as file:
+                json.dump(entries, file)
+            os.replace(temp_filepath, filepath)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _is_entry_valid(entry: dict, fingerprint: str) -> bool:
+        return entry.get('python') == sys.version \
+            and entry.get('fingerprint') == fingerprint \
+            and all(_get_package_version(package_name) == version
+                    for package_name, version in entry.get('versions', {}).items())
+
+    def _load_targets(self, key: str, fingerprint: str) -> Optional[List[Target]]:
+        entry = self._get_persisted_entries().get(key)
+        if entry is None or not self._is_entry_valid(entry, fingerprint):
+            return None
+        try:
+            return [(_resolve_parent(module_name, qualname), attr_name)
+                    for module_name, qualname, attr_name in entry['targets']]
+        except Exception:
+            return None
+
+    def _create_entry(self, targets: List[Target], fingerprint: str) -> Optional[dict]:
+        """
+        Create a persistable entry, or return None if some of the targets cannot be resolved back from their names.
+        """
+        descriptions: List[TargetDescription] = []
+        for parent, attr_name in targets:
+            module_name, qualname = _describe_parent(parent)
+            try:
+                if _resolve_parent(module_name, qualname) is not parent:
+                    return None
+            except Exception:
+                return None
+            descriptions.append((module_name, qualname, attr_name))
+        package_names = sorted({module_name.split('.')[0] for module_name, _, _ in descriptions})
+        return {
+            'python': sys.version,
+            'fingerprint': fingerprint,
+            'versions': {package_name: _get_package_version(package_name) for package_name in package_names},
+            'targets': descriptions,
+        }
+
+    def get_targets(self, key: str, fingerprint: str, find_targets) -> List[Target]:
+        """
+        Get the targets of the given key.
+        `find_targets` is called to find the targets, only if they are not in memory and not persisted.
+        """
+        targets = self._key_to_targets.get(key)
+        if targets is not None:
+            return targets
+        targets = self._load_targets(key, fingerprint)
+        if targets is None:
+            targets = list(find_targets())
+            entry = self._create_entry(targets, fingerprint)
+            if entry is not None:
+                self._persist_entry(key, entry)
+        self._key_to_targets[key] = targets
+        return targets
+
+    def clear(self):
+        """
+        Clear the in-memory index (the persisted index is kept).
+        """
+        self._key_to_targets = {}
+        self._persisted_entries = None
+
+
+OVERRIDE_TARGETS_INDEX = OverrideTargetsIndex()
@@ -174,6 +174,32 @@ class PValue(OperatorValue):
         return self.reconstruction, (self.value, self.created_by, self.var_name)
 
 
+def _convert_float_array_to_p_values(values: np.ndarray, var_names: Optional[Iterable] = None,
+                                     created_by: str = None, var_name: str = None,
+                                     raise_on_nan: bool = True, raise_on_one: bool = True,
+                                     func_call_str: str = None, context: RunContext = None) -> np.ndarray:
+    """
+    Convert a float array to an object array of PValues, in one pass.
+    The nan/one checks are vectorized; only the invalid values go through `PValue.from_value` (to raise/record
+    the issue).
+    """
+    flat_values = values.ravel()
+    flat_var_names = [var_name] * len(flat_values) if var_names is None else list(var_names)
+    is_invalid = np.zeros(len(flat_values), dtype=bool)
+    if raise_on_nan:
+        is_invalid |= np.isnan(flat_values)
+    if raise_on_one:
+        is_invalid |= flat_values == 1
+    p_values = np.empty(len(flat_values), dtype=object)
+    p_values[:] = [PValue(value, created_by=created_by, var_name=name)
+                   for value, name in zip(flat_values, flat_var_names)]
+    for i in np.flatnonzero(is_invalid):
+        p_values[i] = PValue.from_value(flat_values[i], created_by=created_by, var_name=flat_var_names[i],
+                                        raise_on_nan=raise_on_nan, raise_on_one=raise_on_one,
+                                        func_call_str=func_call_str, context=context)
+    return p_values.reshape(values.shape)
+
+
 def convert_to_p_value(value, created_by: str = None, var_name: str = None,
                        raise_on_nan: bool = True, raise_on_one: bool = True,
                        func_call_str: str = None, context: RunContext = None):
@@ -185,13 +211,16 @@ def convert_to_p_value(value, created_by: str = None, var_name: str = None,
     if isinstance(value, float):
         return PValue.from_value(value, **kwargs)
     if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f':
+            return _convert_float_array_to_p_values(value, **kwargs)
         return np.vectorize(convert_to_p_value)(value, **kwargs)
     if isinstance(value, pd.Series):
-        value = value.copy()
-        kwargs.pop('var_name')
-        for i in range(len(value)):
-            value.iloc[i] = convert_to_p_value(value.iloc[i], var_name=value.index[i], **kwargs)
-        return value
+        if value.dtype.kind == 'f':
+            p_values = _convert_float_array_to_p_values(value.to_numpy(), var_names=value.index, **kwargs)
+        else:
+            kwargs.pop('var_name')
+            p_values = [convert_to_p_value(val, var_name=index, **kwargs) for index, val in value.items()]
+        return pd.Series(p_values, index=value.index, name=value.name, dtype=object)
     if isinstance(value, list):
         return [convert_to_p_value(val, **kwargs) for val in value]
     if isinstance(value, dict):
@@ -202,15 +231,33 @@ def is_p_value(value):
     return hasattr(value, 'this_is_a_p_value')
 
 
+def _get_object_arrays(value) -> Optional[List[np.ndarray]]:
+    """
+    Get the arrays of an ndarray, Series or DataFrame that can contain p-values.
+    PValues can only be stored in object arrays, so arrays of any other dtype are skipped by a dtype test.
+    Return None if the value is not an ndarray, Series or DataFrame.
+    """
+    if isinstance(value, np.ndarray):
+        arrays = [value]
+    elif isinstance(value, pd.Series):
+        arrays = [value.to_numpy()]
+    elif isinstance(value, pd.DataFrame):
+        arrays = [value.iloc[:, i].to_numpy() for i in range(value.shape[1])]
+    else:
+        return None
+    return [array for array in arrays if array.dtype == object]
+
+
+def _get_num_elements(value) -> int:
+    return value.size if isinstance(value, (np.ndarray, pd.Series, pd.DataFrame)) else len(value)
+
+
 def is_containing_p_value(value):
     if is_p_value(value):
         return True
-    if isinstance(value, np.ndarray):
-        return np.any(np.vectorize(is_containing_p_value)(value))
-    if isinstance(value, pd.Series):
-        return value.apply(is_containing_p_value).any()
-    if isinstance(value, pd.DataFrame):
-        return value.applymap(is_containing_p_value).any().any()
+    arrays = _get_object_arrays(value)
+    if arrays is not None:
+        return any(is_containing_p_value(val) for array in arrays for val in array.flat)
     if isinstance(value, (list, tuple)):
         return any(is_containing_p_value(val) for val in value)
     if isinstance(value, dict):
@@ -221,12 +268,11 @@ def is_containing_p_value(value):
 def is_only_p_values(value):
     if is_p_value(value):
         return True
-    if isinstance(value, np.ndarray):
-        return np.all(np.vectorize(is_only_p_values)(value))
-    if isinstance(value, pd.Series):
-        return value.apply(is_only_p_values).all()
-    if isinstance(value, pd.DataFrame):
-        return value.applymap(is_only_p_values).all().all()
+    arrays = _get_object_arrays(value)
+    if arrays is not None:
+        if sum(array.size for array in arrays) < _get_num_elements(value):
+            return False  # some non-object arrays
+        return all(is_only_p_values(val) for array in arrays for val in array.flat)
     if isinstance(value, (list, tuple)):
         return all(is_only_p_values(val) for val in value)
     if isinstance(value, dict):
@@ -238,11 +284,15 @@ def convert_p_values_to_floats(value):
     if is_p_value(value):
         return value.value
     if isinstance(value, np.ndarray):
+        if value.dtype != object:
+            return value.copy()
         return np.vectorize(convert_p_values_to_floats)(value)
     if isinstance(value, pd.Series):
-        return value.apply(convert_p_values_to_floats)
+        if value.dtype != object:
+            return value.copy()
+        return value.map(convert_p_values_to_floats)
     if isinstance(value, pd.DataFrame):
-        return value.applymap(convert_p_values_to_floats)
+        return value.apply(convert_p_values_to_floats)
     if isinstance(value, (list, tuple)):
         return type(value)(convert_p_values_to_floats(val) for val in value)
     if isinstance(value, dict):
@@ -225,14 +225,15 @@ class StatsmodelsAnovaPValueOverride(SystematicFuncReplacerContext, TrackPValueC
             result = original_func(*args, **kwargs)
 
             if TRACK_P_VALUES:
-                # Replace the 'PR(>F)' column with PValue objects
+                # Replace the 'PR(>F)' column with PValue objects (the 'Residual' row is allowed to be NaN)
                 try:
-                    for row_label in result.index:
-                        result.loc[row_label, 'PR(>F)'] = convert_to_p_value(result.loc[row_label, 'PR(>F)'],
-                                                                             created_by=attr_name,
-                                                                             var_name=row_label,
-                                                                             raise_on_nan=row_label != 'Residual',
-                                                                             context=self)
+                    pvalues = result['PR(>F)']
+                    is_residual = pvalues.index == 'Residual'
+                    converted_pvalues = pvalues.astype(object)
+                    for is_rows, raise_on_nan in ((~is_residual, True), (is_residual, False)):
+                        converted_pvalues[is_rows] = convert_to_p_value(pvalues[is_rows], created_by=attr_name,
+                                                                        raise_on_nan=raise_on_nan, context=self)
+                    result['PR(>F)'] = converted_pvalues
                     self._add_pvalue_creating_func(attr_name)
                 except (AttributeError, TypeError, ValueError):
                     pass
@@ -11,15 +11,21 @@ from typing import Any, Iterable, Callable, List, Type, Dict, Optional, Union, T
 
 from pathlib import Path
 
-from data_to_paper.utils.file_utils import is_name_matches_list_of_wildcard_names
-from data_to_paper.utils.types import ListBasedSet
+from data_to_paper.utils.file_utils import is_name_matches_list_of_wildcard_names, run_in_directory, \
+    get_current_directory, resolve_path
+from data_to_paper.utils.types import OrderedSet
 from data_to_paper.text import dedent_triple_quote_str
 
 from .exceptions import CodeWriteForbiddenFile, CodeReadForbiddenFile, \
     CodeImportForbiddenModule, UnAllowedFilesCreated
 from .run_issues import CodeProblem, RunIssue
 from data_to_paper.code_and_output_files.output_file_requirements import OutputFileRequirements
-from .base_run_contexts import SingletonRegisteredRunContext
+from .base_run_contexts import SingletonRegisteredRunContext, get_dispatched_attr
+
+# Builtins are replaced process-wide, and each call is dispatched to the run context of the calling thread:
+_OPEN = get_dispatched_attr(builtins, 'open')
+_IMPORT = get_dispatched_attr(builtins, '__import__')
+_SHOWWARNING = get_dispatched_attr(warnings, 'showwarning')
 
 
 @dataclass
@@ -41,6 +47,17 @@ def _is_temp_file(file_name):
     return file_name.startswith(tempfile.gettempdir())
 
 
+def _resolve_file_arg(args: tuple, kwargs: dict) -> Tuple[tuple, dict]:
+    """
+    Resolve the file of `open(file, ...)` against the current directory of the execution context.
+    """
+    if len(args) > 0:
+        return (resolve_path(args[0]), ) + tuple(args[1:]), kwargs
+    if 'file' in kwargs:
+        return args, {**kwargs, 'file': resolve_path(kwargs['file'])}
+    return args, kwargs
+
+
 @dataclass
 class PreventFileOpen(SingletonRegisteredRunContext):
     SYSTEM_FILES = ['templates/latex_table.tpl', 'templates/latex_longtable.tpl', 'ttf/DejaVuSans.ttf',
@@ -51,15 +68,16 @@ class PreventFileOpen(SingletonRegisteredRunContext):
     allowed_read_files: Iterable[str] = 'all'  # list of wildcard names,  'all' means allow all, [] means allow none
     allowed_write_files: Iterable[str] = 'all'  # list of wildcard names,  'all' means allow all, [] means allow none
     allowed_write_folder: Optional[str] = None
+    read_only_files: Iterable[str] = ()  # list of wildcard names that cannot be opened for writing (staged inputs)
     original_open: Optional[Callable] = None
 
     def _reversible_enter(self):
-        self.original_open = builtins.open
-        builtins.open = self.open_wrapper
+        _OPEN.add_handler(self.open_wrapper)
+        self.original_open = _OPEN.original
         return super()._reversible_enter()
 
     def _reversible_exit(self):
-        builtins.open = self.original_open
+        _OPEN.remove_handler(self.open_wrapper)
         self.original_open = None
         return super()._reversible_exit()
 
@@ -70,11 +88,14 @@ class PreventFileOpen(SingletonRegisteredRunContext):
 
     def is_allowed_write_file(self, file_name: str) -> bool:
         try:
-            file_path = Path(file_name).resolve()
+            file_path = Path(resolve_path(file_name)).resolve()
         except TypeError:
             return True
+        if is_name_matches_list_of_wildcard_names(os.fspath(file_name), self.read_only_files) or \
+                is_name_matches_list_of_wildcard_names(file_path.name, self.read_only_files):
+            return False
         if self.allowed_write_folder is not None and \
-                file_path.parents[0].resolve() != Path(self.allowed_write_folder).resolve() and \
+                file_path.parents[0].resolve() != Path(resolve_path(self.allowed_write_folder)).resolve() and \
                 not _is_temp_file(file_name):
             return False
         return self.allowed_write_files == 'all' or \
@@ -83,7 +104,7 @@ class PreventFileOpen(SingletonRegisteredRunContext):
     def open_wrapper(self, *args, **kwargs):
         file_name = args[0] if len(args) > 0 else kwargs.get('file', None)
         open_mode = args[1] if len(args) > 1 else kwargs.get('mode', 'r')
-        is_opening_for_writing = open_mode in ['w', 'a', 'x', 'w+b', 'a+b', 'x+b', 'wb', 'ab', 'xb']
+        is_opening_for_writing = any(char in open_mode for char in 'wax+')
         # allow read/write files when importing packages
         if not ModifyImport.get_runtime_instance().is_currently_importing():
             if is_opening_for_writing:
@@ -92,10 +113,11 @@ class PreventFileOpen(SingletonRegisteredRunContext):
             else:
                 if not self.is_allowed_read_file(file_name):
                     raise CodeReadForbiddenFile(file=file_name)
+        args, kwargs = _resolve_file_arg(args, kwargs)
         return self.original_open(*args, **kwargs)
 
     def _is_system_file(self, file_name):
-        abs_path_to_file = os.path.abspath(file_name)
+        abs_path_to_file = os.path.abspath(resolve_path(file_name))
         return any(abs_path_to_file.startswith(folder) for folder in self.SYSTEM_FOLDERS) or \
             any(abs_path_to_file.endswith(file) for file in self.SYSTEM_FILES)
 
@@ -109,12 +131,26 @@ class FileAndMetadata(NamedTuple):
 class TrackCreatedFiles(SingletonRegisteredRunContext):
     output_file_requirements: Optional[OutputFileRequirements] = None  # None means allow all
 
-    created_files: Optional[ListBasedSet[str]] = None  # None - unknown, context is not yet exited
+    created_files: Optional[OrderedSet[str]] = None  # None - unknown, context is not yet exited
     un_allowed_created_files: Optional[List[str]] = None  # None - unknown, context is not yet exited
-    _preexisting_files_and_metadata: ListBasedSet[FileAndMetadata] = None
+    _preexisting_files_and_metadata: OrderedSet[FileAndMetadata] = None
 
-    def _get_dir_files_and_metadata(self) -> ListBasedSet[FileAndMetadata]:
-        return ListBasedSet((file, os.stat(file).st_mtime) for file in os.listdir())
+    @staticmethod
+    def _get_file_metadata(file: str) -> Tuple[float, int]:
+        """
+        The mtime and inode of the file, following symlinks.
+        A file that is replaced or written to, including through a hardlink (of staged data files, see `stage_file`),
+        gets a new mtime or inode.
+        """
+        file = resolve_path(file)
+        try:
+            file_stat = os.stat(file)
+        except FileNotFoundError:  # broken symlink
+            file_stat = os.lstat(file)
+        return file_stat.st_mtime, file_stat.st_ino
+
+    def _get_dir_files_and_metadata(self) -> OrderedSet[FileAndMetadata]:
+        return OrderedSet((file, self._get_file_metadata(file)) for file in os.listdir(get_current_directory()))
 
     def __enter__(self):
         self._preexisting_files_and_metadata = self._get_dir_files_and_metadata()
@@ -122,9 +158,9 @@ class TrackCreatedFiles(SingletonRegisteredRunContext):
         self.un_allowed_created_files = None
         return super().__enter__()
 
-    def _get_created_files(self) -> ListBasedSet[str]:
+    def _get_created_files(self) -> OrderedSet[str]:
         files_and_metadata = self._get_dir_files_and_metadata() - self._preexisting_files_and_metadata
-        return ListBasedSet(file for file, _ in files_and_metadata)
+        return OrderedSet(file for file, _ in files_and_metadata)
 
     def _create_issues_for_num_files(self):
         for requirement, output_files \
@@ -153,10 +189,10 @@ class TrackCreatedFiles(SingletonRegisteredRunContext):
             self.un_allowed_created_files = self.output_file_requirements.get_unmatched_files(self.created_files)
         else:
             self.un_allowed_created_files = []
+        result = super().__exit__(exc_type, exc_val, exc_tb)  # unregister, also if we raise
         if self.un_allowed_created_files:
             raise UnAllowedFilesCreated(un_allowed_files=list(self.un_allowed_created_files))
-
-        return super().__exit__(exc_type, exc_val, exc_tb)
+        return result
 
 
 @dataclass
@@ -171,12 +207,12 @@ class ModifyImport(SingletonRegisteredRunContext):
         return super().__enter__()
 
     def _reversible_enter(self):
-        self.original_import = builtins.__import__
-        builtins.__import__ = self.custom_import
+        _IMPORT.add_handler(self.custom_import)
+        self.original_import = _IMPORT.original
         super()._reversible_enter()
 
     def _reversible_exit(self):
-        builtins.__import__ = self.original_import
+        _IMPORT.remove_handler(self.custom_import)
         self.original_import = None
         super()._reversible_exit()
 
@@ -184,7 +220,7 @@ class ModifyImport(SingletonRegisteredRunContext):
         return len(self._currently_importing) > 0
 
     def custom_import(self, name, globals=None, locals=None, fromlist=(), level=0):
-        if self._is_called_from_user_script():
+        if self._is_called_from_user_script(offset=4):  # called through the dispatch of `_IMPORT`
             matched_module, new_name = \
                 next(((module, new_name) for module, new_name in self.modified_imports
                       if name.startswith(module)), (None, None))
@@ -219,12 +255,12 @@ class WarningHandler(SingletonRegisteredRunContext):
     original_showwarning: Optional[Callable] = None
 
     def _reversible_enter(self):
-        self.original_showwarning = warnings.showwarning
-        warnings.showwarning = self._warning_handler
+        _SHOWWARNING.add_handler(self._warning_handler)
+        self.original_showwarning = _SHOWWARNING.original
         super()._reversible_enter()
 
     def _reversible_exit(self):
-        warnings.showwarning = self.original_showwarning
+        _SHOWWARNING.remove_handler(self._warning_handler)
         self.original_showwarning = None
         super()._reversible_exit()
 
@@ -253,18 +289,23 @@ class WarningHandler(SingletonRegisteredRunContext):
 class RunInDirectory(SingletonRegisteredRunContext):
     """
     Run code in a specific folder.
+    The process cwd is changed, so that any relative path used by the code (`open`, `np.loadtxt`, `glob`,
+    C-level file access, ...) is resolved against the folder. The folder is also set as the current directory
+    of the execution context (see `run_in_directory`), for the library code.
+    Since the process cwd is changed, concurrent runs should each run in their own process.
     If folder is None, run in the current folder.
     """
     folder: Union[Path, str] = None
-    original_cwd: Optional[str] = None
+    _directory_context: Optional[Any] = None
 
     def __enter__(self):
-        self.original_cwd = os.getcwd()
-        if self.folder is not None:
-            os.chdir(self.folder)
+        # Not reversible: the code runs in the folder even when the run contexts are temporarily disabled
+        self._directory_context = run_in_directory(self.folder)
+        self._directory_context.__enter__()
         return super().__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        os.chdir(self.original_cwd)
-        self.original_cwd = None
-        return super().__exit__(exc_type, exc_val, exc_tb)
+        result = super().__exit__(exc_type, exc_val, exc_tb)
+        self._directory_context.__exit__(exc_type, exc_val, exc_tb)
+        self._directory_context = None
+        return result
@@ -5,7 +5,7 @@ from typing import Optional, List, Tuple
 from data_to_paper.run_gpt_code.exceptions import FailedRunningCode
 from data_to_paper.text import word_count
 from data_to_paper.utils.replacer import format_value
-from data_to_paper.utils.types import IndexOrderedEnum, ListBasedSet
+from data_to_paper.utils.types import IndexOrderedEnum, OrderedSet
 
 MAX_WORDS_BEFORE_TERMINATING_ISSUE_LIST = 150
 
@@ -123,7 +123,7 @@ class RunIssues(List[RunIssue]):
         We compose all the issues into a single message, and a single comment.
         """
         issues = [issue.formatted() for issue in self._get_issues(most_severe_only)]
-        comments = ListBasedSet()
+        comments = OrderedSet()
 
         if not issues:
             return 'All OK', '', []
@@ -1,25 +1,34 @@
+import functools
 import os
+import re
+import sys
 import traceback
+import uuid
 
 from pathlib import Path
 
 from data_to_paper.utils.mutable import Flag
 
-MODULE_NAME = 'script_to_run'
-module_filename = MODULE_NAME + ".py"
+MODULE_NAME = 'script_to_run'  # the prefix of the module names of the gpt scripts
+
+# Each run of gpt code gets its own uniquely named module file (see `get_unique_module_name`):
+GPT_CODE_FILENAME_PATTERN = re.compile(rf'{MODULE_NAME}(_[0-9a-f]+)?\.py')
 
 
 IS_CHECKING = Flag(False)
 
 
+def get_unique_module_name() -> str:
+    return f'{MODULE_NAME}_{uuid.uuid4().hex[:12]}'
+
+
 def is_filename_gpt_code(filename: str) -> bool:
     """
     Check if the filename is a gpt code filename or a test filename.
     """
     folder = Path(filename).parent
     filename = os.path.basename(filename)
-    # TODO: this is a hack. Need to define the file of the gpt script dynamically.
-    return filename == module_filename \
+    return GPT_CODE_FILENAME_PATTERN.fullmatch(filename) is not None \
         or str(folder).replace('\\', '/').endswith('data_to_paper/scripts')
 
 
@@ -36,13 +45,23 @@ def get_gpt_module_frames(tb: traceback.StackSummary) -> list:
     return frames
 
 
+@functools.lru_cache(maxsize=4096)
+def is_filename_user_script(filename: str) -> bool:
+    return is_filename_gpt_code(filename) or is_filename_test(filename)
+
+
 def is_called_from_user_script(offset: int = 3) -> bool:
     """
     Check if the code is called from user script.
+    `offset` is counted as in `traceback.extract_stack()[-offset]` (1 is the frame of this function).
+
+    This function is called on every intercepted call (imports, open, overridden functions, ...), so we only
+    access the relevant frame (rather than extracting the whole stack), and cache the verdict per code filename.
     """
     if IS_CHECKING:
         return False
-    with IS_CHECKING.temporary_set(True):
-        tb = traceback.extract_stack()  # this can lead to import and invoke recursion (thereby IS_CHECKING))
-        filename = tb[-offset].filename
-        return is_filename_gpt_code(filename) or is_filename_test(filename)
+    try:
+        frame = sys._getframe(offset - 1)
+    except ValueError:
+        raise IndexError('Call stack is not deep enough.')
+    return is_filename_user_script(frame.f_code.co_filename)
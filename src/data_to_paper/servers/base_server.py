@@ -1,13 +1,17 @@
 import functools
 import os
 import pickle
+import threading
 import time
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, List, Tuple, Iterable, Any, Dict
 
 from data_to_paper.env import CHOSEN_APP, DELAY_SERVER_CACHE_RETRIEVAL
 from .json_dump import dump_to_json, load_from_json
+from .records_log import RecordsLog
 from .serialize_exceptions import serialize_exception, is_exception, de_serialize_exception
 
 
@@ -45,6 +49,7 @@ class ServerCaller(ABC):
         self.fail_if_not_all_responses_used = fail_if_not_all_responses_used
         self.should_save = False
         self.file_path = None
+        self._records_lock = threading.RLock()  # allows calling the server from multiple threads
 
     @property
     def empty_records(self) -> Union[list, dict]:
@@ -108,19 +113,72 @@ class ServerCaller(ABC):
         """
         if not self.is_playing_or_recording:
             return self._get_server_response(*args, **kwargs)
-        response = self._get_response_from_records(args, kwargs)
+        with self._records_lock:
+            response = self._get_response_from_records(args, kwargs)
         if response is not None and CHOSEN_APP is not None:
             time.sleep(DELAY_SERVER_CACHE_RETRIEVAL.val)
         if response is None:
             if not self.record_more_if_needed:
                 raise NoMoreResponsesToMockError()
             response = self._get_server_response(*args, **kwargs)
-            self._add_response_to_new_records(args, kwargs, response)
-            if self.should_save:
-                self.save_records()
+            with self._records_lock:
+                self._add_response_to_new_records(args, kwargs, response)
+                if self.should_save:
+                    self.save_records()
         self.args_kwargs_response_history.append((args, kwargs, response))  # for debugging and testing
         return response
 
+    def get_server_responses(self, list_of_args_kwargs: List[Tuple[tuple, dict]], max_workers: int = 1
+                             ) -> List[Tuple[Any, float]]:
+        """
+        Returns the responses for a list of (args, kwargs), after post-processing, together with the time it took
+        to get each response (seconds).
+
+        Responses that are not in the records are requested from the server concurrently, with up to `max_workers`
+        threads. New responses are recorded in the order of the list (not in the order the server responded),
+        so that the records are the same as if we called `get_server_response` sequentially.
+        """
+        raw_responses = [None] * len(list_of_args_kwargs)
+        latencies = [0.] * len(list_of_args_kwargs)
+        indices_to_request = []
+        for index, (args, kwargs) in enumerate(list_of_args_kwargs):
+            response = self._get_response_from_records(args, kwargs) if self.is_playing_or_recording else None
+            if response is None:
+                if self.is_playing_or_recording and not self.record_more_if_needed:
+                    raise NoMoreResponsesToMockError()
+                indices_to_request.append(index)
+            else:
+                if CHOSEN_APP is not None:
+                    time.sleep(DELAY_SERVER_CACHE_RETRIEVAL.val)
+                raw_responses[index] = response
+
+        def get_server_response_and_latency(args, kwargs):
+            start_time = time.time()
+            return self._get_server_response(*args, **kwargs), time.time() - start_time
+
+        if indices_to_request:
+            try:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    indices_to_futures = {
+                        index: executor.submit(get_server_response_and_latency, *list_of_args_kwargs[index])
+                        for index in indices_to_request}
+                    for index, future in indices_to_futures.items():
+                        raw_responses[index], latencies[index] = future.result()
+                        if self.is_playing_or_recording:
+                            self._add_response_to_new_records(*list_of_args_kwargs[index], raw_responses[index])
+            finally:
+                if self.is_playing_or_recording and self.should_save:
+                    self.save_records()
+
+        responses = []
+        for (args, kwargs), response, latency in zip(list_of_args_kwargs, raw_responses, latencies):
+            if self.is_playing_or_recording:
+                self.args_kwargs_response_history.append((args, kwargs, response))
+            if isinstance(response, Exception):
+                raise response
+            responses.append((self._post_process_response(response, args, kwargs), latency))
+        return responses
+
     def __enter__(self):
         self.new_records = self.empty_records
         self.is_playing_or_recording = True
@@ -291,8 +349,27 @@ class OrderedKeyToListServerCaller(OrderedServerCaller):
     """
     A class for calling a remote server, while allowing recording and replaying server responses.
     Records are saved as dictionary (key order preserving) of responses with ordered lists as values.
+
+    Records are saved to an append-only json-lines file (see RecordsLog), so each new response is appended to the
+    file rather than re-writing all the records. Legacy json files are converted upon the first write.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._records_log: Optional[RecordsLog] = None  # the log holding all the records, except the unsaved ones
+        self._loaded_records = None  # the records as loaded from the log
+        self._unsaved_records: List[Tuple[str, object]] = []  # (key, response)
+        self._keys_to_indices_in_old_records: Optional[Dict[str, int]] = None  # see `replay_keys_concurrently`
+
+    @property
+    def old_records(self) -> dict:
+        return self._old_records
+
+    @old_records.setter
+    def old_records(self, records: dict):
+        self._old_records = records
+        self._old_records_as_list = None
+
     @property
     def empty_records(self) -> dict:
         return {}
@@ -308,7 +385,10 @@ class OrderedKeyToListServerCaller(OrderedServerCaller):
         """
         Return a single list of all the old records, as tuples of (key, value).
         """
-        return [(key, value) for key, values in self.old_records.items() for value in values]
+        if self._old_records_as_list is None:
+            self._old_records_as_list = \
+                [(key, value) for key, values in self.old_records.items() for value in values]
+        return self._old_records_as_list
 
     def _get_response_from_a_record(self, record, args, kwargs):
         # record is (key, value)
@@ -317,24 +397,118 @@ class OrderedKeyToListServerCaller(OrderedServerCaller):
             raise ValueError(f'Key mismatch: {key} != {record[0]}')
         return record[1]
 
+    def _get_response_from_records(self, args, kwargs):
+        if self._keys_to_indices_in_old_records is not None:
+            key = self._generate_key(args, kwargs)
+            if key in self._keys_to_indices_in_old_records:
+                records = self._get_old_records_as_list()
+                index = self._keys_to_indices_in_old_records[key]
+                if index < len(records) and records[index][0] == key:
+                    self._keys_to_indices_in_old_records[key] += 1
+                    return records[index][1]
+                return None
+        return super()._get_response_from_records(args, kwargs)
+
+    @contextmanager
+    def replay_keys_concurrently(self, keys: Iterable[str]):
+        """
+        Replay the records of the given keys by key, rather than by their overall order.
+        Allows the requests of these keys to interleave (like when stages run concurrently), while each key still
+        gets its own records in order. Upon exit, we continue replaying following the records of these keys,
+        and new records of these keys are re-ordered by the order of the keys (so that they can also be replayed
+        in order).
+        """
+        keys = list(keys)
+        records = self._get_old_records_as_list()
+        start_index = self.index_in_old_records
+        with self._records_lock:
+            self._keys_to_indices_in_old_records = {}
+            for key in keys:
+                self._keys_to_indices_in_old_records[key] = next(
+                    (index for index in range(start_index, len(records)) if records[index][0] == key), len(records))
+        try:
+            yield
+        finally:
+            with self._records_lock:
+                keys_indices = [index for index in range(start_index, len(records))
+                                if records[index][0] in self._keys_to_indices_in_old_records]
+                if keys_indices:
+                    self.index_in_old_records = max(self.index_in_old_records, keys_indices[-1] + 1)
+                self._keys_to_indices_in_old_records = None
+                self._order_new_records_by_keys(keys)
+
+    def _order_new_records_by_keys(self, keys: List[str]):
+        new_keys = list(self.new_records.keys())
+        keys_in_new_records = [key for key in new_keys if key in keys]
+        ordered_keys = [key for key in keys if key in self.new_records]
+        if keys_in_new_records == ordered_keys:
+            return
+        ordered_keys = iter(ordered_keys)
+        new_records = {}
+        for key in new_keys:
+            if key in keys:
+                key = next(ordered_keys)
+            new_records[key] = self.new_records[key]
+        self.new_records = new_records
+        self._records_log = None  # the records file is not in the order of the records
+        if self.should_save:
+            self.save_records()
+
     def _add_response_to_new_records(self, args, kwargs, response):
         key = self._generate_key(args, kwargs)
         if key not in self.new_records:
             self.new_records[key] = []
         self.new_records[key].append(response)
+        self._unsaved_records.append((key, response))
 
     def _generate_key(self, args, kwargs):
         return convert_args_kwargs_to_tuple(args, kwargs)
 
     def _save_records(self, records, filepath):
-        serialized_records = \
-            {key: [self._serialize_record(record) for record in value] for key, value in records.items()}
-        dump_to_json(serialized_records, filepath)
+        records_log = RecordsLog(filepath)
+        records_log.write(
+            {key: [self._serialize_record(record) for record in value] for key, value in records.items()})
+        if filepath == self.file_path:
+            self._records_log = records_log
+            self._unsaved_records = []
 
     def _load_records(self, filepath):
-        serialized_records = load_from_json(filepath)
-        return {key:
-                [self._deserialize_record(record) for record in value] for key, value in serialized_records.items()}
+        records_log = RecordsLog(filepath)
+        serialized_records = records_log.read()
+        self._records_log = records_log
+        self._loaded_records = {key: [self._deserialize_record(record) for record in value]
+                                for key, value in serialized_records.items()}
+        return self._loaded_records
+
+    def save_records(self, file_path: Optional[str] = None):
+        """
+        Append the unsaved records to the records file.
+        All records are written only if the file is not yet in sync with the records.
+        """
+        file_path = file_path or self.file_path
+        if self._records_log is None or self._records_log.file_path != file_path:
+            super().save_records(file_path)
+            return
+        if not self._unsaved_records:
+            return
+        self._records_log.migrate_if_legacy()
+        for key, response in self._unsaved_records:
+            self._records_log.append(key, self._serialize_record(response))
+        self._unsaved_records = []
+
+    def delete_records_of_keys(self, keys: Iterable[str]):
+        """
+        Delete the records of the given keys, from both the old and the new records.
+        The records are truncated from the records file, if it is in sync with the records.
+        """
+        keys = set(keys)
+        for records in (self.old_records, self.new_records):
+            for key in keys:
+                records.pop(key, None)
+        self._old_records_as_list = None
+        self._unsaved_records = [(key, response) for key, response in self._unsaved_records if key not in keys]
+        if self._records_log is not None and not self._records_log.truncate_keys(keys):
+            self._records_log = None  # we will need to re-write all the records
 
     def mock(self, old_records=None, *args, **kwargs):
         """
@@ -343,8 +517,21 @@ class OrderedKeyToListServerCaller(OrderedServerCaller):
         result = super().mock(old_records, *args, **kwargs)
         self.old_records = old_records if isinstance(old_records, dict) else {"GENERAL": old_records} if (
             old_records) else self.empty_records
+        if self._records_log is None or self._records_log.file_path != self.file_path or \
+                self.old_records is not self._loaded_records:
+            # the file is not known to hold these records
+            self._records_log = None
+        self._loaded_records = None
+        self._unsaved_records = []
         return result
 
+    def __enter__(self):
+        if self.new_records:
+            # the new records of the previous session are dropped
+            self._records_log = None
+        self._unsaved_records = []
+        return super().__enter__()
+
 
 class ParameterizedQueryServerCaller(ServerCaller, ABC):
     """
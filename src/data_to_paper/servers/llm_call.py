@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import time
 from dataclasses import dataclass
 from typing import List, Union, Callable, Tuple, Optional
@@ -12,7 +13,7 @@ from data_to_paper.interactive import HumanAction, BaseApp
 from data_to_paper.env import CHOSEN_APP, FAKE_REQUEST_HUMAN_RESPONSE_ON_PLAYBACK, SHOW_LLM_CONTEXT
 from data_to_paper.utils.print_to_file import print_and_log_red
 from data_to_paper.utils.serialize import SerializableValue, deserialize_serializable_value
-from data_to_paper.conversation.stage import Stage, delete_all_stages_following_stage
+from data_to_paper.conversation.stage import Stage, get_all_keys_following_stage
 
 from .base_server import OrderedKeyToListServerCaller
 from .model_engine import ModelEngine
@@ -167,8 +168,7 @@ class LLMServerCaller(OrderedKeyToListServerCaller):
         """
         Reset the records to the records of the given stage
         """
-        delete_all_stages_following_stage(self.old_records, stage)
-        delete_all_stages_following_stage(self.new_records, stage)
+        self.delete_records_of_keys(get_all_keys_following_stage(self.all_records, stage))
         self.save_records()
 
     @staticmethod
@@ -193,19 +193,39 @@ class LLMServerCaller(OrderedKeyToListServerCaller):
 OPENAI_SERVER_CALLER = LLMServerCaller()
 
 
+@functools.lru_cache(maxsize=None)
+def get_encoding_for_model_engine(model_engine: ModelEngine) -> tiktoken.Encoding:
+    """
+    Get the tiktoken encoding of the model engine (creating an encoding is slow, so we create it once per model).
+    """
+    try:
+        return tiktoken.encoding_for_model(model_engine.value)
+    except KeyError:
+        return tiktoken.encoding_for_model(ModelEngine.GPT35_TURBO.value)
+
+
+@functools.lru_cache(maxsize=1024)
+def _count_number_of_tokens_in_text(text: str, encoding: tiktoken.Encoding) -> int:
+    return len(encoding.encode(text))
+
+
+def count_number_of_tokens_in_text(text: str, model_engine: ModelEngine = None) -> int:
+    return _count_number_of_tokens_in_text(text, get_encoding_for_model_engine(model_engine or ModelEngine.DEFAULT))
+
+
 def count_number_of_tokens_in_message(messages: Union[List[Message], str], model_engine: ModelEngine) -> int:
     """
     Count number of tokens in message using tiktoken.
+    The count of a list of messages is the sum of the (cached) counts of the messages, plus a token for
+    each separating newline.
     """
     if model_engine is None:
         model_engine = ModelEngine.DEFAULT
-    try:
-        encoding = tiktoken.encoding_for_model(model_engine.value)
-    except KeyError:
-        encoding = tiktoken.encoding_for_model(ModelEngine.GPT35_TURBO.value)
-    if not isinstance(messages, str):
-        messages = '\n'.join([message.content for message in messages])
-    return len(encoding.encode(messages))
+    if isinstance(messages, str):
+        return count_number_of_tokens_in_text(messages, model_engine)
+    if not messages:
+        return 0
+    return sum(message.get_number_of_tokens(model_engine) for message in messages) + len(messages) - 1
 
 
 def try_get_llm_response(messages: List[Message],
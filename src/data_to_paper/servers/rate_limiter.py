@@ -0,0 +1,33 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Limit the rate of requests sent to a server, across all threads.
+    Also allows a shared backoff: when one thread is asked to back off (like upon a 429 response),
+    all threads wait before sending their next request.
+    """
+
+    def __init__(self, min_interval_sec: float = 0.):
+        self.min_interval_sec = min_interval_sec
+        self._lock = threading.Lock()
+        self._next_request_time = 0.
+
+    def wait(self):
+        """
+        Wait until we are allowed to send the next request.
+        """
+        with self._lock:
+            now = time.time()
+            request_time = max(now, self._next_request_time)
+            self._next_request_time = request_time + self.min_interval_sec
+        if request_time > now:
+            time.sleep(request_time - now)
+
+    def backoff(self, sec: float):
+        """
+        Delay all the following requests by at least `sec` seconds.
+        """
+        with self._lock:
+            self._next_request_time = max(self._next_request_time, time.time() + sec)
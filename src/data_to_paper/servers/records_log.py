@@ -0,0 +1,125 @@
+import json
+import os
+from typing import Dict, List, Any, Iterable
+
+from .json_dump import load_from_json
+
+
+def is_legacy_json_records_file(file_path) -> bool:
+    """
+    Check whether the file is in the legacy format of a single json dict (key -> list of records),
+    rather than in the json-lines format of the RecordsLog.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                return line.startswith('{')
+    return False
+
+
+def migrate_legacy_json_records_file(file_path) -> bool:
+    """
+    One-time conversion of a legacy json records file to the json-lines format, in place.
+    Return whether the file was converted.
+    """
+    if not os.path.isfile(file_path) or not is_legacy_json_records_file(file_path):
+        return False
+    RecordsLog(file_path).write(load_from_json(file_path))
+    return True
+
+
+class RecordsLog:
+    """
+    An append-only json-lines file of serialized records.
+    Each line is a json list of `[key, serialized_record]`. Records are read back as a dict, keyed by order of first
+    appearance, with the records of each key in the order they were appended.
+
+    We keep an index of the byte offsets of the records of each key. This allows appending a record, or truncating
+    the records of trailing keys (like when resetting to a prior stage), without re-writing the file.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.is_legacy = False
+        self._key_to_offsets: Dict[str, List[int]] = {}  # key -> [offset of first line, end offset of last line]
+        self._end_offset = 0
+
+    def _index_line(self, key: str, start: int, end: int):
+        if key in self._key_to_offsets:
+            self._key_to_offsets[key][1] = end
+        else:
+            self._key_to_offsets[key] = [start, end]
+        self._end_offset = end
+
+    @staticmethod
+    def _to_line(key: str, serialized_record: Any) -> bytes:
+        return (json.dumps([key, serialized_record]) + '\n').encode('utf-8')
+
+    def read(self) -> Dict[str, List[Any]]:
+        """
+        Read the serialized records from the file and build the offsets index.
+        Legacy json files are read as is (they are only converted when we need to write to them).
+        """
+        self._key_to_offsets = {}
+        self._end_offset = 0
+        self.is_legacy = is_legacy_json_records_file(self.file_path)
+        if self.is_legacy:
+            return load_from_json(self.file_path)
+        records = {}
+        with open(self.file_path, 'rb') as file:
+            start = 0
+            for line in file:
+                end = start + len(line)
+                if line.strip():
+                    key, serialized_record = json.loads(line)
+                    records.setdefault(key, []).append(serialized_record)
+                    self._index_line(key, start, end)
+                start = end
+        return records
+
+    def write(self, records: Dict[str, List[Any]]):
+        """
+        Write all the serialized records, replacing the content of the file.
+        """
+        self._key_to_offsets = {}
+        self._end_offset = 0
+        self.is_legacy = False
+        with open(self.file_path, 'wb') as file:
+            for key, serialized_records in records.items():
+                for serialized_record in serialized_records:
+                    line = self._to_line(key, serialized_record)
+                    file.write(line)
+                    self._index_line(key, self._end_offset, self._end_offset + len(line))
+
+    def migrate_if_legacy(self):
+        if self.is_legacy:
+            self.write(load_from_json(self.file_path))
+
+    def append(self, key: str, serialized_record: Any):
+        assert not self.is_legacy
+        line = self._to_line(key, serialized_record)
+        with open(self.file_path, 'ab') as file:
+            file.write(line)
+        self._index_line(key, self._end_offset, self._end_offset + len(line))
+
+    def truncate_keys(self, keys: Iterable[str]) -> bool:
+        """
+        Delete the records of the given keys by truncating the file.
+        This is possible only if the records of these keys all follow the records of all other keys.
+        Return whether the records were deleted.
+        """
+        if self.is_legacy:
+            return False
+        keys = [key for key in keys if key in self._key_to_offsets]
+        if not keys:
+            return True
+        cut_offset = min(self._key_to_offsets[key][0] for key in keys)
+        if any(end > cut_offset for key, (start, end) in self._key_to_offsets.items() if key not in keys):
+            return False
+        with open(self.file_path, 'r+b') as file:
+            file.truncate(cut_offset)
+        for key in keys:
+            del self._key_to_offsets[key]
+        self._end_offset = cut_offset
+        return True
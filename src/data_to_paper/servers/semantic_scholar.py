@@ -1,5 +1,3 @@
-import time
-
 import numpy as np
 import requests
 import re
@@ -16,6 +14,7 @@ from data_to_paper.utils.nice_list import NiceList
 
 from .base_server import ParameterizedQueryServerCaller
 from .custom_types import Citation
+from .rate_limiter import RateLimiter
 from .types import ServerErrorException, MissingAPIKeyError, InvalidAPIKeyError
 
 
@@ -29,6 +28,9 @@ def remove_word(string, word):
 PAPER_SEARCH_URL = 'https://api.semanticscholar.org/graph/v1/paper/search'
 EMBEDDING_URL = 'https://model-apis.semanticscholar.org/specter/v1/invoke'
 
+# Shared by all threads querying Semantic Scholar (see `get_server_responses`):
+PAPER_SEARCH_RATE_LIMITER = RateLimiter(min_interval_sec=1.)
+
 
 get_bibtex_id_from_bibtex = lambda bibtex: bibtex.split('{', 1)[1].split(',\n', 1)[0]
 
@@ -145,12 +147,13 @@ class SemanticScholarPaperServerCaller(ParameterizedQueryServerCaller):
             print_and_log_red(f'QUERYING SEMANTIC SCHOLAR FOR: "{query}"', should_log=False)
             headers = {'x-api-key': SEMANTIC_SCHOLAR_API_KEY.key}
             for attempt in range(3):
+                PAPER_SEARCH_RATE_LIMITER.wait()
                 response = requests.get(PAPER_SEARCH_URL, headers=headers, params=params)
                 if response.status_code not in (504, 429):
                     break
                 print_and_log_red("ERROR: Server timed out or too many requests. "
                                   "We wait for 5 sec and try again.", should_log=False)
-                time.sleep(5)
+                PAPER_SEARCH_RATE_LIMITER.backoff(5)
             else:
                 raise ServerErrorException(server=cls.name, response=response)  # if we failed all attempts
 
@@ -11,7 +11,7 @@ from pygments.styles import get_style_by_name
 from pygments import highlight, token
 from typing import List
 
-from data_to_paper.latex.latex_to_html import convert_latex_to_html
+from data_to_paper.latex.latex_to_html import convert_latex_to_html, convert_latex_sections_to_html
 from data_to_paper.env import CHOSEN_APP
 
 from .formatted_sections import FormattedSections
@@ -236,9 +236,8 @@ def format_text_with_code_blocks(text: str, text_color: str = '', from_md: Optio
     if from_md is None:
         from_md = is_text_md(text)
     do_not_format = do_not_format or []
-    s = ''
-    formatted_sections = FormattedSections.from_text(text)
-    for formatted_section in formatted_sections:
+    labels_sections_and_formatters = []
+    for formatted_section in FormattedSections.from_text(text):
         label, section, is_complete = formatted_section.to_tuple()
         if label is not None:
             label = label.lower()
@@ -250,12 +249,23 @@ def format_text_with_code_blocks(text: str, text_color: str = '', from_md: Optio
                 formatters = BLOCK_FORMATTERS
             else:
                 formatters = TAGS_TO_FORMATTERS.get(label, BLOCK_FORMATTERS)
-        formatter = formatters[is_html]
+        labels_sections_and_formatters.append((label, section, formatters[is_html]))
+
+    if is_html:
+        # Convert all the latex sections (each once, reusing cached conversions):
+        latex_sections = [section for _, section, formatter in labels_sections_and_formatters
+                          if formatter == convert_latex_to_html]
+        latex_htmls = iter(convert_latex_sections_to_html(latex_sections) if latex_sections else [])
+
+    s = ''
+    for label, section, formatter in labels_sections_and_formatters:
         if is_html:
             if formatter == text_to_html:
                 s += formatter(section, from_md=from_md)
             elif formatter == _block_to_html:
                 s += formatter(section, label=label)
+            elif formatter == convert_latex_to_html:
+                s += next(latex_htmls)
             else:
                 s += formatter(section)
         else:
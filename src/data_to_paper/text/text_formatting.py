@@ -1,3 +1,4 @@
+import functools
 import re
 import textwrap
 from typing import Optional, Union, Tuple, Dict
@@ -100,34 +101,45 @@ def wrap_as_block(text: str, header: str = '') -> str:
     return f'```{header}\n{text}\n```'
 
 
+# Placeholders of forgiving_format: {{var}} or {var}
+FORGIVING_FORMAT_PATTERN = re.compile(pattern=r'\{\{.*?\}\}|\{.*?\}')
+_NO_MORE_ARGS = object()
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_forgiving_format(string: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """
+    Split the string into (literal, placeholder) pairs, so that each template is parsed only once.
+    The placeholder of the last pair is None.
+    """
+    tokens = []
+    position = 0
+    for match in FORGIVING_FORMAT_PATTERN.finditer(string):
+        tokens.append((string[position:match.start()], match.group()))
+        position = match.end()
+    tokens.append((string[position:], None))
+    return tuple(tokens)
+
+
 def forgiving_format(string, *args, **kwargs):
     """
     A forgiving version of str.format() that returns the original string if there are no matching arguments.
     """
-
-    # Regular expression pattern to match placeholders in the string
-    pattern = re.compile(pattern=r'\{\{.*?\}\}|\{.*?\}')  # {{var}} or {var}
-
-    def substitute(match):
-        nonlocal args
-        match = match.group()
-        if match[:2] == '{{' and match[-2:] == '}}':
-            return match[1:-1]
-        if match == '{}':
-            if len(args) > 0:
-                replace_with = str(args[0])
-                args = args[1:]
-            else:
-                replace_with = '{}'
+    args = iter(args)
+    parts = []
+    for literal, placeholder in compile_forgiving_format(string):
+        parts.append(literal)
+        if placeholder is None:
+            continue
+        if placeholder[:2] == '{{' and placeholder[-2:] == '}}':
+            parts.append(placeholder[1:-1])
+        elif placeholder == '{}':
+            arg = next(args, _NO_MORE_ARGS)
+            parts.append('{}' if arg is _NO_MORE_ARGS else str(arg))
         else:
-            key = match[1:-1]
-            if key in kwargs:
-                replace_with = str(kwargs[key])
-            else:
-                replace_with = match
-        return replace_with
-
-    return re.sub(pattern, substitute, string)
+            key = placeholder[1:-1]
+            parts.append(str(kwargs[key]) if key in kwargs else placeholder)
+    return ''.join(parts)
 
 
 def short_repr(var):
@@ -1,5 +1,6 @@
+import functools
 import re
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict, Set, Union
 
 
 def extract_numeric_values(text: str) -> List[str]:
@@ -218,7 +219,56 @@ def is_number_legit(str_number: str,
         return True
 
 
-def find_non_matching_numeric_values(source: str, target: str, ignore_int_below: int = 0,
+class NumericSourceIndex:
+    """
+    An index of the numeric values of a source text, for matching target numbers in O(1).
+
+    For each number of significant digits, we hold the set of the source values rounded to these digits
+    (also rounding upwards numbers ending with '5'), and the set of the source values truncated to these digits.
+    Sets are created lazily, upon the first lookup with a given number of digits.
+    """
+
+    def __init__(self, source: str):
+        self.str_source_numbers = extract_numeric_values(unify_representation_of_numeric_values(source))
+        self._n_digits_to_rounded_values: Dict[int, Set[float]] = {}
+        self._n_digits_to_truncated_values: Dict[int, Set[float]] = {}
+
+    def get_rounded_values(self, n_digits: int) -> Set[float]:
+        if n_digits not in self._n_digits_to_rounded_values:
+            self._n_digits_to_rounded_values[n_digits] = \
+                {round_to_n_digits(source_number, n_digits) for source_number in self.str_source_numbers} | \
+                {round_to_n_digits(source_number[:-1] + '6', n_digits) for source_number in self.str_source_numbers
+                 if source_number.endswith('5')}
+        return self._n_digits_to_rounded_values[n_digits]
+
+    def get_truncated_values(self, n_digits: int) -> Set[float]:
+        if n_digits not in self._n_digits_to_truncated_values:
+            self._n_digits_to_truncated_values[n_digits] = \
+                {truncate_to_n_digits(source_number, n_digits) for source_number in self.str_source_numbers}
+        return self._n_digits_to_truncated_values[n_digits]
+
+    def is_matching_after_rounding_to_n_digits(self, target_number: float, n_digits: int) -> bool:
+        """
+        Same as `is_any_matching_value_after_rounding_to_n_digits`, for the source numbers of the index.
+        """
+        return target_number in self.get_rounded_values(n_digits)
+
+    def is_matching_after_truncating_to_n_digits(self, target_number: float, n_digits: int) -> bool:
+        """
+        Same as `is_any_matching_value_after_truncating_to_n_digits`, for the source numbers of the index.
+        """
+        return target_number in self.get_truncated_values(n_digits)
+
+
+@functools.lru_cache(maxsize=16)
+def get_numeric_source_index(source: str) -> NumericSourceIndex:
+    """
+    Get the index of the numeric values of the source text, reusing the index of recently checked sources.
+    """
+    return NumericSourceIndex(source)
+
+
+def find_non_matching_numeric_values(source: Union[str, NumericSourceIndex], target: str, ignore_int_below: int = 0,
                                      remove_trailing_zeros: bool = False,
                                      ignore_one_with_zeros: bool = True,
                                      ignore_after_smaller_than_sign: bool = True,
@@ -228,13 +278,13 @@ def find_non_matching_numeric_values(source: str, target: str, ignore_int_below:
     Check that all the numerical values mentioned in the target are also mentioned in the source.
     For each numerical value in the target, we check that there exists a numeric values in the source
     that matches after rounding to the same number of digits.
+
+    `source` is either the source text, or its `NumericSourceIndex`.
     """
+    source_index = source if isinstance(source, NumericSourceIndex) else get_numeric_source_index(source)
 
     target = unify_representation_of_numeric_values(target)
-    source = unify_representation_of_numeric_values(source)
-
     str_target_numbers = extract_numeric_values(target)
-    str_source_numbers = extract_numeric_values(source)
 
     non_matching_str_numbers = []
     matching_str_numbers = []
@@ -261,15 +311,13 @@ def find_non_matching_numeric_values(source: str, target: str, ignore_int_below:
 
             # check that there exists a number in the source that matches after rounding to the same number of digits:
             if should_truncate:
-                is_match_as_is = is_any_matching_value_after_truncating_to_n_digits(
-                    str_source_numbers, target_number, num_digits)
-                is_match_100 = is_any_matching_value_after_truncating_to_n_digits(
-                    str_source_numbers, target_number_if_percent, num_digits)
+                is_match_as_is = source_index.is_matching_after_truncating_to_n_digits(target_number, num_digits)
+                is_match_100 = source_index.is_matching_after_truncating_to_n_digits(
+                    target_number_if_percent, num_digits)
             else:
-                is_match_as_is = is_any_matching_value_after_rounding_to_n_digits(
-                    str_source_numbers, target_number, num_digits)
-                is_match_100 = is_any_matching_value_after_rounding_to_n_digits(
-                    str_source_numbers, target_number_if_percent, num_digits)
+                is_match_as_is = source_index.is_matching_after_rounding_to_n_digits(target_number, num_digits)
+                is_match_100 = source_index.is_matching_after_rounding_to_n_digits(
+                    target_number_if_percent, num_digits)
 
             # for now, we assume that any number might be a percentage, setting to None:
             is_target_percentage = None  # is_percentage(str_target_number, target)
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import functools
 import inspect
 from dataclasses import dataclass
 from functools import wraps
-from typing import Iterable, Any, get_args, get_origin, Union, Tuple
+from typing import Iterable, Any, get_args, get_origin, Union, Tuple, Callable, Dict
 
 from data_to_paper.exceptions import data_to_paperException
 
@@ -48,12 +49,118 @@ def name_of_type(type_: type) -> str:
     return str(type_).replace('typing.', '').replace("<class '", '').replace("'>", '')
 
 
+# A compiled validator: validator(value, descriptions) raises WrongTypeException if the value is of the wrong type.
+Validator = Callable[[Any, Tuple[str, ...]], None]
+
+
+def _validate_nothing(value: Any, descriptions: Tuple[str, ...] = ()):
+    pass
+
+
+def _check_all_with_validator(elements: Iterable, validator: Validator, descriptions: Tuple[str, ...]):
+    if validator is _validate_nothing:
+        return
+    plain_type = getattr(validator, 'plain_type', None)
+    if plain_type is not None:  # fast path, avoiding a call per element
+        for e in elements:
+            if not isinstance(e, plain_type):
+                raise WrongTypeException(descriptions=descriptions, must_be=plain_type, found=type(e))
+        return
+    for e in elements:
+        validator(e, descriptions)
+
+
+def _compile_plain_type_validator(type_: type) -> Validator:
+    def validate_plain_type(value: Any, descriptions: Tuple[str, ...] = ()):
+        if not isinstance(value, type_):
+            raise WrongTypeException(descriptions=descriptions, must_be=type_, found=type(value))
+    validate_plain_type.plain_type = type_
+    return validate_plain_type
+
+
+def _compile_union_validator(child_types: tuple) -> Validator:
+    child_validators = [compile_validator(child_type) for child_type in child_types]
+
+    def validate_union(value: Any, descriptions: Tuple[str, ...] = ()):
+        for child_validator in child_validators:
+            try:
+                child_validator(value, descriptions)
+                return
+            except WrongTypeException:
+                pass
+        raise WrongTypeException(descriptions=descriptions, must_be=child_types, found=type(value))
+    return validate_union
+
+
+def _compile_generic_validator(origin_type: type, child_types: tuple) -> Validator:
+    child_validators = [None if child_type is Ellipsis else compile_validator(child_type)
+                        for child_type in child_types]
+
+    def validate_generic(value: Any, descriptions: Tuple[str, ...] = ()):
+        if not isinstance(value, origin_type):
+            raise WrongTypeException(descriptions=descriptions, must_be=origin_type, found=type(value))
+        if isinstance(value, dict):
+            _check_all_with_validator(value.keys(), child_validators[0], ('dict keys', ) + descriptions)
+            _check_all_with_validator(value.values(), child_validators[1], ('dict values', ) + descriptions)
+        elif isinstance(value, (list, set)) and len(child_types) == 1:
+            _check_all_with_validator(value, child_validators[0], (name_of_type(type(value)), ) + descriptions)
+        elif isinstance(value, tuple):
+            if len(child_types) == 2 and child_types[1] is Ellipsis:
+                _check_all_with_validator(value, child_validators[0], ('tuple', ) + descriptions)
+            elif len(child_types) == len(value):
+                for e, child_validator in zip(value, child_validators):
+                    child_validator(e, ('tuple', ) + descriptions)
+            else:
+                raise WrongTypeException(descriptions=descriptions, must_be=f'a tuple of length {len(child_types)}',
+                                         found=f'a tuple of length {len(value)}')
+        elif isinstance(value, Iterable):
+            _check_all_with_validator(value, child_validators[0], ('iterable', ) + descriptions)
+        else:
+            raise NotImplementedError(f'format_type: {type(value)} is not implemented')
+    return validate_generic
+
+
+def _compile_validator(type_: type) -> Validator:
+    origin_type = get_origin(type_)
+    if origin_type is None:
+        origin_type = type_
+    if origin_type is Any:
+        return _validate_nothing
+    child_types = get_args(type_)
+
+    if origin_type is Union:
+        return _compile_union_validator(child_types)
+
+    if origin_type.__name__ == '_empty':
+        return _validate_nothing
+
+    if not child_types:
+        return _compile_plain_type_validator(origin_type)
+    return _compile_generic_validator(origin_type, child_types)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_validator_cached(type_: type) -> Validator:
+    return _compile_validator(type_)
+
+
+def compile_validator(type_: type) -> Validator:
+    """
+    Compile the type annotation into a validator: a closure of isinstance checks, which raises
+    WrongTypeException if the value is of the wrong type.
+    Validators are compiled once per annotation.
+    """
+    try:
+        return _compile_validator_cached(type_)
+    except TypeError:  # unhashable annotation
+        return _compile_validator(type_)
+
+
 def check_all_of_type(elements: Iterable, type_: type, descriptions: Tuple[str, ...] = ()):
     """
     Check if all elements are of a certain type.
     """
-    for e in elements:
-        validate_value_type(e, type_, descriptions)
+    _check_all_with_validator(elements, compile_validator(type_), descriptions)
 
 
 def check_all_of_types(elements: Iterable, types_: Iterable[type], descriptions: Tuple[str, ...] = ()):
@@ -81,42 +188,16 @@ def validate_value_type(value: Any, type_: type, descriptions: Tuple[str, ...] =
     """
     Validate that the response is given in the correct format. if not raise WrongTypeException.
     """
-    origin_type = get_origin(type_)
-    if origin_type is None:
-        origin_type = type_
-    if origin_type is Any:
-        return
-    child_types = get_args(type_)
+    compile_validator(type_)(value, descriptions)
 
-    if origin_type is Union:
-        check_of_any_of_types(value, child_types, descriptions)
-        return
-
-    if origin_type.__name__ == '_empty':
-        return
-
-    if not isinstance(value, origin_type):
-        raise WrongTypeException(descriptions=descriptions, must_be=origin_type, found=type(value))
 
-    if not child_types:
-        return
-    if isinstance(value, dict):
-        check_all_of_type(value.keys(), child_types[0], ('dict keys', ) + descriptions)
-        check_all_of_type(value.values(), child_types[1], ('dict values', ) + descriptions)
-    elif isinstance(value, (list, set)) and len(child_types) == 1:
-        check_all_of_type(value, child_types[0], (name_of_type(type(value)), ) + descriptions)
-    elif isinstance(value, tuple):
-        if len(child_types) == 2 and child_types[1] is Ellipsis:
-            check_all_of_type(value, child_types[0], ('tuple', ) + descriptions)
-        elif len(child_types) == len(value):
-            check_all_of_types(value, child_types, ('tuple', ) + descriptions)
-        else:
-            raise WrongTypeException(descriptions=descriptions, must_be=f'a tuple of length {len(child_types)}',
-                                     found=f'a tuple of length {len(value)}')
-    elif isinstance(value, Iterable):
-        check_all_of_type(value, child_types[0], ('iterable', ) + descriptions)
-    else:
-        raise NotImplementedError(f'format_type: {type(value)} is not implemented')
+@functools.lru_cache(maxsize=1024)
+def _get_signature_and_validators(func) -> Tuple[inspect.Signature, Dict[str, Validator]]:
+    """
+    The signature of the function, and the validators of its parameters (compiled once per function).
+    """
+    sig = inspect.signature(func)
+    return sig, {name: compile_validator(parameter.annotation) for name, parameter in sig.parameters.items()}
 
 
 def raise_on_wrong_func_argument_types(func, *args, **kwargs):
@@ -124,14 +205,13 @@ def raise_on_wrong_func_argument_types(func, *args, **kwargs):
     Uses the function signature to check if the arguments are of the correct type.
     Works generally on any func
     """
-    sig = inspect.signature(func)
+    sig, validators = _get_signature_and_validators(func)
     bound = sig.bind(*args, **kwargs)
     bound.apply_defaults()
     msgs = []
     for name, value in bound.arguments.items():
-        type_ = sig.parameters[name].annotation
         try:
-            validate_value_type(value, type_, (f'argument `{name}`', ))
+            validators[name](value, (f'argument `{name}`', ))
         except WrongTypeException as e:
             msgs.append(str(e))
     if msgs:
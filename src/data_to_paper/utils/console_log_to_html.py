@@ -2,8 +2,12 @@ import os
 import re
 
 from pathlib import Path
+from typing import List, Tuple, Optional, TextIO
+
 from ansi2html import Ansi2HTMLConverter
 
+_CONTENT_MARKER = 'CONSOLE_LOG_CONTENT'
+
 
 def convert_ansi_to_html(ansi_text):
     conv = Ansi2HTMLConverter()
@@ -11,8 +15,11 @@ def convert_ansi_to_html(ansi_text):
     return html_text
 
 
-def filter_text(text):
-    lines = text.split('\n')
+def _filter_lines(lines: List[str]) -> Tuple[List[str], bool]:
+    """
+    Filter the lines of the console log.
+    Return the filtered lines, and whether the rest of the log should be removed.
+    """
     lines_to_filter_startswith = [
         ' [31mERROR: None embedding attr.',
         ' [31mCreateConversation(',
@@ -25,8 +32,12 @@ def filter_text(text):
     # Remove everything from "This is BibTeX," to the end of the document
     for i, line in enumerate(filtered_lines):
         if line.startswith("This is BibTeX,"):
-            filtered_lines = filtered_lines[:i]
-            break
+            return filtered_lines[:i], True
+    return filtered_lines, False
+
+
+def filter_text(text):
+    filtered_lines, _ = _filter_lines(text.split('\n'))
     # Join the lines into a single string
     filtered_text = '\n'.join(filtered_lines)
     # Replace three or more consecutive newline characters with two newline characters
@@ -49,3 +60,50 @@ def convert_console_log_to_html(console_filepath: Path):
         with open(html_file, 'w', encoding='utf-8') as new_f:
             new_f.write(text_as_string_html)
     return html_file
+
+
+class IncrementalConsoleLogToHtml:
+    """
+    Build the html of the console log incrementally, as the log is written.
+    Each added chunk of the log is filtered and converted on its own, and appended to the html file,
+    so that the log does not need to be re-read and converted as a whole.
+    The html is complete when closed.
+    """
+
+    def __init__(self, html_filepath: Path):
+        self.html_filepath = html_filepath
+        self._converter = Ansi2HTMLConverter()
+        self._file: Optional[TextIO] = None
+        self._tail: Optional[str] = None
+        self._is_truncated = False  # the rest of the log is removed (see `filter_text`)
+
+    def _get_head_and_tail(self) -> Tuple[str, str]:
+        """
+        The html before and after the content, with the styles of all the colors (rather than only the used ones).
+        """
+        head, tail = self._converter.convert(_CONTENT_MARKER, full=True).split(_CONTENT_MARKER)
+        style_start, style_end = head.index('<style'), head.index('</style>') + len('</style>\n')
+        return head[:style_start] + self._converter.produce_headers() + head[style_end:], tail
+
+    def add_text(self, ansi_text: str):
+        if self._is_truncated or not ansi_text:
+            return
+        filtered_lines, self._is_truncated = _filter_lines(ansi_text.split('\n'))
+        filtered_text = re.sub(r'\n{3,}', '\n', '\n'.join(filtered_lines))
+        if self._file is None:
+            head, self._tail = self._get_head_and_tail()
+            self._file = open(self.html_filepath, 'w', encoding='utf-8')
+            self._file.write(head)
+        self._file.write(self._converter.convert(filtered_text, full=False))
+        self._file.flush()
+
+    def close(self) -> Optional[Path]:
+        """
+        Complete the html file. Return its path, or None if there was no content.
+        """
+        if self._file is None:
+            return None
+        self._file.write(self._tail)
+        self._file.close()
+        self._file = None
+        return self.html_filepath
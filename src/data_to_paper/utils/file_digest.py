@@ -0,0 +1,41 @@
+import hashlib
+import os
+
+from typing import Dict, Tuple
+
+FileStat = Tuple[int, int, int]  # (size, mtime_ns, inode)
+
+
+def get_file_stat(file_path) -> FileStat:
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class FileDigestCache:
+    """
+    Cache of the sha256 digests of files, keyed by (path, size, mtime_ns, inode).
+    A file is re-hashed only if its stat has changed.
+    """
+
+    def __init__(self):
+        self._path_to_stat_and_digest: Dict[str, Tuple[FileStat, str]] = {}
+
+    def get_digest(self, file_path) -> str:
+        file_path = os.path.abspath(file_path)
+        stat = get_file_stat(file_path)
+        stat_and_digest = self._path_to_stat_and_digest.get(file_path)
+        if stat_and_digest is not None and stat_and_digest[0] == stat:
+            return stat_and_digest[1]
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            while chunk := file.read(1024 * 1024):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        self._path_to_stat_and_digest[file_path] = (stat, digest)
+        return digest
+
+    def clear(self):
+        self._path_to_stat_and_digest = {}
+
+
+FILE_DIGEST_CACHE = FileDigestCache()
@@ -0,0 +1,145 @@
+import os
+import shutil
+import stat
+import threading
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Union, Dict, Callable
+
+from data_to_paper.env import DATA_STAGING_STORE_FOLDER, DATA_STAGING_STORE_MAX_SIZE_MB
+from data_to_paper.utils.file_digest import FILE_DIGEST_CACHE
+from data_to_paper.utils.file_utils import evict_least_recently_used_folders
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
+FICLONE = 0x40049409  # linux ioctl for cloning a file (reflink) on copy-on-write file systems (btrfs, xfs, ...)
+
+STORED_FILENAME = 'file'
+
+_STORE_LOCK = threading.Lock()
+
+
+def _reflink_file(source: Path, destination: Path):
+    if fcntl is None:
+        raise OSError('reflink is not supported')
+    with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            destination_file.close()
+            os.remove(destination)
+            raise
+
+
+def _make_read_only(file_path: Path):
+    mode = os.stat(file_path).st_mode
+    os.chmod(file_path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _get_store_entry(key: str, create_entry: Callable[[Path], None]) -> Path:
+    """
+    Return the folder of the entry of the store (shared across runs), creating it if needed.
+    `create_entry` writes the content of the entry into a given folder; the written files are made read-only.
+    Least recently used entries are removed when the store exceeds its max size.
+    """
+    store_folder = Path(DATA_STAGING_STORE_FOLDER.val)
+    entry_folder = store_folder / key
+    if entry_folder.exists():
+        os.utime(entry_folder)  # mark as recently used
+        return entry_folder
+    os.makedirs(store_folder, exist_ok=True)
+    with _STORE_LOCK:
+        # evict before adding the new entry, so that the entry we return is not evicted:
+        evict_least_recently_used_folders(store_folder, DATA_STAGING_STORE_MAX_SIZE_MB.val)
+    temp_folder = store_folder / f'.{key}.{uuid.uuid4()}.tmp'
+    os.makedirs(temp_folder)
+    create_entry(temp_folder)
+    for path, _, filenames in os.walk(temp_folder):
+        for filename in filenames:
+            _make_read_only(Path(path) / filename)
+    try:
+        os.rename(temp_folder, entry_folder)  # atomic, in case of concurrent runs
+    except OSError:
+        shutil.rmtree(temp_folder, ignore_errors=True)  # already created by a concurrent run
+    return entry_folder
+
+
+def get_stored_file(source: Union[Path, str]) -> Path:
+    """
+    Copy the file into the store (once per content), and return the read-only stored file.
+    """
+    entry_folder = _get_store_entry('file_' + FILE_DIGEST_CACHE.get_digest(source),
+                                    lambda folder: shutil.copyfile(source, folder / STORED_FILENAME))
+    return entry_folder / STORED_FILENAME
+
+
+def get_extracted_zip_folder(zip_path: Union[Path, str]) -> Path:
+    """
+    Extract the zip file into the store (once per content), and return the folder of the read-only extracted files.
+    """
+    def extract(folder: Path):
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            zip_ref.extractall(folder)
+
+    return _get_store_entry('zip_' + FILE_DIGEST_CACHE.get_digest(zip_path), extract)
+
+
+def _stage_stored_file(stored_file: Path, destination: Path) -> str:
+    try:
+        os.link(stored_file, destination)
+        return 'hardlink'
+    except OSError:
+        pass
+    shutil.copyfile(stored_file, destination)
+    return 'copy'
+
+
+def stage_file(source: Union[Path, str], destination: Union[Path, str]) -> str:
+    """
+    Make the source file available at the destination, without copying its content if possible.
+    We try, in order:
+    - 'reflink': a copy-on-write clone of the source (independent of the source, supported on btrfs/xfs).
+    - 'hardlink': a link to a read-only copy of the source in the store (see `get_stored_file`).
+      The source itself is never linked, so that writing to the staged file cannot change it.
+    - 'copy': a full copy of the source.
+    Return the method used.
+    """
+    source, destination = Path(source).absolute(), Path(destination)
+    try:
+        _reflink_file(source, destination)
+        return 'reflink'
+    except OSError:
+        pass
+    try:
+        return _stage_stored_file(get_stored_file(source), destination)
+    except OSError:
+        pass
+    shutil.copyfile(source, destination)
+    return 'copy'
+
+
+def stage_zip_content(zip_path: Union[Path, str], destination_folder: Union[Path, str]) -> Dict[str, str]:
+    """
+    Make the content of the zip file available in the destination folder, as if extracted there.
+    Files are staged from the store of extracted zips, by reflink, hardlink or copy (see `stage_file`).
+    Return a mapping from the staged files (relative to the destination folder) to the staging method used.
+    """
+    extracted_folder = get_extracted_zip_folder(zip_path)
+    destination_folder = Path(destination_folder)
+    files_to_methods = {}
+    for path, _, filenames in os.walk(extracted_folder):
+        relative_folder = Path(path).relative_to(extracted_folder)
+        os.makedirs(destination_folder / relative_folder, exist_ok=True)
+        for filename in filenames:
+            relative_path = relative_folder / filename
+            stored_file, destination = extracted_folder / relative_path, destination_folder / relative_path
+            try:
+                _reflink_file(stored_file, destination)
+                files_to_methods[str(relative_path)] = 'reflink'
+            except OSError:
+                files_to_methods[str(relative_path)] = _stage_stored_file(stored_file, destination)
+    return files_to_methods
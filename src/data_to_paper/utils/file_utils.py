@@ -1,11 +1,13 @@
 import os
 import shutil
+import stat
 import tempfile
 import uuid
 import re
 from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Union, Iterable
+from typing import Union, Iterable, Optional
 from fnmatch import fnmatch
 
 
@@ -30,10 +32,22 @@ def clear_directory(directory: Union[Path, str], create_if_missing: bool = True)
         else:
             raise FileNotFoundError(f'Directory {directory} does not exist.')
     for item in directory.iterdir():
-        if item.is_dir():
-            shutil.rmtree(item)
+        if item.is_dir() and not item.is_symlink():
+            shutil.rmtree(item, onerror=_make_writable_and_retry)
         else:
-            item.unlink()
+            _make_writable_and_retry(os.unlink, item, None)
+
+
+def _make_writable_and_retry(func, path, exc_info):
+    """
+    Call func(path), making the path writable if needed (on Windows, read-only files cannot be deleted;
+    e.g. files staged from the read-only store of data files, see `stage_file`).
+    """
+    try:
+        func(path)
+    except PermissionError:
+        os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        func(path)
 
 
 def is_name_matches_list_of_wildcard_names(file_name: str, list_of_filenames: Iterable[str]):
@@ -48,38 +62,93 @@ def is_name_matches_list_of_wildcard_names(file_name: str, list_of_filenames: It
     return False
 
 
+# The current directory of the execution context (thread, or asyncio task), see `use_directory`.
+# None means the process cwd:
+_CURRENT_DIRECTORY: ContextVar[Optional[Path]] = ContextVar('current_directory', default=None)
+
+
+def get_current_directory() -> Path:
+    """
+    Return the current directory of the execution context (see `use_directory`), or the process cwd if not set.
+    """
+    directory = _CURRENT_DIRECTORY.get()
+    return Path(os.getcwd()) if directory is None else directory
+
+
+def resolve_path(file_path):
+    """
+    Resolve a relative path against the current directory of the execution context.
+    Absolute paths, non-path objects (like file descriptors), and all paths when the directory of the execution
+    context is not set, are returned unchanged.
+    """
+    directory = _CURRENT_DIRECTORY.get()
+    if directory is None or not isinstance(file_path, (str, os.PathLike)) or os.path.isabs(file_path):
+        return file_path
+    return os.path.join(directory, file_path)
+
+
 @contextmanager
-def run_in_temp_directory():
+def use_directory(folder: Union[Path, str] = None) -> Union[Path, str]:
     """
-    Run code in a temporary folder.
-    The folder is deleted after the code is done running.
+    Set the current directory of the execution context, without changing the process cwd.
+    Paths are resolved against it with `resolve_path`, and subprocesses run in it (see `get_subprocess_kwargs`).
+    Unlike `run_in_directory`, it is safe to use from concurrent threads.
+    If folder is None, use the current directory.
     """
-    cwd = os.getcwd()
-    folder = os.path.join(tempfile.gettempdir(), f'data_to_paper_temp_{uuid.uuid4()}')
-    if not os.path.exists(folder):
-        os.mkdir(folder)
-    os.chdir(folder)
+    if folder is None:
+        yield folder
+        return
+    token = _CURRENT_DIRECTORY.set(Path(get_current_directory(), folder).absolute())
     try:
         yield folder
     finally:
-        os.chdir(cwd)
+        _CURRENT_DIRECTORY.reset(token)
+
+
+@contextmanager
+def use_temp_directory():
+    """
+    Create a temporary folder and set it as the current directory of the execution context (see `use_directory`).
+    The folder is deleted when done.
+    """
+    folder = os.path.join(tempfile.gettempdir(), f'data_to_paper_temp_{uuid.uuid4()}')
+    os.mkdir(folder)
+    try:
+        with use_directory(folder):
+            yield folder
+    finally:
         shutil.rmtree(folder)
 
 
+@contextmanager
+def run_in_temp_directory():
+    """
+    Run code in a temporary folder.
+    The folder is deleted after the code is done running.
+    Changes the process cwd; use `use_temp_directory` where the code can run concurrently.
+    """
+    with use_temp_directory() as folder:
+        with run_in_directory(folder):
+            yield folder
+
+
 # context manager to run in a given directory:
 @contextmanager
 def run_in_directory(folder: Union[Path, str] = None) -> Union[Path, str]:
     """
     Run code in a specific folder.
     If folder is None, run in the current folder.
+    Changes the process cwd (and the current directory of the execution context), so it is not thread-safe;
+    use `use_directory` where the code can run concurrently.
     """
     cwd = os.getcwd()
-    if folder is not None:
-        os.chdir(folder)
-    try:
-        yield folder
-    finally:
-        os.chdir(cwd)
+    with use_directory(folder):
+        if folder is not None:
+            os.chdir(get_current_directory())
+        try:
+            yield folder
+        finally:
+            os.chdir(cwd)
 
 
 def get_non_existing_file_name(file_path: Union[Path, str]) -> Union[Path, str]:
@@ -93,3 +162,30 @@ def get_non_existing_file_name(file_path: Union[Path, str]) -> Union[Path, str]:
         if not new_file_path.exists():
             return new_file_path
         i += 1
+
+
+def evict_least_recently_used_folders(folder: Union[Path, str], max_size_mb: float):
+    """
+    Remove the least recently used sub-folders of the folder (by their mtime), until the total size of their files
+    is within `max_size_mb`. Sub-folders starting with '.' (in-progress entries) are ignored.
+    Used by on-disk caches that store each entry in its own sub-folder.
+    """
+    entries = []
+    for entry_folder in Path(folder).iterdir():
+        if entry_folder.name.startswith('.'):
+            continue
+        try:
+            size = sum(f.stat().st_size for f in entry_folder.rglob('*') if f.is_file())
+            entries.append((entry_folder.stat().st_mtime, size, entry_folder))
+        except OSError:
+            continue
+    total_size = sum(size for _, size, _ in entries)
+    max_size = max_size_mb * 1024 * 1024
+    for _, size, entry_folder in sorted(entries, key=lambda entry: entry[0]):
+        if total_size <= max_size:
+            break
+        try:
+            shutil.rmtree(entry_folder, onerror=_make_writable_and_retry)  # entries can have read-only files
+        except OSError:
+            pass  # removed by a concurrent process
+        total_size -= size
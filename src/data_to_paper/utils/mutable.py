@@ -1,6 +1,8 @@
 import contextlib
+import importlib
+import sys
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Dict, Tuple
 
 
 @dataclass
@@ -47,3 +49,28 @@ class Flag(Mutable):
 
     def __bool__(self):
         return self.val
+
+
+def get_package_mutables_values(package: str = 'data_to_paper') -> Dict[Tuple[str, str], Any]:
+    """
+    Return the values of the module-level Mutables of the (imported) modules of the package,
+    keyed by (module name, attribute name).
+    """
+    values = {}
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == package or module_name.startswith(package + '.')):
+            continue
+        for attr, value in list(vars(module).items()):
+            if isinstance(value, Mutable):
+                values[(module_name, attr)] = value.val
+    return values
+
+
+def set_package_mutables_values(values: Dict[Tuple[str, str], Any]):
+    """
+    Set the values of module-level Mutables, as returned by `get_package_mutables_values`.
+    Used to bring a process that was started ahead of time up to date with the state of its parent.
+    """
+    for (module_name, attr), val in values.items():
+        module = sys.modules.get(module_name) or importlib.import_module(module_name)
+        getattr(module, attr).set(val)
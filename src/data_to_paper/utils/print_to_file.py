@@ -1,12 +1,18 @@
+import atexit
+import json
+import os
+import threading
+import time
 from contextlib import contextmanager
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Dict, TextIO, List
 
 import colorama
 from functools import partial
 
 from pathlib import Path
 
-from .console_log_to_html import convert_console_log_to_html
+from .console_log_to_html import IncrementalConsoleLogToHtml
 from data_to_paper.text.highlighted_text import colored_text
 from .mutable import Mutable, Flag
 
@@ -14,22 +20,179 @@ CONSOLE_LOG_FILE = Mutable(None)
 
 IS_LOGGING_ENABLED = Flag(True)
 
+# The console log is rotated when it exceeds this size (None for no rotation), keeping this many older logs:
+CONSOLE_LOG_MAX_SIZE_MB = Mutable(100)
+CONSOLE_LOG_NUM_BACKUPS = Mutable(5)
+
+# Also write the console log as json records (one per line), for machine consumption:
+IS_CONSOLE_LOG_JSONL = Flag(False)
+
+
+def get_bw_file_path(file_path: Path) -> Path:
+    return file_path.with_stem(file_path.stem + '_bw')
+
+
+def get_rotated_file_path(file_path: Path, index: int) -> Path:
+    return file_path.with_stem(f'{file_path.stem}.{index}')
+
+
+@dataclass
+class ConsoleLogWriter:
+    """
+    Write the console log to the colored log file, to its black-and-white version (`_bw`), and optionally to a
+    jsonl file of structured records.
+    The files are kept open with buffered writes. They are flushed on stage boundaries (see `flush_console_log`)
+    and when closed.
+    When the colored log exceeds `max_size_mb`, the files are rotated (`console_log.txt` -> `console_log.1.txt`,
+    older logs are shifted up to `num_backups`).
+    If `html_builder` is provided, the html of the log is built incrementally, on each flush.
+    """
+    file_path: Path
+    max_size_mb: Optional[float] = None
+    num_backups: int = 5
+    jsonl_file_path: Optional[Path] = None
+    html_builder: Optional[IncrementalConsoleLogToHtml] = None
+    buffer_size: int = 64 * 1024
+
+    _files: Optional[List[TextIO]] = None  # colored, bw, jsonl
+    _size: int = 0
+    _texts_for_html: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _get_file_paths(self) -> List[Path]:
+        file_paths = [self.file_path, get_bw_file_path(self.file_path)]
+        if self.jsonl_file_path is not None:
+            file_paths.append(self.jsonl_file_path)
+        return file_paths
+
+    def _open(self):
+        self._files = [open(file_path, 'a', encoding='utf-8', buffering=self.buffer_size)
+                       for file_path in self._get_file_paths()]
+        self._size = self._files[0].tell()
+
+    def _close_files(self):
+        if self._files is not None:
+            for file in self._files:
+                file.close()
+            self._files = None
+
+    def _rotate(self):
+        self._close_files()
+        for file_path in self._get_file_paths():
+            for index in range(self.num_backups - 1, 0, -1):
+                if get_rotated_file_path(file_path, index).exists():
+                    os.replace(get_rotated_file_path(file_path, index), get_rotated_file_path(file_path, index + 1))
+            if self.num_backups > 0:
+                os.replace(file_path, get_rotated_file_path(file_path, 1))
+            else:
+                os.remove(file_path)
+
+    def write(self, text_in_color: str, text_in_bw: str, color: Optional[str] = None, end: Optional[str] = None):
+        end = '\n' if end is None else end
+        with self._lock:
+            if self._files is None:
+                self._open()
+            self._files[0].write(text_in_color + end)
+            self._files[1].write(text_in_bw + end)
+            if self.jsonl_file_path is not None:
+                self._files[2].write(json.dumps({'time': time.time(), 'text': text_in_bw + end, 'color': color}) + '\n')
+            if self.html_builder is not None:
+                self._texts_for_html.append(text_in_color + end)
+            self._size += len(text_in_color) + len(end)
+            if self.max_size_mb is not None and self._size > self.max_size_mb * 1024 * 1024:
+                self._flush()
+                self._rotate()
+
+    def _flush(self):
+        if self._files is not None:
+            for file in self._files:
+                file.flush()
+        if self._texts_for_html:
+            self.html_builder.add_text(''.join(self._texts_for_html))
+            self._texts_for_html = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self, is_html_kept: bool = True) -> Optional[Path]:
+        """
+        Flush and close the files. Return the path of the html (None if not built, or not kept).
+        """
+        with self._lock:
+            self._flush()
+            self._close_files()
+            if self.html_builder is None:
+                return None
+            html_file_path = self.html_builder.close()
+            if not is_html_kept and html_file_path is not None:
+                os.remove(html_file_path)
+                return None
+            return html_file_path
+
+
+_FILE_PATHS_TO_CONSOLE_LOG_WRITERS: Dict[Path, ConsoleLogWriter] = {}
+_CONSOLE_LOG_WRITERS_LOCK = threading.Lock()
+
+
+def get_console_log_writer(file_path: Path, is_building_html: bool = False) -> ConsoleLogWriter:
+    """
+    Get the writer of the console log file, creating it if needed.
+    """
+    with _CONSOLE_LOG_WRITERS_LOCK:
+        if file_path not in _FILE_PATHS_TO_CONSOLE_LOG_WRITERS:
+            _FILE_PATHS_TO_CONSOLE_LOG_WRITERS[file_path] = ConsoleLogWriter(
+                file_path=file_path,
+                max_size_mb=CONSOLE_LOG_MAX_SIZE_MB.val,
+                num_backups=CONSOLE_LOG_NUM_BACKUPS.val,
+                jsonl_file_path=file_path.with_suffix('.jsonl') if IS_CONSOLE_LOG_JSONL else None,
+                html_builder=IncrementalConsoleLogToHtml(file_path.parent / (file_path.stem + '.html'))
+                if is_building_html else None,
+            )
+        return _FILE_PATHS_TO_CONSOLE_LOG_WRITERS[file_path]
+
+
+def close_console_log_writer(file_path: Path, is_html_kept: bool = True) -> Optional[Path]:
+    with _CONSOLE_LOG_WRITERS_LOCK:
+        writer = _FILE_PATHS_TO_CONSOLE_LOG_WRITERS.pop(file_path, None)
+    if writer is None:
+        return None
+    return writer.close(is_html_kept=is_html_kept)
+
+
+def flush_console_log():
+    """
+    Flush the buffered writes of the console logs (called on stage boundaries).
+    """
+    with _CONSOLE_LOG_WRITERS_LOCK:
+        writers = list(_FILE_PATHS_TO_CONSOLE_LOG_WRITERS.values())
+    for writer in writers:
+        writer.flush()
+
+
+@atexit.register
+def _close_console_log_writers():
+    for file_path in list(_FILE_PATHS_TO_CONSOLE_LOG_WRITERS):
+        close_console_log_writer(file_path)
+
 
 @contextmanager
 def console_log_file_context(file_path: Path):
     """
     Context manager to temporarily change the console log file.
-    If run is successful, also converts the console log to html.
+    The html of the console log is built as the log is written, and is kept if the run is successful.
     """
     global CONSOLE_LOG_FILE
     old_val = CONSOLE_LOG_FILE.val
     CONSOLE_LOG_FILE.val = file_path
+    get_console_log_writer(file_path, is_building_html=True)
     try:
         yield
     except Exception:
+        close_console_log_writer(file_path, is_html_kept=False)
         raise
     else:
-        convert_console_log_to_html(CONSOLE_LOG_FILE.val)
+        close_console_log_writer(file_path)
     finally:
         CONSOLE_LOG_FILE.val = old_val
 
@@ -46,12 +209,8 @@ def print_and_log(text_in_bw: str, text_in_color: Optional[str] = None, color: O
             text_in_color = text_in_bw
     print(text_in_color, **kwargs)
     if should_log and CONSOLE_LOG_FILE.val is not None:
-        file_path_color = CONSOLE_LOG_FILE.val  # pathlib.Path
-        with open(file_path_color, 'a', encoding='utf-8') as f:
-            print(text_in_color, file=f, **kwargs)
-        file_path_bw = file_path_color.with_stem(file_path_color.stem + '_bw')
-        with open(file_path_bw, 'a', encoding='utf-8') as f:
-            print(text_in_bw, file=f, **kwargs)
+        get_console_log_writer(CONSOLE_LOG_FILE.val).write(
+            str(text_in_color), str(text_in_bw), color=color, end=kwargs.get('end'))
 
 
 print_and_log_red = partial(print_and_log, color=colorama.Fore.RED)
@@ -1,9 +1,49 @@
+import functools
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from typing import Tuple, Union, Any, Optional
+from typing import Tuple, Union, Any, Optional, Dict, FrozenSet
 
 from data_to_paper.text.text_extractors import extract_all_external_brackets
 from data_to_paper.text.text_formatting import forgiving_format
-from data_to_paper.utils.types import ListBasedSet
+from data_to_paper.utils.types import OrderedSet
+
+_MISSING = object()
+
+# Attributes resolved within a single (top-level) formatting: (id(obj), attribute name) -> (obj, formatted attribute).
+# The obj is kept, so that its id is not reused during the formatting:
+_FORMATTING_PASS_MEMO: ContextVar[Optional[Dict[Tuple[int, str], Tuple[Any, str]]]] = \
+    ContextVar('_FORMATTING_PASS_MEMO', default=None)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template(text: str) -> Tuple[str, ...]:
+    """
+    Return the distinct placeholders of the template (without the brackets), in order of appearance.
+    Each template is parsed only once.
+    """
+    return tuple(bracket[1:-1] for bracket in OrderedSet(extract_all_external_brackets(text, '{')))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_class_accessors(cls: type) -> Tuple[FrozenSet[str], bool]:
+    """
+    Return the attribute names defined by the class, and whether the class resolves other attributes dynamically
+    (with __getattr__).
+    """
+    return frozenset(dir(cls)), hasattr(cls, '__getattr__')
+
+
+def get_attribute(obj, name: str):
+    """
+    Return the attribute of the object, or _MISSING.
+    Names that are neither class attributes nor instance attributes are rejected without calling getattr.
+    """
+    if isinstance(obj, type):
+        return getattr(obj, name, _MISSING)
+    class_attributes, is_dynamic = _get_class_accessors(type(obj))
+    if not is_dynamic and name not in class_attributes and name not in getattr(obj, '__dict__', ()):
+        return _MISSING
+    return getattr(obj, name, _MISSING)
 
 
 @dataclass
@@ -42,28 +82,41 @@ class Replacer:
             return [self.objs]
 
     def format_text(self) -> str:
-        text = self.text
-        brackets = ListBasedSet(extract_all_external_brackets(self.text, '{'))
+        memo = _FORMATTING_PASS_MEMO.get()
+        if memo is not None:
+            return self._format_text(memo)
+        token = _FORMATTING_PASS_MEMO.set({})
+        try:
+            return self._format_text(_FORMATTING_PASS_MEMO.get())
+        finally:
+            _FORMATTING_PASS_MEMO.reset(token)
+
+    def _format_text(self, memo: Dict[Tuple[int, str], Tuple[Any, str]]) -> str:
         additional_kwargs = {}
         objs = self.get_objs()
-        for bracket in brackets:
-            bracketed_text = bracket[1:-1]
+        for bracketed_text in compile_template(self.text):
             for obj in objs:
-                if hasattr(obj, bracketed_text):
-                    attr = getattr(obj, bracketed_text)
+                key = (id(obj), bracketed_text)
+                if key in memo:
+                    additional_kwargs[bracketed_text] = memo[key][1]
+                    break
+                attr = get_attribute(obj, bracketed_text)
+                if attr is not _MISSING:
                     if not isinstance(attr, Replacer):
                         attr = Replacer(obj, str(attr))
-                    attr = attr.format_text()
+                    attr = attr._format_text(memo)
                     additional_kwargs[bracketed_text] = attr
+                    memo[key] = (obj, attr)
                     break
             else:
                 pass  # we don't have the attribute in any of the objects, so we don't do anything
         # add object kwargs:
         for obj in objs:
-            if hasattr(obj, 'replacer_kwargs'):
-                additional_kwargs.update(obj.replacer_kwargs)
+            replacer_kwargs = get_attribute(obj, 'replacer_kwargs')
+            if replacer_kwargs is not _MISSING:
+                additional_kwargs.update(replacer_kwargs)
 
-        return forgiving_format(text, *self.args, **self.kwargs, **additional_kwargs)
+        return forgiving_format(self.text, *self.args, **self.kwargs, **additional_kwargs)
 
 
 def format_value(obj: object, value: Any, should_format: bool = True) -> Union[str, Any]:
@@ -1,6 +1,8 @@
 import os
 import subprocess
 
+from data_to_paper.utils.file_utils import get_current_directory
+
 
 SYSTEM_KWARGS = {}
 if os.name == 'nt':
@@ -8,6 +10,11 @@ if os.name == 'nt':
 
 
 def get_subprocess_kwargs(capture: bool = True):
+    """
+    The kwargs for `subprocess.run`. The subprocess runs in the current directory of the execution context
+    (see `use_directory`).
+    """
+    kwargs = {'check': True, 'cwd': get_current_directory(), **SYSTEM_KWARGS}
     if capture:
-        return {'check': True, 'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE, **SYSTEM_KWARGS}
-    return {'check': True, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL, **SYSTEM_KWARGS}
+        return {**kwargs, 'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE}
+    return {**kwargs, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
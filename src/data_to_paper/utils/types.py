@@ -1,16 +1,34 @@
 import collections
 from enum import Enum
 
-from typing import Generic, TypeVar, Iterable
+from typing import Generic, TypeVar, Iterable, Dict, Any, List, Tuple
 
 
 class IndexOrderedEnum(Enum):
+    """
+    An enum whose members are ordered (and hashed) by their position in the enum.
+    The indices are computed once per class, on first use, so comparisons and hashing are O(1).
+    """
+
+    @classmethod
+    def _get_ordered_members(cls) -> tuple:
+        ordered_members = cls.__dict__.get('_ordered_members')
+        if ordered_members is None:
+            ordered_members = tuple(cls._member_map_[name] for name in cls._member_names_)
+            for index, member in enumerate(ordered_members):
+                member._index = index
+            cls._ordered_members = ordered_members
+        return ordered_members
 
     def get_index(self):
         """
         Get the index of this enum value in the list of enum values.
         """
-        return self._member_names_.index(self.name)
+        try:
+            return self._index
+        except AttributeError:
+            self._get_ordered_members()
+            return self._index
 
     def get_next(self):
         """
@@ -18,17 +36,29 @@ class IndexOrderedEnum(Enum):
         If this is the last value, a ValueError is raised.
         """
         try:
-            return list(self.__class__)[(self.get_index() + 1)]
+            return self._get_ordered_members()[self.get_index() + 1]
         except IndexError:
             raise ValueError(f"No next value after {self}")
 
     @classmethod
     def get_first(cls):
-        return list(cls)[0]
+        return cls._get_ordered_members()[0]
 
     @classmethod
     def get_last(cls):
-        return list(cls)[-1]
+        return cls._get_ordered_members()[-1]
+
+    @classmethod
+    def get_by_value(cls, value):
+        """
+        Get the enum member with the given value.
+        If there is no such member, a ValueError is raised.
+        """
+        try:
+            return cls._value2member_map_[value]
+        except (KeyError, TypeError):
+            pass
+        return cls(value)  # unhashable values, or _missing_ hooks
 
     def __eq__(self, other):
         if isinstance(other, IndexOrderedEnum):
@@ -62,27 +92,47 @@ class IndexOrderedEnum(Enum):
 T = TypeVar('T')
 
 
-class ListBasedSet(collections.abc.Set, Generic[T]):
+_NOT_IN_SET = object()
+
+
+class OrderedSet(collections.abc.Set, Generic[T]):
     """
-    Alternate set implementation favoring space over speed and stable ordering.
-    also and not requiring the set elements to be hashable.
+    Insertion-ordered set implementation.
+    Hashable elements are looked up by hash; unhashable elements are also allowed, and are looked up linearly.
     """
 
     def __init__(self, iterable: Iterable = None):
-        self.elements = lst = []
+        self._keys_to_elements: Dict[Any, T] = {}  # hashable elements are their own keys
+        self._unhashable_keys_and_elements: List[Tuple[object, T]] = []
         if iterable is not None:
-            for value in iterable:
-                if value not in lst:
-                    lst.append(value)
+            self.update(iterable)
+
+    def _get_key(self, value):
+        """
+        Return the key of the value in the set, or _NOT_IN_SET.
+        """
+        try:
+            if value in self._keys_to_elements:
+                return value
+        except TypeError:  # unhashable
+            pass
+        for key, element in self._unhashable_keys_and_elements:
+            if element == value:
+                return key
+        return _NOT_IN_SET
+
+    @property
+    def elements(self) -> List[T]:
+        return list(self._keys_to_elements.values())
 
     def __iter__(self):
-        return iter(self.elements)
+        return iter(self._keys_to_elements.values())
 
     def __contains__(self, value):
-        return value in self.elements
+        return self._get_key(value) is not _NOT_IN_SET
 
     def __len__(self):
-        return len(self.elements)
+        return len(self._keys_to_elements)
 
     def __str__(self):
         # make it look like a set:
@@ -92,11 +142,24 @@ class ListBasedSet(collections.abc.Set, Generic[T]):
         return f'{self.__class__.__name__}({self.elements})'
 
     def add(self, value):
-        if value not in self.elements:
-            self.elements.append(value)
+        if self._get_key(value) is not _NOT_IN_SET:
+            return
+        try:
+            self._keys_to_elements[value] = value
+        except TypeError:  # unhashable
+            key = object()
+            self._keys_to_elements[key] = value
+            self._unhashable_keys_and_elements.append((key, value))
 
     def remove(self, value):
-        self.elements.remove(value)
+        key = self._get_key(value)
+        if key is _NOT_IN_SET:
+            raise ValueError(f'{value!r} is not in the set')
+        element = self._keys_to_elements.pop(key)
+        if key is not element:
+            self._unhashable_keys_and_elements = \
+                [key_and_element for key_and_element in self._unhashable_keys_and_elements
+                 if key_and_element[0] is not key]
 
     def update(self, other):
         for value in other:
@@ -106,6 +169,10 @@ class ListBasedSet(collections.abc.Set, Generic[T]):
         return self.__class__(self.elements + list(other))
 
 
+# For backward compatibility. ListBasedSet was a list-based implementation, which is now hash-backed:
+ListBasedSet = OrderedSet
+
+
 K = TypeVar('K')
 V = TypeVar('V')
 
@@ -0,0 +1,249 @@
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Tuple, Optional, List, Any
+
+from data_to_paper.utils.file_utils import get_current_directory
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# The modules imported by the forkserver process, for all the pools (see `WorkerPool._get_multiprocessing_context`):
+_FORKSERVER_PRELOAD_MODULES: List[str] = []
+
+
+class WorkerDiedError(Exception):
+    def __init__(self, exit_code: Optional[int] = None):
+        super().__init__(f'Worker process died (exit code: {exit_code}).')
+        self.exit_code = exit_code
+
+
+class TaskTimeoutError(Exception):
+    pass
+
+
+def _get_max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux:
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+
+def _limit_memory(max_memory_mb: Optional[float]):
+    """
+    Limit the memory that the worker process can allocate, so that a task that allocates too much gets a
+    MemoryError (rather than taking the memory of the machine).
+    We limit the data segment (heap and anonymous mappings), where supported, rather than the address space,
+    which also counts the (much larger) reserved but unused memory.
+    """
+    if resource is None or max_memory_mb is None:
+        return
+    limit_type = getattr(resource, 'RLIMIT_DATA', resource.RLIMIT_AS)
+    _, hard_limit = resource.getrlimit(limit_type)
+    limit = int(max_memory_mb * 1024 ** 2)
+    if hard_limit != resource.RLIM_INFINITY:
+        limit = min(limit, hard_limit)
+    try:
+        resource.setrlimit(limit_type, (limit, hard_limit))
+    except (ValueError, OSError):  # not supported on this platform
+        pass
+
+
+def _is_worker_contaminated() -> bool:
+    """
+    Check whether the task left behind threads or processes that could affect the following tasks.
+    """
+    return threading.active_count() > 1 or len(multiprocessing.active_children()) > 0
+
+
+def _worker_main(conn, preload_modules: Tuple[str, ...], max_memory_mb: Optional[float]):
+    """
+    The main loop of a worker process.
+    Receives (func, args, kwargs, cwd) tasks (cwd is the current directory of the caller's execution context),
+    and sends back (result, is_exception, max_rss_mb, is_contaminated).
+    """
+    # The worker is started as daemon, so that it is terminated when the main process exits.
+    # But, the tasks are still allowed to start their own processes:
+    multiprocessing.current_process().daemon = False
+    _limit_memory(max_memory_mb)
+    for module in preload_modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        func, args, kwargs, cwd = task
+        os.chdir(cwd)
+        is_exception = False
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            result = e
+            is_exception = True
+        report = (_get_max_rss_mb(), is_exception or _is_worker_contaminated())
+        try:
+            conn.send((result, is_exception) + report)
+        except Exception as e:  # the result cannot be pickled
+            conn.send((e, True) + report)
+
+
+class _Worker:
+    def __init__(self, context: multiprocessing.context.BaseContext, preload_modules: Tuple[str, ...],
+                 max_memory_mb: Optional[float]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, preload_modules, max_memory_mb),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.start_time = time.time()
+        self.num_tasks = 0
+        self.max_rss_mb = None
+        self.is_contaminated = False
+
+    def run(self, func: Callable, args: tuple, kwargs: dict, timeout_sec: Optional[float]) -> Tuple[Any, bool]:
+        """
+        Run the task and return (result, is_exception).
+        Raise TaskTimeoutError if the task did not finish in time, WorkerDiedError if the worker died.
+        """
+        self.conn.send((func, args, kwargs, get_current_directory()))
+        self.num_tasks += 1
+        if not self.conn.poll(timeout_sec):
+            raise TaskTimeoutError()
+        try:
+            result, is_exception, self.max_rss_mb, self.is_contaminated = self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join(1)
+            raise WorkerDiedError(self.process.exitcode)
+        return result, is_exception
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+@dataclass
+class WorkerPool:
+    """
+    A pool of long-lived worker processes, for running tasks in isolation without paying the cost
+    of starting a new process (and importing heavy packages) for each task.
+
+    Each task runs in its own worker. A worker is killed if its task does not finish within the timeout.
+    A worker cannot allocate more than `max_memory_mb` (a task that allocates more gets a MemoryError).
+    Workers are recycled after `max_tasks_per_worker` tasks, after `max_lifetime_sec`, when their peak memory
+    exceeds `max_rss_mb`, or when a task leaves them contaminated (raised, or left threads/processes behind).
+    Workers are started with the `start_method` of multiprocessing ('forkserver' by default, or 'spawn' where it
+    is not available), rather than forked from our process, which can be multi-threaded.
+    A fresh worker is started in the background whenever there is no idle worker, so that the next task
+    finds a pre-warmed worker.
+
+    Tasks (func, args and kwargs) and results are transferred over a pipe, so they must be picklable.
+    """
+    preload_modules: Tuple[str, ...] = ()
+    max_idle_workers: int = 1
+    max_tasks_per_worker: Optional[int] = 20
+    max_lifetime_sec: Optional[float] = 60 * 60
+    max_rss_mb: Optional[float] = 4000
+    max_memory_mb: Optional[float] = 8000
+    start_method: str = 'forkserver'
+
+    _idle_workers: List[_Worker] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self):
+        context = self._get_multiprocessing_context()
+        if context.get_start_method() == 'forkserver':
+            # Workers are forked from the (single-threaded) forkserver process. We import the preload modules
+            # there, so that the workers start with these modules already imported (takes effect only for pools
+            # created before the forkserver is started, like the pools created on import):
+            _FORKSERVER_PRELOAD_MODULES.extend(m for m in self.preload_modules if m not in _FORKSERVER_PRELOAD_MODULES)
+            context.set_forkserver_preload(_FORKSERVER_PRELOAD_MODULES)
+
+    def _get_multiprocessing_context(self) -> multiprocessing.context.BaseContext:
+        if self.start_method in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context(self.start_method)
+        return multiprocessing.get_context('spawn')
+
+    def _create_worker(self) -> _Worker:
+        return _Worker(self._get_multiprocessing_context(), self.preload_modules, self.max_memory_mb)
+
+    def _is_worker_reusable(self, worker: _Worker) -> bool:
+        return worker.is_alive() and not worker.is_contaminated \
+            and (self.max_tasks_per_worker is None or worker.num_tasks < self.max_tasks_per_worker) \
+            and (self.max_lifetime_sec is None or time.time() - worker.start_time < self.max_lifetime_sec) \
+            and (self.max_rss_mb is None or worker.max_rss_mb is None or worker.max_rss_mb < self.max_rss_mb)
+
+    def _acquire_worker(self) -> _Worker:
+        with self._lock:
+            while self._idle_workers:
+                worker = self._idle_workers.pop(0)
+                if self._is_worker_reusable(worker):
+                    return worker
+                worker.stop()
+        return self._create_worker()
+
+    def _release_worker(self, worker: _Worker):
+        with self._lock:
+            if self._is_worker_reusable(worker) and len(self._idle_workers) < self.max_idle_workers:
+                self._idle_workers.append(worker)
+            else:
+                worker.stop()
+
+    def prewarm(self):
+        """
+        Start an idle worker, if there is none.
+        """
+        with self._lock:
+            if not self._idle_workers and self.max_idle_workers > 0:
+                self._idle_workers.append(self._create_worker())
+
+    def run(self, func: Callable, args: tuple = (), kwargs: dict = None, timeout_sec: Optional[float] = None
+            ) -> Tuple[Any, bool]:
+        """
+        Run `func(*args, **kwargs)` in a worker process. Return (result, is_exception).
+        Raise TaskTimeoutError if the task did not finish within `timeout_sec` (the worker is killed).
+        Raise WorkerDiedError if the worker died while running the task.
+        """
+        worker = self._acquire_worker()
+        try:
+            result, is_exception = worker.run(func, args, kwargs or {}, timeout_sec)
+        except BaseException:  # timeout, worker died, or the task could not be pickled
+            worker.kill()
+            raise
+        else:
+            self._release_worker(worker)
+        finally:
+            self.prewarm()
+        return result, is_exception
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self._idle_workers:
+                worker.stop()
+            self._idle_workers = []
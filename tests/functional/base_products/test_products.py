@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Set
+
+import pandas as pd
+
+from data_to_paper.base_products import Products, NameDescriptionStageGenerator
+from data_to_paper.conversation.stage import Stage
+
+
+class ExampleStage(Stage):
+    WRITING = ("Writing", False)
+
+
+@dataclass
+class Section:
+    content: str
+
+
+def render_items(products: 'ExampleProducts') -> str:
+    return ', '.join(products.items)
+
+
+@dataclass
+class ExampleProducts(Products):
+    title: Optional[str] = None
+    sections: Dict[str, Section] = field(default_factory=dict)
+    items: List[str] = field(default_factory=list)
+    nested: dict = field(default_factory=dict)
+    tags: Set[str] = field(default_factory=set)
+    df: Optional[pd.DataFrame] = None
+
+    def get_title_in_caps(self):
+        return self.title.upper()
+
+    def _get_generators(self) -> Dict[str, NameDescriptionStageGenerator]:
+        return {
+            **super()._get_generators(),
+            'title': NameDescriptionStageGenerator(
+                'Title', '{}', ExampleStage.WRITING,
+                lambda: self.title,
+            ),
+            'title_in_caps': NameDescriptionStageGenerator(
+                'Title in caps', '{}', ExampleStage.WRITING,
+                lambda: self.get_title_in_caps(),
+            ),
+            'sections:{}': NameDescriptionStageGenerator(
+                '{name} Section', '{content}', ExampleStage.WRITING,
+                lambda name: {'name': name, 'content': self.sections[name].content},
+            ),
+            'sections:introduction': NameDescriptionStageGenerator(
+                'Intro', '{}', ExampleStage.WRITING,
+                lambda: self.sections['introduction'].content,
+            ),
+            'items': NameDescriptionStageGenerator(
+                'Items', '{}', ExampleStage.WRITING,
+                lambda: render_items(self),
+            ),
+            'nested': NameDescriptionStageGenerator(
+                'Nested', '{}', ExampleStage.WRITING,
+                lambda: str(self.nested),
+            ),
+            'tags': NameDescriptionStageGenerator(
+                'Tags', '{}', ExampleStage.WRITING,
+                lambda: str(sorted(self.tags)),
+            ),
+            'df': NameDescriptionStageGenerator(
+                'Data', '{}', ExampleStage.WRITING,
+                lambda: self.df.to_string(),
+            ),
+        }
+
+
+def test_products_route_fields_by_first_matching_pattern():
+    products = ExampleProducts(sections={'introduction': Section('intro text'), 'methods': Section('methods text')})
+    assert products.get_name('sections:methods') == 'methods Section'
+    assert products.get_name('sections:introduction') == 'introduction Section'  # the wildcard pattern is first
+    assert not products.is_product_available('sections:results')
+    assert not products.is_product_available('unknown:field')
+
+
+def test_products_render_cache_hits_and_misses():
+    products = ExampleProducts(title='my title')
+    assert products.get_description('title') == 'my title'
+    assert products.get_name('title') == 'Title'
+    assert (products.render_cache_hits, products.render_cache_misses) == (1, 1)
+
+
+def test_products_render_cache_is_invalidated_when_product_is_replaced():
+    products = ExampleProducts(title='my title', sections={'methods': Section('methods text')})
+    assert products.get_description('title') == 'my title'
+    assert products.get_description('title_in_caps') == 'MY TITLE'
+    assert products.get_description('sections:methods') == 'methods text'
+    products.title = 'new title'
+    assert products.get_description('title') == 'new title'
+    assert products.get_description('title_in_caps') == 'NEW TITLE'
+    products.sections['methods'] = Section('new methods text')
+    assert products.get_description('sections:methods') == 'new methods text'
+    products.sections['methods'].content = 'changed methods text'
+    assert products.get_description('sections:methods') == 'changed methods text'
+
+
+def test_products_render_cache_depends_only_on_used_products():
+    products = ExampleProducts(title='my title', sections={'methods': Section('methods text')})
+    products.get_description('sections:methods')
+    products.title = 'new title'
+    products.get_description('sections:methods')
+    assert (products.render_cache_hits, products.render_cache_misses) == (1, 1)
+
+
+def test_products_render_cache_depends_on_all_products_when_products_are_passed_to_a_function():
+    products = ExampleProducts(items=['x'])
+    assert products.get_description('items') == 'x'
+    products.items = ['y']
+    assert products.get_description('items') == 'y'
+    products.items.append('z')
+    assert products.get_description('items') == 'y, z'
+
+
+def test_products_render_cache_is_invalidated_by_deep_and_in_place_changes():
+    products = ExampleProducts(nested={'a': {'b': {'c': {'d': [1]}}}}, tags={'t1'})
+    assert products.get_description('nested') == "{'a': {'b': {'c': {'d': [1]}}}}"
+    products.nested['a']['b']['c']['d'].append(2)
+    assert products.get_description('nested') == "{'a': {'b': {'c': {'d': [1, 2]}}}}"
+    assert products.get_description('tags') == "['t1']"
+    products.tags.add('t2')
+    assert products.get_description('tags') == "['t1', 't2']"
+
+
+def test_products_render_cache_is_not_used_for_untrackable_values():
+    products = ExampleProducts(df=pd.DataFrame({'a': [1]}))
+    products.get_description('df')
+    products.df.loc[0, 'a'] = 2
+    assert products.get_description('df') == pd.DataFrame({'a': [2]}).to_string()
+    assert products.render_cache_hits == 0
@@ -5,6 +5,7 @@ from typing import List
 import pytest
 
 from data_to_paper.base_steps import LatexReviewBackgroundProductsConverser
+from data_to_paper.base_steps.result_converser import SelfResponseError
 from data_to_paper.servers.llm_call import OPENAI_SERVER_CALLER
 from data_to_paper.text import wrap_as_block
 
@@ -186,3 +187,23 @@ def test_usage_of_un_allowed_commands():
             record_more_if_needed=False):
 
         assert requester.run_and_get_valid_result() == [correct_introduction]
+
+
+@dataclass
+class FailingChecksLatexConverser(TestLatexReviewBackgroundProductsConverser):
+    def _check_and_refine_section(self, section: str, section_name: str) -> str:
+        if section_name == 'abstract':
+            raise SelfResponseError('refine abstract', title='# Refine abstract')
+        return section
+
+    def _check_refined_section(self, section: str, section_name: str):
+        raise SelfResponseError(f'check {section_name}', title=f'# Check {section_name}')
+
+
+def test_request_latex_merges_errors_section_by_section():
+    requester = FailingChecksLatexConverser(section_names=['title', 'introduction', 'abstract'])
+    with pytest.raises(SelfResponseError) as e:
+        requester._check_extracted_text_and_update_valid_result([correct_title, 'intro', correct_abstract])
+    assert e.value.title == '# Check title'
+    assert e.value.error_message == \
+        'check title\n\n# Check introduction\ncheck introduction\n\n# Refine abstract\nrefine abstract'
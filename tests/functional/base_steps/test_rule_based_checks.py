@@ -0,0 +1,121 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from data_to_paper.base_steps import result_converser
+from data_to_paper.base_steps.result_converser import ResultConverser, RuleBasedCheck, Rewind, BumpModel, \
+    SelfResponseError
+from data_to_paper.env import MAX_CONCURRENT_RULE_BASED_CHECKS
+
+from .utils import TestProductsReviewGPT
+
+
+@dataclass
+class TestResultConverser(TestProductsReviewGPT, ResultConverser):
+    pass
+
+
+@pytest.fixture()
+def converser():
+    return TestResultConverser()
+
+
+def test_rule_based_checks_pass_results_to_dependent_checks(converser):
+    names_to_results, response_error = converser._run_rule_based_checks([
+        RuleBasedCheck('refine', lambda: 'refined'),
+        RuleBasedCheck('check', lambda refined: refined.upper(), depends_on=('refine', )),
+        RuleBasedCheck('compile', lambda refined: len(refined), depends_on=('refine', ), in_background=True),
+    ])
+    assert response_error is None
+    assert names_to_results == {'refine': 'refined', 'check': 'REFINED', 'compile': 7}
+
+
+def test_rule_based_checks_errors_are_merged_in_order(converser):
+    def raise_error(title, rewind=None, bump_model=None):
+        raise SelfResponseError(f'{title} message', title=title, rewind=rewind, bump_model=bump_model)
+
+    def slow_error():
+        time.sleep(0.1)
+        raise_error('# Compile', rewind=Rewind.RESTART, bump_model=BumpModel.HIGHER_CONTEXT)
+
+    names_to_results, response_error = converser._run_rule_based_checks([
+        RuleBasedCheck('compile', slow_error, in_background=True),
+        RuleBasedCheck('refine', lambda: raise_error('# Refine')),
+        RuleBasedCheck('check', lambda refined: 'not reached', depends_on=('refine', )),
+        RuleBasedCheck('other', lambda: raise_error('# Other', rewind=Rewind.ACCUMULATE)),
+    ])
+    assert names_to_results == {}
+    assert response_error.title == '# Compile'
+    assert response_error.error_message == '# Compile message\n\n# Refine\n# Refine message\n\n# Other\n# Other message'
+    assert (response_error.rewind, response_error.bump_model) == (Rewind.RESTART, BumpModel.HIGHER_CONTEXT)
+
+
+def test_rule_based_checks_run_in_background_concurrently(converser):
+    compile_started = threading.Event()
+
+    def compile_():
+        compile_started.set()
+        time.sleep(0.1)
+        return threading.get_ident()
+
+    names_to_results, _ = converser._run_rule_based_checks([
+        RuleBasedCheck('compile', compile_, in_background=True),
+        RuleBasedCheck('check', lambda: compile_started.wait(1)),
+    ])
+    assert names_to_results['check'] is True
+    assert names_to_results['compile'] != threading.get_ident()
+
+    with MAX_CONCURRENT_RULE_BASED_CHECKS.temporary_set(0):
+        names_to_results, _ = converser._run_rule_based_checks([
+            RuleBasedCheck('compile', compile_, in_background=True),
+        ])
+    assert names_to_results['compile'] == threading.get_ident()
+
+
+def test_rule_based_checks_background_check_overlaps_checks_that_follow_its_dependencies(converser):
+    # the layout of the latex sections checks: refine each section, then check each refined section,
+    # while the compilation (depending on all the refined sections) runs in the background
+    compile_started = threading.Event()
+
+    def compile_(*sections):
+        compile_started.set()
+        time.sleep(0.1)
+        return ' '.join(sections)
+
+    checks = [RuleBasedCheck(f'refine:{i}', lambda i=i: f'section{i}') for i in range(2)]
+    checks += [RuleBasedCheck(f'check:{i}', lambda section: compile_started.wait(1), depends_on=(f'refine:{i}', ))
+               for i in range(2)]
+    checks.append(RuleBasedCheck('compile', compile_, depends_on=('refine:0', 'refine:1'), in_background=True))
+    names_to_results, response_error = converser._run_rule_based_checks(checks)
+    assert response_error is None
+    assert names_to_results == {'refine:0': 'section0', 'refine:1': 'section1', 'check:0': True, 'check:1': True,
+                                'compile': 'section0 section1'}
+
+
+def test_rule_based_checks_errors_are_merged_in_given_order(converser):
+    def raise_error(title):
+        raise SelfResponseError(f'{title} message', title=title)
+
+    _, response_error = converser._run_rule_based_checks([
+        RuleBasedCheck('refine:0', lambda: 'section0'),
+        RuleBasedCheck('refine:1', lambda: raise_error('# Refine 1')),
+        RuleBasedCheck('check:0', lambda section: raise_error('# Check 0'), depends_on=('refine:0', )),
+    ], errors_order=['refine:0', 'check:0', 'refine:1'])
+    assert response_error.title == '# Check 0'
+    assert response_error.error_message == '# Check 0 message\n\n# Refine 1\n# Refine 1 message'
+
+
+def test_rule_based_checks_without_concurrency_do_not_create_threads(converser, monkeypatch):
+    def no_executor(*args, **kwargs):
+        raise AssertionError('ThreadPoolExecutor should not be created')
+
+    monkeypatch.setattr(result_converser, 'ThreadPoolExecutor', no_executor)
+    with MAX_CONCURRENT_RULE_BASED_CHECKS.temporary_set(0):
+        names_to_results, response_error = converser._run_rule_based_checks([
+            RuleBasedCheck('refine', lambda: 'refined'),
+            RuleBasedCheck('compile', lambda refined: len(refined), depends_on=('refine', ), in_background=True),
+        ])
+    assert response_error is None
+    assert names_to_results == {'refine': 'refined', 'compile': 7}
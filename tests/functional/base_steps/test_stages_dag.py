@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from data_to_paper.base_steps import BaseStepsRunner, StageProducts
+from data_to_paper.base_steps.stages_dag import get_stages_dag, get_stages_that_can_run_concurrently, \
+    are_product_names_related
+from data_to_paper.conversation.actions_and_conversations import Action
+from data_to_paper.conversation.stage import Stage
+from data_to_paper.env import MAX_CONCURRENT_STAGES
+from data_to_paper.servers.base_server import OrderedKeyToListServerCaller
+
+
+class ExampleStage(Stage):
+    DATA = ("Data", False)
+    RESULTS = ("Results", True)
+    LITERATURE = ("Literature", True)
+    TITLE = ("Title", True)
+    COMPILE = ("Compile", False)
+
+
+STAGES_TO_PRODUCTS = {
+    ExampleStage.RESULTS: StageProducts(reads=('data', ), writes=('sections:results', )),
+    ExampleStage.LITERATURE: StageProducts(reads=('data', ), writes=('literature:writing', )),
+    ExampleStage.TITLE: StageProducts(reads=('sections:results', 'literature'), writes=('sections:title', )),
+}
+
+
+class StageKeyServerCaller(OrderedKeyToListServerCaller):
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+
+    @classmethod
+    def _get_server_response(cls, response: str = 'response'):
+        return response
+
+    def _generate_key(self, args, kwargs):
+        return self.runner._get_current_stage().value
+
+
+def test_are_product_names_related():
+    assert are_product_names_related('literature', 'literature:writing')
+    assert are_product_names_related('literature:writing', 'literature')
+    assert not are_product_names_related('literature', 'literature_search')
+
+
+def test_get_stages_dag():
+    dag = get_stages_dag(ExampleStage, STAGES_TO_PRODUCTS)
+    assert dag[ExampleStage.RESULTS] == {ExampleStage.DATA}
+    assert dag[ExampleStage.LITERATURE] == {ExampleStage.DATA}
+    assert dag[ExampleStage.TITLE] == {ExampleStage.DATA, ExampleStage.RESULTS, ExampleStage.LITERATURE}
+    assert dag[ExampleStage.COMPILE] == \
+        {ExampleStage.DATA, ExampleStage.RESULTS, ExampleStage.LITERATURE, ExampleStage.TITLE}
+
+
+def test_get_stages_that_can_run_concurrently():
+    assert get_stages_that_can_run_concurrently(ExampleStage.RESULTS, STAGES_TO_PRODUCTS) == \
+        [ExampleStage.RESULTS, ExampleStage.LITERATURE, ExampleStage.TITLE]
+    assert get_stages_that_can_run_concurrently(ExampleStage.TITLE, STAGES_TO_PRODUCTS) == [ExampleStage.TITLE]
+
+
+class ConcurrencyTestRunner(BaseStepsRunner):
+    def __post_init__(self):
+        super().__post_init__()
+        self.stages_to_funcs = {stage: self._run_test_stage for stage in self.stages}
+        self.server_caller = StageKeyServerCaller(self)
+        self.literature_started = threading.Event()
+        self.was_literature_concurrent = []
+
+    def _run_test_stage(self):
+        stage = self._get_current_stage()
+        if stage is ExampleStage.RESULTS:
+            # when running concurrently, the literature stage starts before the results stage is completed:
+            self.was_literature_concurrent.append(self.literature_started.wait(timeout=1))
+        if stage is ExampleStage.LITERATURE:
+            self.literature_started.set()
+        self.actions_and_conversations.conversations.get_or_create_conversation(stage.value)
+        self.actions_and_conversations.actions.append(Action())
+        self.server_caller.get_server_response(f'response of {stage.value}')
+
+
+@pytest.mark.parametrize('max_concurrent_stages', [1, 3])
+def test_run_stages_concurrently(tmpdir, max_concurrent_stages):
+    runner = ConcurrencyTestRunner(stages=ExampleStage, output_directory=tmpdir, stages_to_products=STAGES_TO_PRODUCTS)
+    with MAX_CONCURRENT_STAGES.temporary_set(max_concurrent_stages), runner.server_caller.mock() as server:
+        runner._run_all_steps()
+    assert runner.was_literature_concurrent == [max_concurrent_stages > 1]
+    assert list(runner.actions_and_conversations.conversations) == [stage.value for stage in ExampleStage]
+    assert len(runner.actions_and_conversations.actions) == len(ExampleStage)
+    assert runner.stages_to_conversations_lens == {stage: index for index, stage in enumerate(ExampleStage)}
+    assert server.new_records == {stage.value: [f'response of {stage.value}'] for stage in ExampleStage}
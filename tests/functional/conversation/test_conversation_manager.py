@@ -3,7 +3,9 @@ from pytest import fixture
 
 from data_to_paper.conversation.conversation_actions import ReplaceLastMessage
 from data_to_paper.conversation.conversation_manager import ConversationManager
-from data_to_paper.servers.llm_call import OPENAI_SERVER_CALLER
+from data_to_paper.servers.llm_call import OPENAI_SERVER_CALLER, TooManyTokensInMessageError, \
+    count_number_of_tokens_in_message
+from data_to_paper.servers.model_engine import ModelEngine
 from data_to_paper.conversation.message_designation import RangeMessageDesignation
 
 
@@ -125,3 +127,16 @@ def test_conversation_manager_adds_python_header(manager):
     ]):
         content = manager.get_and_append_assistant_message(is_code=True).content
     assert content == 'the code is:\n```python\nprint("hello world")\n```\n\nthe output is:\n```\nhello world\n```\n'
+
+
+def test_conversation_manager_number_of_messages_to_remove_from_context(manager, openai_exception):
+    for i in range(10):
+        manager.append_user_message(f'message {i} ' * 100)
+    indices_and_messages = manager.conversation.get_chosen_indices_and_messages()
+    model_engine = ModelEngine.GPT35_TURBO
+    tokens = count_number_of_tokens_in_message([message for _, message in indices_and_messages], model_engine)
+    tokens_per_message = indices_and_messages[1][1].get_number_of_tokens(model_engine)
+    excess_tokens = 2 * tokens_per_message + 10
+    exception = TooManyTokensInMessageError(tokens, model_engine.max_tokens - tokens + excess_tokens, model_engine)
+    assert manager._get_number_of_messages_to_remove_from_context(indices_and_messages, exception) == 3
+    assert manager._get_number_of_messages_to_remove_from_context(indices_and_messages, openai_exception) == 1
@@ -3,6 +3,8 @@ import pytest
 from pytest import fixture
 
 from data_to_paper import Role, Message
+from data_to_paper.servers.llm_call import count_number_of_tokens_in_message
+from data_to_paper.servers.model_engine import ModelEngine
 from data_to_paper.text.highlighted_text import python_to_highlighted_text
 
 
@@ -47,3 +49,17 @@ def test_message_repr_with_code_and_non_code_blocks():
     pretty = message.pretty_content(text_color=colorama.Fore.CYAN, width=100)
     assert colorama.Fore.LIGHTCYAN_EX in pretty
     assert python_to_highlighted_text("print('hello')", color=colorama.Fore.CYAN)[:-1] in pretty
+
+
+def test_message_number_of_tokens_is_cached_by_content(message_with_tag):
+    assert message_with_tag.get_number_of_tokens(ModelEngine.GPT4) == \
+        count_number_of_tokens_in_message(message_with_tag.content, ModelEngine.GPT4)
+    message_with_tag.content = 'Hi there! How are you?'
+    assert message_with_tag.get_number_of_tokens(ModelEngine.GPT4) == \
+        count_number_of_tokens_in_message('Hi there! How are you?', ModelEngine.GPT4)
+
+
+def test_number_of_tokens_in_messages_is_sum_of_messages(message_with_tag, message_without_tag):
+    messages = [message_with_tag, message_without_tag]
+    assert count_number_of_tokens_in_message(messages, ModelEngine.GPT4) == \
+        sum(message.get_number_of_tokens(ModelEngine.GPT4) for message in messages) + 1
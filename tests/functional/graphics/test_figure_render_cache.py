@@ -0,0 +1,59 @@
+import pytest
+
+import data_to_paper
+from data_to_paper.env import FIGURE_RENDER_CACHE_FOLDER
+from data_to_paper.llm_coding_utils.consts import FIG_DPI
+from data_to_paper.llm_coding_utils.df_to_figure import run_create_fig_for_df_to_figure_and_get_axis_parameters, \
+    FIGURE_RENDERING_WORKER_POOL
+from data_to_paper.llm_coding_utils import figure_render_cache
+from data_to_paper.llm_coding_utils.figure_render_cache import get_figure_render_key
+
+
+@pytest.fixture()
+def cache_folder(tmpdir):
+    with FIGURE_RENDER_CACHE_FOLDER.temporary_set(tmpdir / 'cache'):
+        yield tmpdir / 'cache'
+
+
+def test_figure_render_key_depends_on_data_kwargs_and_dpi(test_data):
+    key = get_figure_render_key(test_data, 400, y='y')
+    assert key == get_figure_render_key(test_data.copy(), 400, y='y')
+    assert key != get_figure_render_key(test_data, 400, y='y', logy=True)
+    assert key != get_figure_render_key(test_data, 200, y='y')
+    assert key != get_figure_render_key(test_data * 2, 400, y='y')
+
+
+def test_figure_render_key_depends_on_rendering_code(test_data, monkeypatch):
+    key = get_figure_render_key(test_data, 400, y='y')
+    monkeypatch.setattr(figure_render_cache, 'get_rendering_code_digest', lambda: 'changed rendering code')
+    assert key != get_figure_render_key(test_data, 400, y='y')
+
+
+def test_figure_render_key_depends_on_data_to_paper_version(test_data, monkeypatch):
+    key = get_figure_render_key(test_data, 400, y='y')
+    monkeypatch.setattr(data_to_paper, '__version__', '0.0.0')
+    assert key != get_figure_render_key(test_data, 400, y='y')
+
+
+def test_unchanged_figure_is_retrieved_from_cache(test_data, cache_folder, tmpdir, monkeypatch):
+    with FIG_DPI.temporary_set(50):
+        axis_parameters, exception = run_create_fig_for_df_to_figure_and_get_axis_parameters(
+            test_data, tmpdir / 'fig1.png', y='y')
+        assert exception is None
+
+        def fail_if_rendered(*args, **kwargs):
+            raise AssertionError('The figure should have been retrieved from the cache')
+        monkeypatch.setattr(FIGURE_RENDERING_WORKER_POOL, 'run', fail_if_rendered)
+        cached_axis_parameters, exception = run_create_fig_for_df_to_figure_and_get_axis_parameters(
+            test_data, tmpdir / 'fig2.png', y='y')
+        assert exception is None
+    assert cached_axis_parameters.ylim == axis_parameters.ylim
+    assert (tmpdir / 'fig1.png').read_binary() == (tmpdir / 'fig2.png').read_binary()
+
+
+def test_failed_figure_rendering_returns_exception(test_data, cache_folder, tmpdir):
+    axis_parameters, exception = run_create_fig_for_df_to_figure_and_get_axis_parameters(
+        test_data, tmpdir / 'fig.png', y='non_existing_column')
+    assert axis_parameters is None
+    assert exception is not None
+    assert not cache_folder.exists() or not cache_folder.listdir()
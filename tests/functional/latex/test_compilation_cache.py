@@ -0,0 +1,73 @@
+import os
+import subprocess
+
+import pytest
+
+from data_to_paper.env import LATEX_COMPILATION_CACHE_FOLDER
+from data_to_paper.latex.compilation_cache import LatexCompilationCache, get_latex_compilation_key, \
+    LATEX_COMPILATION_CACHE
+from data_to_paper.latex.exceptions import LatexCompilationError
+from data_to_paper.latex import latex_to_pdf
+from data_to_paper.latex.latex_to_pdf import save_latex_and_compile_to_pdf
+
+
+@pytest.fixture()
+def cache(tmpdir):
+    return LatexCompilationCache(folder=tmpdir / 'cache', max_size_mb=1)
+
+
+def test_latex_compilation_key_depends_on_content_references_figures_and_params(tmpdir):
+    key = get_latex_compilation_key('latex', ['bib1', 'bib2'], format_cite=True)
+    assert key == get_latex_compilation_key('latex', ['bib2', 'bib1'], format_cite=True)
+    assert key != get_latex_compilation_key('latex2', ['bib1', 'bib2'], format_cite=True)
+    assert key != get_latex_compilation_key('latex', ['bib1'], format_cite=True)
+    assert key != get_latex_compilation_key('latex', ['bib1', 'bib2'], format_cite=False)
+
+    (tmpdir / 'fig.png').write_binary(b'figure')
+    key_with_figure = get_latex_compilation_key('latex', figures_folder=tmpdir)
+    (tmpdir / 'fig.png').write_binary(b'changed figure')
+    assert key_with_figure != get_latex_compilation_key('latex', figures_folder=tmpdir)
+
+
+def test_latex_compilation_cache_get_set(cache, tmpdir):
+    assert cache.get('key') is None
+    pdf_path = str(tmpdir / 'document.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(b'pdf content')
+    cache.set('key', 'pdflatex output', 12.5, pdf_filepath=pdf_path)
+    restored_pdf_path = str(tmpdir / 'restored.pdf')
+    assert cache.get('key', pdf_filepath=restored_pdf_path) == ('pdflatex output', 12.5)
+    with open(restored_pdf_path, 'rb') as f:
+        assert f.read() == b'pdf content'
+
+
+def test_latex_compilation_cache_evicts_least_recently_used(cache):
+    output = 'x' * 400_000
+    cache.set('key1', output, None)
+    os.utime(cache.folder / 'key1', (0, 0))
+    cache.set('key2', output, None)
+    os.utime(cache.folder / 'key2', (1, 1))
+    assert cache.get('key1') is not None  # key1 is now the most recently used
+    cache.set('key3', output, None)
+    assert cache.get('key1') is not None
+    assert cache.get('key2') is None
+    assert cache.get('key3') is not None
+
+
+def test_save_latex_and_compile_to_pdf_uses_cached_compilation(tmpdir):
+    key = get_latex_compilation_key('valid latex', [], None, file_stem='test', format_cite=False, is_pdf_needed=False)
+    with LATEX_COMPILATION_CACHE_FOLDER.temporary_set(tmpdir):
+        LATEX_COMPILATION_CACHE.set(key, 'cached output', 3.)
+        assert save_latex_and_compile_to_pdf('valid latex', file_stem='test', format_cite=False) == \
+            ('cached output', 3.)
+
+
+def test_save_latex_and_compile_to_pdf_does_not_cache_failed_compilation(tmpdir, monkeypatch):
+    def run(params, **kwargs):
+        raise subprocess.CalledProcessError(1, params, output=b"! LaTeX Error: File `missing.sty' not found.")
+
+    monkeypatch.setattr(latex_to_pdf.subprocess, 'run', run)
+    with LATEX_COMPILATION_CACHE_FOLDER.temporary_set(tmpdir):
+        with pytest.raises(LatexCompilationError):
+            save_latex_and_compile_to_pdf('latex using missing package', file_stem='test', format_cite=False)
+        assert not os.listdir(tmpdir)
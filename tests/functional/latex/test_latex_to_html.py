@@ -1,4 +1,10 @@
-from data_to_paper.latex.latex_to_html import convert_latex_to_html
+import subprocess
+
+import pytest
+
+from data_to_paper.env import LATEX_TO_HTML_CACHE_FOLDER, LATEX_TO_HTML_CACHE_MAX_SIZE_MB
+from data_to_paper.latex import latex_to_html
+from data_to_paper.latex.latex_to_html import convert_latex_to_html, convert_latex_sections_to_html
 
 
 def test_convert_latex_to_html():
@@ -9,3 +15,58 @@ Hello, world!
     html = convert_latex_to_html(latex)
     assert '>Hello</h2>' in html
     assert '>Hello, world!</p>' in html
+
+
+@pytest.fixture()
+def pandoc_calls(tmpdir, monkeypatch):
+    """
+    Replace pandoc with a fake converter that wraps each paragraph in <p>, and record its invocations.
+    """
+    calls = []
+
+    def fake_run_pandoc(processed_latex, command):
+        calls.append(processed_latex)
+        return ''.join(f'<p>{paragraph.strip()}</p>\n' for paragraph in processed_latex.split('\n\n'))
+
+    monkeypatch.setattr(latex_to_html, 'get_pandoc_version', lambda: 'pandoc 0.0')
+    monkeypatch.setattr(latex_to_html, '_get_conversion_params', lambda: ('pandoc 0.0', '$body$'))
+    monkeypatch.setattr(latex_to_html, '_run_pandoc', fake_run_pandoc)
+    with LATEX_TO_HTML_CACHE_FOLDER.temporary_set(tmpdir / 'cache'):
+        yield calls
+
+
+def test_convert_latex_to_html_is_cached(pandoc_calls):
+    html = convert_latex_to_html('Hello, world!')
+    assert convert_latex_to_html('Hello, world!') == html
+    assert len(pandoc_calls) == 1
+
+
+def test_convert_latex_sections_to_html_converts_each_section_once(pandoc_calls):
+    assert convert_latex_sections_to_html(['first', 'second', 'first']) == \
+        ['<p>first</p>\n', '<p>second</p>\n', '<p>first</p>\n']
+    assert pandoc_calls == ['first', 'second']
+    assert convert_latex_sections_to_html(['second', 'third']) == ['<p>second</p>\n', '<p>third</p>\n']
+    assert pandoc_calls == ['first', 'second', 'third']
+
+
+def test_get_pandoc_version_does_not_cache_a_failed_probe(monkeypatch):
+    monkeypatch.setattr(latex_to_html, '_pandoc_version', None)
+
+    def run_without_pandoc(*args, **kwargs):
+        raise FileNotFoundError()
+    monkeypatch.setattr(latex_to_html.subprocess, 'run', run_without_pandoc)
+    assert latex_to_html.get_pandoc_version() is None
+    monkeypatch.setattr(latex_to_html.subprocess, 'run',
+                        lambda *args, **kwargs: subprocess.CompletedProcess(args, 0, stdout='pandoc 9.9\nmore'))
+    assert latex_to_html.get_pandoc_version() == 'pandoc 9.9'
+
+
+@pytest.mark.skipif(latex_to_html.get_pandoc_version() is None, reason='pandoc is not installed')
+def test_convert_latex_sections_to_html_is_identical_to_converting_each_section():
+    latexes = [
+        '\\section{Results}\nWe found \\cite{ref1}.\n',
+        '\\section{Results}\nWe also found \\cite{ref1}.\n',
+        '\\title{A title}\n\\section{Results}\nText.\n',
+    ]
+    with LATEX_TO_HTML_CACHE_MAX_SIZE_MB.temporary_set(0):
+        assert convert_latex_sections_to_html(latexes) == [convert_latex_to_html(latex) for latex in latexes]
@@ -1,4 +1,6 @@
 import os
+import subprocess
+from pathlib import Path
 
 import pytest
 from pytest import fixture
@@ -6,7 +8,9 @@ from pytest import fixture
 from data_to_paper.latex.clean_latex import process_latex_text_and_math
 from data_to_paper.latex.exceptions import LatexCompilationError
 from data_to_paper.latex.latex_doc import LatexDocument
-from data_to_paper.latex.latex_to_pdf import evaluate_latex_num_command, save_latex_and_compile_to_pdf
+from data_to_paper.latex import latex_to_pdf
+from data_to_paper.latex.latex_to_pdf import evaluate_latex_num_command, save_latex_and_compile_to_pdf, \
+    get_latex_format_for_preamble, compile_latex_to_get_output
 from data_to_paper.servers.crossref import CrossrefCitation
 
 
@@ -179,3 +183,29 @@ def test_evaluate_latex_expression(latex, expected):
     assert latex == expected[0]
     assert num_dict == expected[1]
     LatexDocument().compile_document(latex, file_stem='test')
+
+
+def test_latex_format_of_preamble_is_dumped_once_and_used(monkeypatch, tmpdir):
+    pdflatex_calls = []
+
+    def run(params, cwd, **kwargs):
+        pdflatex_calls.append(params)
+        if '-ini' in params:
+            job_name = next(param for param in params if param.startswith('-jobname=')).split('=')[1]
+            with open(os.path.join(cwd, job_name + '.tex'), encoding='utf-8') as f:
+                assert f.read() == 'my preamble\n\\dump\n'
+            with open(os.path.join(cwd, job_name + '.fmt'), 'w') as f:
+                f.write('format')
+        else:
+            assert any(param.startswith('-fmt=') for param in params)
+            with open(os.path.join(cwd, 'measure.tex'), encoding='utf-8') as f:
+                assert f.read() == 'my body'  # the preamble is loaded from the format
+        return subprocess.CompletedProcess(params, 0, stdout=b'pdflatex output')
+
+    monkeypatch.setattr(latex_to_pdf, 'LATEX_FORMATS_FOLDER', Path(tmpdir))
+    monkeypatch.setattr(latex_to_pdf.subprocess, 'run', run)
+    format_path = get_latex_format_for_preamble('my preamble')
+    assert format_path.read_text() == 'format'
+    assert get_latex_format_for_preamble('my preamble') == format_path
+    assert compile_latex_to_get_output('my preamble', 'my body') == 'pdflatex output'
+    assert len(pdflatex_calls) == 2  # the format is dumped only once
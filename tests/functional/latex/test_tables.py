@@ -1,9 +1,13 @@
 import os
+import re
+
 import pandas as pd
 import pytest
 from pytest import fixture
 
-from data_to_paper.latex.latex_doc import LatexDocument
+from data_to_paper.latex import latex_doc
+from data_to_paper.latex.exceptions import LatexCompilationError
+from data_to_paper.latex.latex_doc import LatexDocument, TABLE_WIDTHS
 from data_to_paper.llm_coding_utils.df_to_latex import df_to_latex
 from data_to_paper.research_types.hypothesis_testing.check_df_to_funcs.abbreviations import is_unknown_abbreviation
 
@@ -26,6 +30,45 @@ def test_df_to_latex(df_table):
     assert 0.1 < width < 0.2
 
 
+def test_measure_table_widths_in_one_compilation(df_table, tmpdir):
+    latex = df_to_latex(df_table, 'test', caption='test caption').replace('@@<', '').replace('>@@', '')
+    latex_transpose = df_to_latex(df_table.T, 'test', caption='test caption').replace('@@<', '').replace('>@@', '')
+    latex_document = LatexDocument()
+    widths = latex_document.measure_table_widths([latex, latex_transpose])
+    assert list(widths) == [latex, latex_transpose]
+    assert widths[latex] == pytest.approx(latex_document.compile_table(latex, output_directory=str(tmpdir)))
+
+
+def test_compile_table_returns_measured_width_without_compiling():
+    latex_document = LatexDocument()
+    TABLE_WIDTHS[(latex_document.get_preamble(), 'measured table')] = 0.5
+    assert latex_document.compile_table('measured table') == 0.5
+    assert latex_document.measure_table_widths(['measured table']) == {'measured table': 0.5}
+
+
+def test_measure_table_widths_isolates_table_that_fails_to_compile(monkeypatch):
+    num_runs = []
+
+    def compile_latex_to_get_output(preamble, body, use_format=True):
+        num_runs.append(use_format)
+        if 'bad' in body:
+            raise LatexCompilationError(latex_content=body, pdflatex_output='! Undefined control sequence.')
+        widths = re.findall(r'\\begin\{tabular\}\{c\}(\d+)', body)[::2]  # each table is in the body twice
+        return '\n'.join(f'Table width {index}: {width}.0pt' for index, width in enumerate(widths)) + \
+            '\nPage margin width: 100.0pt'
+
+    monkeypatch.setattr(latex_doc, 'compile_latex_to_get_output', compile_latex_to_get_output)
+    monkeypatch.setattr(LatexDocument, 'raise_if_pdflatex_is_not_installed', lambda self: None)
+    monkeypatch.setattr(LatexDocument, 'raise_if_packages_are_not_installed', lambda self: None)
+    tables = [f'\\begin{{table}}\n\\begin{{tabular}}{{c}}{width}\n\\end{{tabular}}\n\\end{{table}}'
+              for width in ('10', '20', 'bad', '40')]
+    widths = LatexDocument().measure_table_widths(tables)
+    assert widths == {tables[0]: 0.1, tables[1]: 0.2, tables[3]: 0.4}
+    # all tables (failed), the two halves (the second failed), its quarters (the first failed).
+    # Each failed run is retried without the precompiled format:
+    assert len(num_runs) == 8
+
+
 def test_table_with_list():
     df = pd.DataFrame({
         'a': [[1, 2.3578523523523, 3], [4, 5, 6]],
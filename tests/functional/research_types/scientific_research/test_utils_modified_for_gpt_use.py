@@ -1,8 +1,10 @@
+import numpy as np
 import pandas as pd
 from pytest import fixture
 
 from data_to_paper.research_types.hypothesis_testing.check_df_to_funcs.df_checker import DfContentChecker, \
     AnnotationDfChecker, TableDfContentChecker, FigureDfContentChecker
+from data_to_paper.research_types.hypothesis_testing.check_df_to_funcs.utils import get_non_integer_numeric_values
 from data_to_paper.run_gpt_code.overrides.pvalue import PValue
 
 
@@ -49,6 +51,19 @@ def test_check_df_of_table_for_content_issues_with_repeated_value(df):
     assert '(0, 0), (1, 1)' in issues[0].issue
 
 
+def test_check_df_of_table_for_content_issues_reports_first_repeated_value():
+    df = pd.DataFrame({'a': [0.5, 1.25, 'text', 1.25], 'b': [0.75, 0.5, 1.0, 0.75]}, index=['w', 'x', 'y', 'z'])
+    issues = TableDfContentChecker(df=df, filename='df_tag').run_checks()[0]
+    assert len(issues) == 1
+    assert 'the value 0.5 appears in the following cells:\n(0, 0), (1, 1).' in issues[0].issue
+
+
+def test_get_non_integer_numeric_values():
+    values = [0.5, 2.0, float('nan'), float('inf'), 3, 'text', PValue(0.01), -1.5]
+    assert get_non_integer_numeric_values(pd.DataFrame({'a': values}).values).tolist() == [0.5, -1.5]
+    assert get_non_integer_numeric_values(np.array([0.5, 2., np.nan, np.inf, -1.5])).tolist() == [0.5, -1.5]
+
+
 def test_check_df_of_table_for_content_issues_with_repeated_value_in_prior_table(df):
     prior_table = pd.DataFrame({'a': [1, 2, 3], 'b': [4, 5, 6]}, index=['x', 'y', 'z'])
     prior_table.iloc[0, 0] = 2 / 7
@@ -1,11 +1,14 @@
 import pytest
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from data_to_paper.run_gpt_code.code_runner_wrapper import CodeRunnerWrapper
 from data_to_paper.run_gpt_code.code_runner import CodeRunner
-from data_to_paper.run_gpt_code.exceptions import CodeUsesForbiddenFunctions, FailedRunningCode
+from data_to_paper.run_gpt_code.exceptions import CodeUsesForbiddenFunctions, FailedRunningCode, \
+    CodeProcessDiedException
 from data_to_paper.run_gpt_code.code_utils import FailedExtractingBlock
 from data_to_paper.run_gpt_code.extract_and_check_code import CodeExtractor
+from data_to_paper.text import dedent_triple_quote_str
 
 OUTPUT_FILE = "output.txt"
 
@@ -98,6 +101,75 @@ def test_runner_create_issue_on_print():
     assert 'print' in multi_context.issues[0].issue
 
 
+def test_runner_reports_line_of_exception_in_code_module():
+    _, _, _, exception = CodeRunner().run('x = 1\ny = 1 / 0\n')
+    assert exception.exception.type_name == 'ZeroDivisionError'
+    assert exception.get_lineno_line_message()[0] == [(2, 'y = 1 / 0')]
+
+
+def test_runner_in_separate_process_reports_line_of_exception_in_code_module():
+    _, _, _, exception = CodeRunnerWrapper(code='x = 1\ny = 1 / 0\n').run_code_in_separate_process()
+    assert "y = 1 / 0" in exception.get_traceback_message()
+
+
+def test_runner_scripts_do_not_share_interpreter_state(tmpdir):
+    def run_code(code):
+        return CodeRunnerWrapper(code=code,
+                                 code_runner=CodeRunner(allowed_open_write_files=('output.txt',), run_folder=tmpdir),
+                                 ).run_code_in_separate_process()
+
+    run_code('import pandas as pd\npd.set_option("display.precision", 1)\n')
+    run_code('import pandas as pd\nwith open("output.txt", "w") as f:\n'
+             '    f.write(str(pd.get_option("display.precision")))\n')
+    assert (tmpdir / 'output.txt').read() != '1'
+
+
+def test_runners_run_concurrently_in_separate_module_files(tmpdir):
+    def run_code(index):
+        run_folder = tmpdir.mkdir(f'run_{index}')
+        code = f'import time\ntime.sleep(0.5)\nwith open("output.txt", "w") as f:\n    f.write("{index}")\n'
+        code_runner = CodeRunner(allowed_open_write_files=('output.txt',), run_folder=run_folder)
+        return CodeRunnerWrapper(code=code, code_runner=code_runner).run_code_in_separate_process()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(run_code, range(2)))
+    for index, (_, created_files, _, _) in enumerate(results):
+        assert 'output.txt' in created_files
+        assert (tmpdir / f'run_{index}' / 'output.txt').read() == str(index)
+
+
+def test_runner_resolves_relative_paths_against_run_folder(tmpdir):
+    cwd = os.getcwd()
+    (tmpdir / 'data.csv').write('1,2\n3,4\n')
+    code = dedent_triple_quote_str("""
+        import glob
+        import numpy as np
+        data = np.loadtxt('data.csv', delimiter=',')
+        with open('output.txt', 'w') as f:
+            f.write(f'{data.sum()} {glob.glob("*.csv")}')
+        """)
+    _, created_files, _, exception = CodeRunner(allowed_open_read_files='all', allowed_open_write_files=('output.txt',),
+                                                output_file_requirements=None, run_folder=tmpdir).run(code)
+    assert exception is None
+    assert list(created_files) == ['output.txt']
+    assert (tmpdir / 'output.txt').read() == "10.0 ['data.csv']"
+    assert os.getcwd() == cwd
+
+
+def test_runner_code_can_plot_with_pyplot(tmpdir):
+    code = dedent_triple_quote_str("""
+        import matplotlib.pyplot as plt
+        plt.plot([1, 2])
+        plt.savefig('fig.png')
+        """)
+    _, created_files, _, exception = CodeRunnerWrapper(
+        code=code,
+        code_runner=CodeRunner(allowed_open_write_files=('fig.png',), output_file_requirements=None, run_folder=tmpdir),
+    ).run_code_in_separate_process()
+    assert exception is None
+    assert 'fig.png' in created_files
+
+
 def test_runner_raise_code_timeout_exception():
     _, _, _, exception = \
         CodeRunnerWrapper(timeout_sec=1, code=code_runs_more_than_1_second).run_code_in_separate_process()
@@ -176,3 +248,11 @@ def test_run_code_timeout_multiprocessing(code):
     assert isinstance(exception.exception, TimeoutError)
     lineno_lines, msg = exception.get_lineno_line_message()
     assert msg == f'Code timeout after {timeout_sec} seconds.'
+
+
+def test_runner_reports_crash_of_process_as_failed_code(tmpdir):
+    code = 'import ctypes\nctypes.string_at(0)\n'
+    _, _, _, exception = CodeRunnerWrapper(code=code, code_runner=CodeRunner(run_folder=tmpdir)
+                                           ).run_code_in_separate_process()
+    assert isinstance(exception, FailedRunningCode)
+    assert isinstance(exception.exception, CodeProcessDiedException)
@@ -1,10 +1,12 @@
 import pickle
+import threading
 
 import pandas
 from pytest import raises
 
 from data_to_paper.run_gpt_code.overrides.dataframes.df_methods.methods import DataframeKeyError
 from data_to_paper.run_gpt_code.attr_replacers import PreventAssignmentToAttrs, AttrReplacer
+from data_to_paper.run_gpt_code.run_contexts import PreventFileOpen
 from tests.functional.run_gpt_code.fake_cls import TestDoNotAssign
 
 
@@ -60,3 +62,21 @@ def test_dataframe_key_error_is_serializable():
     assert error.key == unpickled_error.key, "Original error key does not match unpickled error key"
     assert error.available_keys == unpickled_error.available_keys, \
         "Original error available keys do not match unpickled error available keys"
+
+
+def test_prevent_file_open_does_not_apply_to_other_threads(tmpdir):
+    errors = []
+
+    def write_file():
+        try:
+            with open(tmpdir / 'other_thread.txt', 'w') as f:
+                f.write('written')
+        except Exception as e:
+            errors.append(e)
+
+    with PreventFileOpen(allowed_read_files=[], allowed_write_files=[]):
+        thread = threading.Thread(target=write_file)
+        thread.start()
+        thread.join()
+    assert errors == []
+    assert (tmpdir / 'other_thread.txt').read() == 'written'
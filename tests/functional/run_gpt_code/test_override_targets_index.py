@@ -0,0 +1,102 @@
+import json
+from dataclasses import dataclass
+
+import pytest
+from scipy import stats
+
+from data_to_paper.run_gpt_code.attr_replacers import SystematicFuncReplacerContext
+from data_to_paper.run_gpt_code.override_targets_index import OVERRIDE_TARGETS_INDEX, \
+    OVERRIDE_TARGETS_INDEX_FILEPATH
+from data_to_paper.run_gpt_code.overrides.contexts import OverrideStatisticsPackages
+from data_to_paper.run_gpt_code.overrides.scipy.override_scipy import ScipyPValueOverride
+
+
+@pytest.fixture()
+def index_filepath(tmpdir):
+    filepath = tmpdir / 'override_targets_index.json'
+    OVERRIDE_TARGETS_INDEX.clear()
+    with OVERRIDE_TARGETS_INDEX_FILEPATH.temporary_set(filepath):
+        yield filepath
+    OVERRIDE_TARGETS_INDEX.clear()
+
+
+def test_indexed_targets_are_same_as_found_targets(index_filepath):
+    found_targets = ScipyPValueOverride(use_targets_index=False)._get_all_targets()
+    assert (stats, 'ttest_ind') in found_targets
+    assert ScipyPValueOverride()._get_all_targets() == found_targets
+    assert index_filepath.exists()
+
+    # load from the persisted index:
+    OVERRIDE_TARGETS_INDEX.clear()
+    assert ScipyPValueOverride()._get_all_targets() == found_targets
+
+
+def test_persisted_targets_are_rebuilt_on_version_change(index_filepath):
+    ScipyPValueOverride()._get_all_targets()
+    entries = json.loads(index_filepath.read())
+    for entry in entries.values():
+        entry['versions']['scipy'] = '0.0.0'
+        entry['targets'] = []
+    index_filepath.write(json.dumps(entries))
+    OVERRIDE_TARGETS_INDEX.clear()
+    assert (stats, 'ttest_ind') in ScipyPValueOverride()._get_all_targets()
+
+
+def test_indexed_override_is_applied_and_reverted(index_filepath):
+    original_ttest_ind = stats.ttest_ind
+    for _ in range(2):
+        with ScipyPValueOverride():
+            assert stats.ttest_ind is not original_ttest_ind
+        assert stats.ttest_ind is original_ttest_ind
+
+
+def _enter_and_exit_override_statistics_packages():
+    with OverrideStatisticsPackages():
+        pass
+
+
+def test_benchmark_override_statistics_packages_without_index(benchmark, index_filepath):
+    def clear_index():
+        OVERRIDE_TARGETS_INDEX.clear()
+        with OVERRIDE_TARGETS_INDEX_FILEPATH.temporary_set(None):
+            _enter_and_exit_override_statistics_packages()
+    benchmark.pedantic(clear_index, rounds=3)
+
+
+def test_benchmark_override_statistics_packages_with_index(benchmark, index_filepath):
+    _enter_and_exit_override_statistics_packages()
+    benchmark(_enter_and_exit_override_statistics_packages)
+
+
+def test_targets_index_key_depends_on_fields(index_filepath):
+    assert ScipyPValueOverride()._get_targets_index_key() == ScipyPValueOverride()._get_targets_index_key()
+    assert ScipyPValueOverride(recursive=False)._get_targets_index_key() != \
+        ScipyPValueOverride()._get_targets_index_key()
+    assert ScipyPValueOverride(obj_import_str='scipy.stats')._get_targets_index_key() != \
+        ScipyPValueOverride()._get_targets_index_key()
+
+
+@dataclass
+class StatsFuncsWithPrefixReplacer(SystematicFuncReplacerContext):
+    prefix: str = 'ttest'
+
+    def _get_all_modules(self) -> list:
+        return [stats]
+
+    def _should_replace(self, parent, attr_name, attr) -> bool:
+        return attr_name.startswith(self.prefix)
+
+
+def test_targets_index_is_not_shared_between_different_fields(index_filepath):
+    assert (stats, 'ttest_ind') in StatsFuncsWithPrefixReplacer()._get_all_targets()
+    pearsonr_targets = StatsFuncsWithPrefixReplacer(prefix='pearson')._get_all_targets()
+    assert pearsonr_targets == \
+        StatsFuncsWithPrefixReplacer(prefix='pearson', use_targets_index=False)._get_all_targets()
+    assert (stats, 'pearsonr') in pearsonr_targets
+
+
+def test_targets_index_key_ignores_state_recorded_while_running(index_filepath):
+    context = ScipyPValueOverride()
+    key = context._get_targets_index_key()
+    context.pvalue_creating_funcs.append('ttest_ind')
+    assert context._get_targets_index_key() == key
@@ -1,10 +1,14 @@
 import pickle
 
+import numpy as np
+import pytest
 from pytest import fixture
 from pandas.core.dtypes.inference import is_list_like
-from pandas import DataFrame
+from pandas import DataFrame, Series
 
-from data_to_paper.run_gpt_code.overrides.pvalue import PValue, is_p_value
+from data_to_paper.run_gpt_code.overrides.pvalue import PValue, is_p_value, convert_to_p_value, \
+    is_containing_p_value, is_only_p_values, convert_p_values_to_floats
+from data_to_paper.run_gpt_code.run_issues import RunIssue
 
 
 @fixture()
@@ -42,3 +46,37 @@ def test_pvalue_unique():
     data_unique = data.unique()
     assert len(data_unique) == 2
     assert isinstance(data_unique[0], PValue)
+
+
+def test_convert_series_to_p_values():
+    pvalues = convert_to_p_value(Series([0.1, 0.02], index=['a', 'b'], name='p'), created_by='func')
+    assert pvalues.dtype == object
+    assert pvalues.name == 'p'
+    assert all(is_p_value(p) for p in pvalues)
+    assert pvalues['b'].value == 0.02
+    assert pvalues['b'].var_name == 'b'
+    assert pvalues['b'].created_by == 'func'
+
+
+def test_convert_array_to_p_values():
+    pvalues = convert_to_p_value(np.array([[0.1, 0.2], [0.3, 0.4]]), created_by='func')
+    assert pvalues.shape == (2, 2)
+    assert is_p_value(pvalues[1, 0])
+    assert pvalues[1, 0].value == 0.3
+
+
+def test_convert_series_with_nan_to_p_values_raises_with_var_name():
+    with pytest.raises(RunIssue) as e:
+        convert_to_p_value(Series([0.1, np.nan], index=['a', 'b']))
+    assert e.value.var_name == 'b'
+
+
+def test_p_value_checks_on_dataframe():
+    df = DataFrame({'coef': [1., 2.], 'p': convert_to_p_value(Series([0.1, 0.2]))})
+    assert is_containing_p_value(df)
+    assert not is_only_p_values(df)
+    assert is_only_p_values(df['p'])
+    assert not is_containing_p_value(df['coef'])
+    floats_df = convert_p_values_to_floats(df)
+    assert floats_df['p'].dtype == float
+    assert not is_containing_p_value(floats_df)
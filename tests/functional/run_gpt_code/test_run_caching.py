@@ -1,8 +1,12 @@
 import os
+import pickle
 from dataclasses import dataclass
 from pathlib import Path
 
-from data_to_paper.run_gpt_code.cache_runs import CacheRunToFile
+from data_to_paper.run_gpt_code.cache_runs import CacheRunToFile, RunCacheStore, directory_hash, \
+    directory_fingerprint, old_directory_hash
+from data_to_paper.utils.file_digest import FILE_DIGEST_CACHE
+from data_to_paper.utils.file_utils import resolve_path, use_directory
 
 
 @dataclass
@@ -22,7 +26,7 @@ class TestCacheRunToFile(CacheRunToFile):
     def _run(self):
         self.called_count += 1
         if self.write_files:
-            with open('result.txt', 'w') as f:
+            with open(resolve_path('result.txt'), 'w') as f:
                 f.write(self.result)
         return self.result
 
@@ -76,3 +80,65 @@ def test_cache_method_output_to_file_with_created_files(tmpdir):
     # check that the file was written:
     with open('output/result.txt') as f:
         assert f.read() == 'hello'
+
+
+def test_cache_migrates_legacy_pickle_file(tmpdir):
+    os.chdir(tmpdir)
+    os.mkdir('cache')
+    os.mkdir('output')
+    with open('output/data.csv', 'w') as f:
+        f.write('a,b\n1,2\n')
+    runner = get_runner('hello')
+    legacy_key = ('hello', directory_hash(runner.run_directory))
+    with open(runner.cache_filepath, 'wb') as f:
+        pickle.dump({legacy_key: ('cached hello', {})}, f)
+
+    assert runner.run() == 'cached hello'
+    assert runner.called_count == 0
+    with open(runner.cache_filepath, 'rb') as f:
+        assert f.read(len(RunCacheStore.SQLITE_HEADER)) == RunCacheStore.SQLITE_HEADER
+    assert not RunCacheStore(runner.cache_filepath).has_legacy_entries()
+    assert runner.run() == 'cached hello'
+
+
+def test_cache_replays_legacy_entry_keyed_by_relative_run_directory(tmpdir):
+    os.chdir(tmpdir)
+    os.mkdir('cache')
+    os.makedirs('project/output')
+    with open('project/output/data.csv', 'w') as f:
+        f.write('a,b\n1,2\n')
+    runner = TestCacheRunToFile(result='hello', cache_filepath=Path('cache/cache.pkl').absolute(),
+                                run_directory=Path('output'))
+    # recorded before, with the process cwd in the project folder:
+    os.chdir('project')
+    legacy_key = ('hello', old_directory_hash(runner.run_directory))
+    os.chdir(tmpdir)
+    with open(runner.cache_filepath, 'wb') as f:
+        pickle.dump({legacy_key: ('cached hello', {})}, f)
+
+    with use_directory('project'):
+        assert runner.run() == 'cached hello'
+    assert runner.called_count == 0
+
+
+def test_directory_fingerprint_rehashes_only_changed_files(tmpdir):
+    os.chdir(tmpdir)
+    os.mkdir('data')
+    for name in ['a.txt', 'b.txt']:
+        with open(os.path.join('data', name), 'w') as f:
+            f.write(name)
+    fingerprint = directory_fingerprint('data')
+
+    # unchanged files are not re-read:
+    path_a = os.path.abspath('data/a.txt')
+    stat_a, digest_a = FILE_DIGEST_CACHE._path_to_stat_and_digest[path_a]
+    FILE_DIGEST_CACHE._path_to_stat_and_digest[path_a] = (stat_a, 'fake digest')
+    assert directory_fingerprint('data') != fingerprint
+    FILE_DIGEST_CACHE._path_to_stat_and_digest[path_a] = (stat_a, digest_a)
+    assert directory_fingerprint('data') == fingerprint
+
+    # changed files are re-hashed:
+    with open('data/b.txt', 'w') as f:
+        f.write('changed')
+    os.utime('data/b.txt', ns=(0, 0))  # make sure the stat changes
+    assert directory_fingerprint('data') != fingerprint
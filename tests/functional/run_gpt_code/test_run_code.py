@@ -195,6 +195,19 @@ def test_run_code_allows_allowed_files(tmpdir):
     CodeRunner(allowed_open_write_files=['test.txt'], output_file_requirements=None).run(code)
 
 
+@pytest.mark.parametrize('write_code', [
+    "open('data.csv', 'r+').write('x')",
+    "pd.DataFrame({'a': [3]}).to_csv('data.csv')",
+])
+def test_run_code_raises_on_writing_read_only_files(tmpdir, write_code):
+    (tmpdir / 'data.csv').write('a\n1\n')
+    code = 'import pandas as pd\n' + write_code + '\n'
+    error = CodeRunner(allowed_open_read_files='all', allowed_open_write_files=['*.csv'], read_only_files=['data.csv'],
+                       output_file_requirements=None, run_folder=tmpdir).run(code)[3]
+    assert isinstance(error.exception, CodeWriteForbiddenFile)
+    assert (tmpdir / 'data.csv').read() == 'a\n1\n'
+
+
 def test_run_code_that_creates_pvalues_using_f_oneway(tmpdir):
     code = dedent_triple_quote_str("""
         import pickle
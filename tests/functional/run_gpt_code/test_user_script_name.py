@@ -0,0 +1,37 @@
+import traceback
+
+from data_to_paper.run_gpt_code.user_script_name import is_called_from_user_script, is_filename_gpt_code, \
+    is_filename_test
+
+
+def _is_called_from_user_script_by_extracting_stack(offset: int = 3) -> bool:
+    filename = traceback.extract_stack()[-offset].filename
+    return is_filename_gpt_code(filename) or is_filename_test(filename)
+
+
+def _library_func(check_func):
+    # mimics a library function (e.g. an overridden scipy function) checking whether it is called from user code
+    return check_func()
+
+
+def test_is_called_from_user_script_from_test_file():
+    assert _library_func(is_called_from_user_script) is True
+
+
+def test_is_called_from_user_script_offset():
+    assert _library_func(lambda: is_called_from_user_script(offset=2)) is True
+    assert is_called_from_user_script(offset=1) is False  # the frame of `is_called_from_user_script` itself
+
+
+def test_is_called_from_user_script_matches_extracting_stack():
+    for offset in range(2, 8):
+        assert _library_func(lambda: is_called_from_user_script(offset=offset)) == \
+            _library_func(lambda: _is_called_from_user_script_by_extracting_stack(offset=offset))
+
+
+def test_benchmark_is_called_from_user_script(benchmark):
+    assert benchmark(lambda: _library_func(is_called_from_user_script)) is True
+
+
+def test_benchmark_is_called_from_user_script_by_extracting_stack(benchmark):
+    assert benchmark(lambda: _library_func(_is_called_from_user_script_by_extracting_stack)) is True
@@ -1,4 +1,5 @@
 import os
+import time
 
 from typing import Union
 
@@ -6,6 +7,8 @@ import pytest
 
 from data_to_paper.servers.base_server import ListServerCaller, ParameterizedQueryServerCaller, \
     NoMoreResponsesToMockError, convert_args_kwargs_to_tuple, OrderedKeyToListServerCaller
+from data_to_paper.servers.json_dump import dump_to_json
+from data_to_paper.servers.records_log import RecordsLog, is_legacy_json_records_file
 
 
 class TestListServerCaller(ListServerCaller):
@@ -84,6 +87,28 @@ def test_ordered_key_server_mock_exception_when_no_responses_left():
             mock.get_server_response('key1')
 
 
+def test_ordered_key_server_replay_keys_concurrently():
+    server = TestOrderedKeyToListServerCaller()
+    with server.mock(old_records={'key0': ['response0'], 'key1': ['response1', 'response2'], 'key2': ['response3'],
+                                  'key3': ['response4']}) as mock:
+        assert mock.get_server_response('key0') == 'response0'
+        with mock.replay_keys_concurrently(['key1', 'key2']):
+            assert mock.get_server_response('key2') == 'response3'
+            assert mock.get_server_response('key1') == 'response1'
+            assert mock.get_server_response('key1') == 'response2'
+        assert mock.get_server_response('key3') == 'response4'
+
+
+def test_ordered_key_server_replay_keys_concurrently_orders_new_records_by_keys():
+    server = TestOrderedKeyToListServerCaller()
+    with server.mock(old_records={'key0': ['response0']}) as mock:
+        assert mock.get_server_response('key0') == 'response0'
+        with mock.replay_keys_concurrently(['key1', 'key2']):
+            assert mock.get_server_response('key2', 'response2') == 'response2'
+            assert mock.get_server_response('key1', 'response1') == 'response1'
+        assert list(mock.new_records) == ['key1', 'key2']
+
+
 def test_dict_server_mock_exception_when_no_responses_matching():
     server = TestParameterizedQueryServerCaller()
     with server.mock(old_records={convert_args_kwargs_to_tuple(('arg1', ), {}): 'response1',
@@ -150,3 +175,90 @@ def test_mock_server_saves_upon_error(tmpdir):
     new_server = TestListServerCaller()
     with new_server.mock_with_file(file_path=file_path) as mock:
         assert mock.get_server_response() == 'response1'
+
+
+def test_ordered_key_server_appends_new_records_to_file(tmpdir):
+    file_path = os.path.join(tmpdir, 'responses.txt')
+    server = TestOrderedKeyToListServerCaller()
+    with server.mock_with_file(file_path=file_path) as mock:
+        assert mock.get_server_response('key1', 'response1') == 'response1'
+        size_after_first_response = os.path.getsize(file_path)
+        assert mock.get_server_response('key2', 'response2') == 'response2'
+        assert os.path.getsize(file_path) > size_after_first_response
+
+    with open(file_path) as file:
+        assert len(file.readlines()) == 2
+
+    new_server = TestOrderedKeyToListServerCaller()
+    with new_server.mock_with_file(file_path=file_path) as mock:
+        assert mock.get_server_response('key1') == 'response1'
+        assert mock.get_server_response('key2') == 'response2'
+        assert mock.get_server_response('key2', 'response3') == 'response3'
+    assert new_server.all_records == {'key1': ['response1'], 'key2': ['response2', 'response3']}
+    assert RecordsLog(file_path).read() == {'key1': ['response1'], 'key2': ['response2', 'response3']}
+
+
+def test_ordered_key_server_migrates_legacy_json_file(tmpdir):
+    file_path = os.path.join(tmpdir, 'responses.txt')
+    dump_to_json({'key1': ['response1']}, file_path)
+    server = TestOrderedKeyToListServerCaller()
+    with server.mock_with_file(file_path=file_path) as mock:
+        assert mock.get_server_response('key1') == 'response1'
+    assert is_legacy_json_records_file(file_path)  # replaying only does not change the file
+
+    with server.mock_with_file(file_path=file_path) as mock:
+        assert mock.get_server_response('key1') == 'response1'
+        assert mock.get_server_response('key2', 'response2') == 'response2'
+    assert not is_legacy_json_records_file(file_path)
+    assert RecordsLog(file_path).read() == {'key1': ['response1'], 'key2': ['response2']}
+
+
+def test_ordered_key_server_delete_records_of_keys_truncates_file(tmpdir):
+    file_path = os.path.join(tmpdir, 'responses.txt')
+    server = TestOrderedKeyToListServerCaller()
+    with server.mock_with_file(file_path=file_path) as mock:
+        mock.get_server_response('key1', 'response1')
+        mock.get_server_response('key2', 'response2')
+        mock.get_server_response('key3', 'response3')
+        mock.delete_records_of_keys(['key2', 'key3'])
+        mock.save_records()
+        assert RecordsLog(file_path).read() == {'key1': ['response1']}
+        mock.get_server_response('key2', 'response4')
+    assert RecordsLog(file_path).read() == {'key1': ['response1'], 'key2': ['response4']}
+
+
+def test_records_log_truncate_keys_requires_trailing_keys(tmpdir):
+    file_path = os.path.join(tmpdir, 'responses.txt')
+    records_log = RecordsLog(file_path)
+    records_log.write({'key1': ['response1'], 'key2': ['response2']})
+    records_log.append('key1', 'response3')
+    assert not records_log.truncate_keys(['key2'])
+    assert records_log.truncate_keys(['key1', 'key2'])
+    assert RecordsLog(file_path).read() == {}
+
+
+class TestSlowParameterizedQueryServerCaller(ParameterizedQueryServerCaller):
+    @classmethod
+    def _get_server_response(cls, response: str, delay: float = 0.):
+        time.sleep(delay)
+        return response
+
+
+def test_get_server_responses_records_in_order_of_queries():
+    server = TestSlowParameterizedQueryServerCaller()
+    list_of_args_kwargs = [(('response1', ), dict(delay=0.2)), (('response2', ), dict(delay=0.)),
+                           (('response3', ), dict(delay=0.1))]
+    with server.mock(old_records={convert_args_kwargs_to_tuple(('response2', ), dict(delay=0.)): 'recorded'}) \
+            as mock:
+        responses_and_latencies = mock.get_server_responses(list_of_args_kwargs, max_workers=3)
+    assert [response for response, latency in responses_and_latencies] == ['response1', 'recorded', 'response3']
+    assert list(server.new_records.keys()) == [convert_args_kwargs_to_tuple(*list_of_args_kwargs[0]),
+                                               convert_args_kwargs_to_tuple(*list_of_args_kwargs[2])]
+
+
+def test_get_server_responses_raise_on_failed_query():
+    server = TestParameterizedQueryServerCaller()
+    with server.mock() as mock:
+        with pytest.raises(ValueError):
+            mock.get_server_responses([(('response1', ), {}), ((ValueError('failed'), ), {})], max_workers=2)
+    assert list(server.new_records.values()) == ['response1']
@@ -1,7 +1,9 @@
 import pytest
 
 from data_to_paper.utils.check_numeric_values import extract_numeric_values, find_non_matching_numeric_values, \
-    add_one_to_last_digit, is_after_smaller_than_sign, truncate_to_n_digits
+    add_one_to_last_digit, is_after_smaller_than_sign, truncate_to_n_digits, NumericSourceIndex, \
+    is_any_matching_value_after_rounding_to_n_digits, is_any_matching_value_after_truncating_to_n_digits, \
+    round_to_n_digits
 
 
 @pytest.mark.parametrize('text, numbers', [
@@ -68,6 +70,27 @@ def test_find_non_matching_numeric_values(source, target, non_matching):
     assert find_non_matching_numeric_values(source, target)[0] == non_matching
 
 
+def test_numeric_source_index_matches_as_list_based_matching():
+    source = 'p-value 1.0187912, variance 10.0000001, n=234,091, AUC 0.7525, 4.725, 12e+03, -0.0007732, 0.12345e10'
+    source_index = NumericSourceIndex(source)
+    target_numbers = ['1.02', '1.01', '10.00', '234000', '0.75', '0.753', '4.73', '4.72', '12000', '0.001', '1.23e9']
+    for n_digits in range(1, 6):
+        for target_number in target_numbers:
+            target_number = round_to_n_digits(target_number, n_digits)
+            assert source_index.is_matching_after_rounding_to_n_digits(target_number, n_digits) == \
+                is_any_matching_value_after_rounding_to_n_digits(source_index.str_source_numbers, target_number,
+                                                                 n_digits)
+            assert source_index.is_matching_after_truncating_to_n_digits(target_number, n_digits) == \
+                is_any_matching_value_after_truncating_to_n_digits(source_index.str_source_numbers, target_number,
+                                                                   n_digits)
+
+
+def test_find_non_matching_numeric_values_with_source_index():
+    source_index = NumericSourceIndex('p-value 1.0137912, variance 12.3456')
+    assert find_non_matching_numeric_values(source_index, 'p-value 1.02, variance 12.35') == (['1.02'], ['12.35'])
+    assert find_non_matching_numeric_values(source_index, 'p-value 1.01') == ([], ['1.01'])
+
+
 def test_is_smaller_than_sign():
     assert is_after_smaller_than_sign('0.05', 'p-value <0.05') is True
     assert is_after_smaller_than_sign('0.05', 'p-value < 0.05') is True
@@ -1,7 +1,8 @@
 import pytest
 
 from typing import List, Dict, Optional, Union, Tuple
-from data_to_paper.utils.check_type import validate_value_type, WrongTypeException, raise_on_wrong_func_argument_types
+from data_to_paper.utils.check_type import validate_value_type, WrongTypeException, \
+    raise_on_wrong_func_argument_types, compile_validator
 
 
 @pytest.mark.parametrize('value, type_, expected', [
@@ -54,3 +55,16 @@ def test_raise_on_wrong_variable_types(s_, d_, l_, o_, msg):
         with pytest.raises(TypeError) as e:
             raise_on_wrong_func_argument_types(func, s_, d_, l=l_, o=o_)
         assert msg in str(e.value)
+
+
+def test_compiled_validator_is_cached():
+    assert compile_validator(Dict[str, List[int]]) is compile_validator(Dict[str, List[int]])
+
+
+def _validate_additional_results(additional_results):
+    validate_value_type(additional_results, Dict[str, Union[List[float], float, str]])
+
+
+def test_benchmark_validate_value_type_of_large_dict(benchmark):
+    additional_results = {f'key_{i}': [float(j) for j in range(100)] for i in range(1000)}
+    benchmark(_validate_additional_results, additional_results)
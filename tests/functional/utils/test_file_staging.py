@@ -0,0 +1,71 @@
+import os
+import stat
+import zipfile
+
+from data_to_paper.env import DATA_STAGING_STORE_FOLDER, DATA_STAGING_STORE_MAX_SIZE_MB
+from data_to_paper.run_gpt_code.run_contexts import TrackCreatedFiles
+from data_to_paper.utils.file_staging import stage_file, stage_zip_content, get_extracted_zip_folder, \
+    get_stored_file
+
+
+def test_stage_file(tmpdir):
+    (tmpdir / 'source.csv').write('a,b\n1,2\n')
+    with DATA_STAGING_STORE_FOLDER.temporary_set(tmpdir / 'store'):
+        method = stage_file(tmpdir / 'source.csv', tmpdir / 'staged.csv')
+    assert method in ('reflink', 'hardlink', 'copy')
+    assert (tmpdir / 'staged.csv').read() == 'a,b\n1,2\n'
+    assert os.stat(tmpdir / 'source.csv').st_mode & stat.S_IWUSR  # the mode of the source is not changed
+
+
+def test_stage_file_never_links_the_source(tmpdir):
+    (tmpdir / 'source.csv').write('a,b\n1,2\n')
+    with DATA_STAGING_STORE_FOLDER.temporary_set(tmpdir / 'store'):
+        method = stage_file(tmpdir / 'source.csv', tmpdir / 'staged.csv')
+    assert not os.path.samefile(tmpdir / 'source.csv', tmpdir / 'staged.csv')
+    assert os.stat(tmpdir / 'source.csv').st_nlink == 1
+    if method == 'hardlink':
+        assert not os.stat(tmpdir / 'staged.csv').st_mode & stat.S_IWUSR  # linked to the read-only stored file
+
+
+def test_data_staging_store_evicts_least_recently_used_entries(tmpdir):
+    for i in range(3):
+        (tmpdir / f'source{i}.csv').write(str(i) * 1000)
+    with DATA_STAGING_STORE_FOLDER.temporary_set(tmpdir / 'store'), \
+            DATA_STAGING_STORE_MAX_SIZE_MB.temporary_set(2500 / 1024 / 1024):
+        stored_files = []
+        for i in range(3):
+            stored_files.append(get_stored_file(tmpdir / f'source{i}.csv'))
+            os.utime(stored_files[-1].parent, (i, i))
+        assert [stored_file.exists() for stored_file in stored_files] == [True, True, True]
+        get_stored_file(tmpdir / 'source2.csv')  # already stored, marked as recently used
+        (tmpdir / 'source3.csv').write('3' * 1000)
+        get_stored_file(tmpdir / 'source3.csv')
+    assert [stored_file.exists() for stored_file in stored_files] == [False, True, True]
+
+
+def test_stage_zip_content_extracts_zip_once(tmpdir):
+    with zipfile.ZipFile(tmpdir / 'data.zip', 'w') as zip_ref:
+        zip_ref.writestr('data.csv', 'a,b\n1,2\n')
+        zip_ref.writestr('sub/more.csv', 'c\n3\n')
+    with DATA_STAGING_STORE_FOLDER.temporary_set(tmpdir / 'store'):
+        files_to_methods = stage_zip_content(tmpdir / 'data.zip', tmpdir / 'run1')
+        extracted_folder = get_extracted_zip_folder(tmpdir / 'data.zip')
+        stage_zip_content(tmpdir / 'data.zip', tmpdir / 'run2')
+        assert os.listdir(tmpdir / 'store') == [extracted_folder.name]
+    assert set(files_to_methods) == {'data.csv', os.path.join('sub', 'more.csv')}
+    assert (tmpdir / 'run1' / 'data.csv').read() == 'a,b\n1,2\n'
+    assert (tmpdir / 'run2' / 'sub' / 'more.csv').read() == 'c\n3\n'
+
+
+def test_track_created_files_detects_file_replacing_a_staged_file(tmpdir):
+    (tmpdir / 'source.csv').write('a,b\n1,2\n')
+    os.chdir(tmpdir.mkdir('run'))
+    with DATA_STAGING_STORE_FOLDER.temporary_set(tmpdir / 'store'):
+        stage_file(tmpdir / 'source.csv', 'staged.csv')
+        stage_file(tmpdir / 'source.csv', 'replaced.csv')
+    with TrackCreatedFiles() as context:
+        os.remove('replaced.csv')
+        with open('replaced.csv', 'w') as f:
+            f.write('new content')
+    assert list(context.created_files) == ['replaced.csv']
+    assert (tmpdir / 'source.csv').read() == 'a,b\n1,2\n'
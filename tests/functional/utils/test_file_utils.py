@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from data_to_paper.utils.file_utils import use_directory, resolve_path, get_current_directory
+from data_to_paper.utils.subprocess_call import get_subprocess_kwargs
+
+
+def test_use_directory_does_not_change_cwd(tmpdir):
+    cwd = os.getcwd()
+    with use_directory(tmpdir):
+        assert os.getcwd() == cwd
+        assert get_current_directory() == tmpdir
+        assert resolve_path('file.txt') == os.path.join(tmpdir, 'file.txt')
+        assert resolve_path(os.path.abspath('file.txt')) == os.path.abspath('file.txt')
+        with use_directory('sub'):
+            assert get_current_directory() == tmpdir / 'sub'
+    assert resolve_path('file.txt') == 'file.txt'
+
+
+def test_use_directory_is_local_to_thread(tmpdir):
+    def get_directory(index):
+        with use_directory(tmpdir.mkdir(f'dir_{index}')):
+            output = subprocess.run([sys.executable, '-c', 'import os; print(os.getcwd())'],
+                                    **get_subprocess_kwargs())
+            return get_current_directory(), output.stdout.decode().strip()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(get_directory, range(2)))
+    for index, (directory, subprocess_cwd) in enumerate(results):
+        assert directory == tmpdir / f'dir_{index}'
+        assert subprocess_cwd == str(tmpdir / f'dir_{index}')
@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+import colorama
+
+from data_to_paper.utils.print_to_file import console_log_file_context, print_and_log, print_and_log_red, \
+    flush_console_log, CONSOLE_LOG_MAX_SIZE_MB, IS_CONSOLE_LOG_JSONL
+
+
+def test_console_log_is_buffered_and_flushed(tmpdir):
+    tmpdir = Path(tmpdir)
+    file_path = tmpdir / 'console_log.txt'
+    with console_log_file_context(file_path):
+        print_and_log_red('hello')
+        flush_console_log()
+        assert file_path.read_text() == colorama.Fore.RED + 'hello' + colorama.Style.RESET_ALL + '\n'
+        assert (tmpdir / 'console_log_bw.txt').read_text() == 'hello\n'
+        print_and_log('world')
+    assert (tmpdir / 'console_log_bw.txt').read_text() == 'hello\nworld\n'
+    html = (tmpdir / 'console_log.html').read_text()
+    assert 'hello' in html and 'world' in html
+    assert html.strip().endswith('</html>')
+
+
+def test_console_log_is_rotated_by_size(tmpdir):
+    tmpdir = Path(tmpdir)
+    file_path = tmpdir / 'console_log.txt'
+    with CONSOLE_LOG_MAX_SIZE_MB.temporary_set(10 / 1024 / 1024), console_log_file_context(file_path):
+        for text in ['first line', 'second line', 'third']:
+            print_and_log(text)
+    assert (tmpdir / 'console_log_bw.2.txt').read_text() == 'first line\n'
+    assert (tmpdir / 'console_log_bw.1.txt').read_text() == 'second line\n'
+    assert (tmpdir / 'console_log_bw.txt').read_text() == 'third\n'
+    assert 'first line' in (tmpdir / 'console_log.html').read_text()
+
+
+def test_console_log_jsonl(tmpdir):
+    tmpdir = Path(tmpdir)
+    with IS_CONSOLE_LOG_JSONL.temporary_set(True), console_log_file_context(tmpdir / 'console_log.txt'):
+        print_and_log_red('hello')
+    records = [json.loads(line) for line in (tmpdir / 'console_log.jsonl').read_text().splitlines()]
+    assert [(record['text'], record['color']) for record in records] == [('hello\n', colorama.Fore.RED)]
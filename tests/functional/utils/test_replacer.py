@@ -28,3 +28,30 @@ def test_replacer_with_inline_formatting(greeter):
     greeter.inline_formatted_name = Replacer(greeter, 'the {} joe', args=('lousy',))
     assert format_value(greeter, greeter.inline_formatted_greeting) == \
            'hello, I am the lousy joe.'
+
+
+@dataclass
+class CountingGreeter:
+    num_name_calls: int = 0
+    adjective: str = 'amazing'
+    greeting: str = 'hello, I am {full_name}.'
+    greetings: str = '{greeting} {greeting} {full_name}'
+
+    @property
+    def full_name(self):
+        self.num_name_calls += 1
+        return 'the {adjective} john'
+
+
+def test_replacer_resolves_each_attribute_once_per_formatting():
+    greeter = CountingGreeter()
+    assert format_value(greeter, greeter.greetings) == \
+        'hello, I am the amazing john. hello, I am the amazing john. the amazing john'
+    assert greeter.num_name_calls == 1
+    format_value(greeter, greeter.greetings)
+    assert greeter.num_name_calls == 2
+
+
+def test_replacer_with_non_attribute_placeholders(greeter):
+    assert Replacer(greeter, '{age} {not an attribute} {{age}} {} {}', args=('x', ),
+                    kwargs={'not an attribute': 'y'}).format_text() == '20 y {age} x {}'
@@ -1,5 +1,11 @@
 import unittest
-from data_to_paper.utils.types import ListBasedSet, MemoryDict
+
+import pytest
+
+from data_to_paper.conversation.stage import delete_all_stages_following_stage
+from data_to_paper.research_types.hypothesis_testing.scientific_stage import ScientificStage
+from data_to_paper.servers.model_engine import ModelEngine
+from data_to_paper.utils.types import ListBasedSet, MemoryDict, IndexOrderedEnum, OrderedSet
 
 
 def test_list_based_set():
@@ -80,3 +86,66 @@ class MemoryDictTests(unittest.TestCase):
         my_dict['key1'] = 'value1'
         my_dict['key2'] = 'value2'
         self.assertEqual(len(my_dict), 2)
+
+
+class Color(IndexOrderedEnum):
+    RED = 'red'
+    GREEN = 'green'
+    BLUE = 'blue'
+
+
+def test_index_ordered_enum_order_and_hash():
+    assert [color.get_index() for color in Color] == [0, 1, 2]
+    assert Color.RED < Color.GREEN <= Color.GREEN < Color.BLUE
+    assert Color.RED.get_next() is Color.GREEN
+    with pytest.raises(ValueError):
+        Color.BLUE.get_next()
+    assert (Color.get_first(), Color.get_last()) == (Color.RED, Color.BLUE)
+    assert {Color.RED: 1}[Color.RED] == 1
+    assert Color.get_by_value('green') is Color.GREEN
+    with pytest.raises(ValueError):
+        Color.get_by_value('yellow')
+
+
+def test_delete_all_stages_following_stage_with_str_keys():
+    data = {ScientificStage.DATA: 1, ScientificStage.CODE.value: 2, ScientificStage.INTERPRETATION: 3}
+    delete_all_stages_following_stage(data, ScientificStage.CODE)
+    assert data == {ScientificStage.DATA: 1}
+    with pytest.raises(ValueError):
+        delete_all_stages_following_stage({'not a stage': 1}, ScientificStage.CODE)
+
+
+def _compare_and_hash_enum_members(members):
+    for member in members[:-1]:
+        assert member.get_next() > member
+    for member in members:
+        hash(member)
+        for other in members:
+            assert (member < other) == (member.get_index() < other.get_index())
+
+
+def test_benchmark_stage_compare_and_hash(benchmark):
+    benchmark(_compare_and_hash_enum_members, list(ScientificStage))
+
+
+def test_benchmark_model_engine_compare_and_hash(benchmark):
+    benchmark(_compare_and_hash_enum_members, list(ModelEngine))
+
+
+def test_ordered_set_with_unhashable_elements():
+    s = OrderedSet([3, [1], None, 'a', [1], 3])
+    assert list(s) == [3, [1], None, 'a']
+    assert [1] in s and None in s and [2] not in s
+    s.remove([1])
+    s.remove(None)
+    assert list(s) == [3, 'a']
+    with pytest.raises(ValueError):
+        s.remove([1])
+    assert s - {3} == OrderedSet(['a'])
+
+
+def test_benchmark_ordered_set_difference(benchmark):
+    files_and_metadata = [(f'file_{i}.csv', (float(i), i)) for i in range(5000)]
+    before = OrderedSet(files_and_metadata)
+    after = OrderedSet(files_and_metadata + [('new_file.csv', (0., 0))])
+    assert list(benchmark(lambda: after - before)) == [('new_file.csv', (0., 0))]
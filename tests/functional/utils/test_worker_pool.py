@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+
+from data_to_paper.env import MAX_EXEC_TIME
+from data_to_paper.utils.mutable import get_package_mutables_values, set_package_mutables_values
+from data_to_paper.utils.worker_pool import WorkerPool, TaskTimeoutError, WorkerDiedError
+
+
+def _get_pid():
+    return os.getpid()
+
+
+def _raise_value_error():
+    raise ValueError('bad value')
+
+
+def _sleep(sec):
+    time.sleep(sec)
+
+
+def _exit_process():
+    os._exit(3)
+
+
+def _allocate_mb(size_mb):
+    return len(bytearray(size_mb * 1024 ** 2))
+
+
+def _get_max_exec_time(mutables_values):
+    set_package_mutables_values(mutables_values)
+    return MAX_EXEC_TIME.val
+
+
+@pytest.fixture()
+def pool():
+    pool = WorkerPool(max_tasks_per_worker=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_worker_pool_runs_in_other_process(pool):
+    result, is_exception = pool.run(_get_pid)
+    assert not is_exception
+    assert result != os.getpid()
+
+
+def test_worker_pool_reuses_worker(pool):
+    pid1, _ = pool.run(_get_pid)
+    pid2, _ = pool.run(_get_pid)
+    pid3, _ = pool.run(_get_pid)
+    assert pid1 == pid2
+    assert pid3 != pid1  # recycled after max_tasks_per_worker
+
+
+def test_worker_pool_returns_exception(pool):
+    result, is_exception = pool.run(_raise_value_error)
+    assert is_exception
+    assert isinstance(result, ValueError)
+
+
+def test_worker_pool_timeout_kills_worker(pool):
+    with pytest.raises(TaskTimeoutError):
+        pool.run(_sleep, args=(10, ), timeout_sec=0.5)
+    result, is_exception = pool.run(_get_pid)
+    assert not is_exception
+
+
+def test_worker_pool_task_gets_mutables_set_after_worker_started(pool):
+    pool.prewarm()
+    with MAX_EXEC_TIME.temporary_set(7):
+        result, is_exception = pool.run(_get_max_exec_time, args=(get_package_mutables_values(), ))
+    assert not is_exception
+    assert result == 7
+
+
+def test_worker_pool_raises_when_worker_dies(pool):
+    with pytest.raises(WorkerDiedError) as exc_info:
+        pool.run(_exit_process)
+    assert exc_info.value.exit_code == 3
+    result, is_exception = pool.run(_get_pid)
+    assert not is_exception
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='memory limit is not supported')
+def test_worker_pool_limits_memory_of_worker():
+    pool = WorkerPool(max_memory_mb=1000)
+    try:
+        result, is_exception = pool.run(_allocate_mb, args=(2000, ))
+        assert is_exception
+        assert isinstance(result, MemoryError)
+        assert pool.run(_allocate_mb, args=(10, )) == (10 * 1024 ** 2, False)
+    finally:
+        pool.shutdown()